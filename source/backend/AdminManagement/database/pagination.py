@@ -0,0 +1,54 @@
+"""
+Keyset (cursor) pagination for the admin list endpoints.
+
+Pages are ordered by primary key and continued with ``WHERE id < :last_id`` (or ``>``
+for ascending lists), so fetching a page deep into a big table costs the same as the
+first one, unlike ``OFFSET``. The cursor handed to the client is an opaque token
+wrapping the last id of the previous page.
+"""
+import base64
+import json
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def date_range(query, column, created_from=None, created_to=None):
+    """ Restrict ``query`` to rows whose ``column`` falls in ``[created_from, created_to]``. """
+    if created_from is not None:
+        query = query.filter(column >= created_from)
+    if created_to is not None:
+        query = query.filter(column <= created_to)
+    return query
+
+
+def paginate(query, key, limit: int, cursor: str = None, include_total: bool = False, descending: bool = True) -> dict:
+    """
+    Return one page of ``query`` ordered by the unique column ``key``.
+    ``total`` (the number of rows matching the filters, ignoring the cursor) is only
+    computed when asked for, since it is the one part that grows with the table.
+    """
+    total = query.order_by(None).count() if include_total else None
+
+    if cursor:
+        last_id = decode_cursor(cursor)
+        query = query.filter(key < last_id if descending else key > last_id)
+
+    # Una riga in più per sapere se esiste una pagina successiva
+    rows = query.order_by(key.desc() if descending else key.asc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(getattr(rows[limit - 1], key.key)) if len(rows) > limit else None
+
+    return {"items": rows[:limit], "next_cursor": next_cursor, "total": total}
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database.database import engine, Base, get_db
+from sapienza_common.health import router as health_router
+from sapienza_common.metrics import router as metrics_router
+from sapienza_common.passwords import stop_pool
 from routes.admin import router as admin_router
 
 app = FastAPI()
@@ -20,8 +22,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pool di processi per gli hash dell'importazione utenti: avviato alla prima importazione
+@app.on_event("shutdown")
+def stop_password_pool():
+    stop_pool()
+
 # Inclusione delle route specifiche per la gestione degli appunti
 app.include_router(admin_router, prefix="/admin")
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 @app.get("/")
 def root():
@@ -1,8 +0,0 @@
-from .user import User
-from .faculty import Faculty
-from .course import Course
-from .teacher import Teacher
-from .note import Note
-from .review import Review 
-from .note_ratings import NoteRating # Aggiunto per la tabella delle recensioni dei corsi
-from .report import Report
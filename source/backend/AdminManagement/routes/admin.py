@@ -1,18 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy import select, exists, or_, func, update, delete
+from typing import List, Optional
+from datetime import datetime
 from sqlalchemy.orm import Session
-from database.database import get_db
-from models.user import User
-from models.faculty import Faculty
-from models.course import Course
-from models.teacher import Teacher
-from models.note import Note
-from models.review import Review
-from models.report import Report
-from database.mongo import fs
-from auth.auth import get_current_user
-from models.note_ratings import NoteRating
+from sapienza_common.database import get_db, remove, SOFT_DELETE
+from sapienza_common.models.user import User
+from sapienza_common.models.faculty import Faculty
+from sapienza_common.models.course import Course
+from sapienza_common.models.teacher import Teacher
+from sapienza_common.models.note import Note
+from sapienza_common.models.review import Review
+from sapienza_common.models.report import Report
+from database.pagination import paginate, date_range, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from sapienza_common.stats import note_rating_changed, review_changed, review_scores, refresh_stats, stats_affected_by_user
+from sapienza_common.auth import get_current_user, get_current_principal, Principal, invalidate_cached_user
+from sapienza_common.models.note_ratings import NoteRating
+from sapienza_common.user_import import parse_users_csv, import_users
 from schemas.admin import (
     UserResponse, UserDeleteResponse,
     NoteResponse, NoteDeleteResponse,
@@ -20,24 +23,47 @@ from schemas.admin import (
     FacultyResponse, FacultyCreate,
     CourseResponse, CourseCreate,
     TeacherResponse, NoteRatingResponse, NoteRatingDeleteResponse, TeacherCreate,
+    Page, AdminSummaryResponse, BulkDeleteRequest, BulkDeleteResponse,
+    ModerationRequest, ModerationResponse, UserImportResponse,
 )
 
 from schemas.report import ReportResponse
 
 router = APIRouter()
 
-def reset_sequence(db, table_name, column_name):
-    """ Reset the sequence to the next available ID, avoiding conflicts. """
-    db.execute(text(f"""
-        SELECT setval(pg_get_serial_sequence('{table_name}', '{column_name}'), 
-                      COALESCE((SELECT MAX({column_name}) FROM {table_name}) + 1, 1), false)
-    """))
-    db.commit()
 
+# 📊 **Riepilogo per la dashboard admin**
+@router.get("/summary", response_model=AdminSummaryResponse)
+def get_summary(
+    recent: int = Query(10, ge=0, le=50),
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_principal)
+):
+    """
+    Table counts and the ``recent`` latest reports in two statements, instead of
+    downloading the full user, faculty and report lists to count them client-side.
+    """
+    if not admin.is_admin:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    def count(model):
+        return select(func.count()).select_from(model).scalar_subquery()
+
+    counts = db.execute(select(
+        count(User).label("users"),
+        count(Faculty).label("faculties"),
+        count(Course).label("courses"),
+        count(Note).label("notes"),
+        count(Review).label("reviews"),
+        count(Report).label("reports"),
+    )).one()
+
+    recent_reports = db.query(Report).order_by(Report.id_report.desc()).limit(recent).all()
+    return {"counts": counts._asdict(), "recent_reports": recent_reports}
 
 # 🔍 1️⃣ **Gestione utenti**
 @router.get("/users/{user_id}", response_model=UserResponse)
-def get_user_detail(user_id: int, db: Session = Depends(get_db), admin=Depends(get_current_user)):
+def get_user_detail(user_id: int, db: Session = Depends(get_db), admin=Depends(get_current_principal)):
     if not admin.is_admin:
         raise HTTPException(status_code=403, detail="Unauthorized")
     
@@ -59,16 +85,26 @@ def delete_user(user_id: int, db: Session = Depends(get_db), admin=Depends(get_c
     if user.id == admin.id:
         raise HTTPException(status_code=403, detail="Admins cannot delete themselves")
     
+    email = user.email
+    note_ids, course_ids = stats_affected_by_user(db, user.id)
     db.delete(user)
+    db.flush()
+    refresh_stats(db, note_ids, course_ids)
     db.commit()
+    invalidate_cached_user(email, user_id)
 
-    reset_sequence(db, "users", "id")
     return {"message": "User deleted successfully"}
 
-@router.get("/users", response_model=List[UserResponse])
+@router.get("/users", response_model=Page[UserResponse])
 def get_all_users(
+    faculty_id: Optional[int] = None,
+    is_admin: Optional[bool] = None,
+    search: Optional[str] = Query(None, min_length=1, description="Parte di email, nome o cognome"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     # Verifica che sia un admin
     if not current_user.is_admin:
@@ -77,14 +113,72 @@ def get_all_users(
             detail="Only admins can view all users"
         )
 
-    return db.query(User).all()
+    query = db.query(User)
+    if faculty_id is not None:
+        query = query.filter(User.faculty_id == faculty_id)
+    if is_admin is not None:
+        query = query.filter(User.is_admin == is_admin)
+    if search:
+        pattern = f"%{search}%"
+        query = query.filter(or_(User.email.ilike(pattern), User.first_name.ilike(pattern), User.last_name.ilike(pattern)))
+
+    return paginate(query, User.id, limit, cursor, include_total, descending=False)
+
+# L'hash bcrypt costa ~0,5 s a password per CPU: 100 righe restano sotto il minuto (timeout
+# tipico di proxy e browser) anche su una CPU sola. Le coorti più grandi passano dalla CLI
+# (`python -m commands.import_users` dell'Auth Service, senza limite di righe)
+MAX_IMPORT_ROWS = 100
+
+# 📥 Importazione di una coorte di studenti da CSV (hash e INSERT a blocchi)
+@router.post("/users/import", response_model=UserImportResponse)
+async def import_users_csv(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_principal)
+):
+    if not admin.is_admin:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    try:
+        users, errors = parse_users_csv((await file.read()).decode("utf-8-sig"))
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {exc}")
+    if len(users) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=413, detail=f"Too many rows ({len(users)}), the limit is {MAX_IMPORT_ROWS}: use commands.import_users for larger imports")
+
+    return await import_users(db, users, errors)
 
 # 📝 2️⃣ **Gestione note e recensioni**
-@router.get("/notes", response_model=List[NoteResponse])
-def get_notes(db: Session = Depends(get_db), admin=Depends(get_current_user)):
+@router.get("/notes", response_model=Page[NoteResponse])
+def get_notes(
+    course_id: Optional[int] = None,
+    faculty_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    reported: Optional[bool] = Query(None, description="Solo appunti con (true) o senza (false) segnalazioni"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db),
+    admin=Depends(get_current_principal)
+):
     if not admin.is_admin:
         raise HTTPException(status_code=403, detail="Unauthorized")
-    return db.query(Note).all()
+
+    query = db.query(Note)
+    if course_id is not None:
+        query = query.filter(Note.course_id == course_id)
+    if faculty_id is not None:
+        query = query.filter(Note.course_id.in_(select(Course.id).where(Course.faculty_id == faculty_id)))
+    if student_id is not None:
+        query = query.filter(Note.student_id == student_id)
+    if reported is not None:
+        has_reports = exists().where(Report.id_note == Note.id)
+        query = query.filter(has_reports if reported else ~has_reports)
+    query = date_range(query, Note.created_at, created_from, created_to)
+
+    return paginate(query, Note.id, limit, cursor, include_total)
 
 @router.delete("/notes/{note_id}", response_model=NoteDeleteResponse)
 def delete_note(note_id: int, db: Session = Depends(get_db), admin=Depends(get_current_user)):
@@ -95,42 +189,115 @@ def delete_note(note_id: int, db: Session = Depends(get_db), admin=Depends(get_c
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
 
-    try:
-        fs.delete(note.file_id)
-    except:
-        pass  # Se il file non esiste
-
-    db.delete(note)
+    course_id = note.course_id
+    remove(db, note)
+    db.flush()
+    refresh_stats(db, course_ids=[course_id])
     db.commit()
 
-    # Reset sequence
-    reset_sequence(db, "notes", "id")
+    # Il file in GridFS lo rilascia il worker di GC di NotesManagement (il DELETE lo accoda)
     return {"message": "Note deleted successfully"}
 
-@router.get("/reviews", response_model=List[ReviewResponse])
-def get_reviews(db: Session = Depends(get_db), admin=Depends(get_current_user)):
+@router.get("/reviews", response_model=Page[ReviewResponse])
+def get_reviews(
+    course_id: Optional[int] = None,
+    faculty_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    reported: Optional[bool] = Query(None, description="Solo recensioni con (true) o senza (false) segnalazioni"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db),
+    admin=Depends(get_current_principal)
+):
     if not admin.is_admin:
         raise HTTPException(status_code=403, detail="Unauthorized")
-    return db.query(Review).all()
+
+    query = db.query(Review)
+    if course_id is not None:
+        query = query.filter(Review.course_id == course_id)
+    if faculty_id is not None:
+        query = query.filter(Review.course_id.in_(select(Course.id).where(Course.faculty_id == faculty_id)))
+    if student_id is not None:
+        query = query.filter(Review.student_id == student_id)
+    if reported is not None:
+        has_reports = exists().where(Report.id_review == Review.id)
+        query = query.filter(has_reports if reported else ~has_reports)
+    query = date_range(query, Review.created_at, created_from, created_to)
+
+    return paginate(query, Review.id, limit, cursor, include_total)
 
 @router.delete("/reviews/{review_id}", response_model=ReviewDeleteResponse)
 def delete_review(review_id: int, db: Session = Depends(get_db), admin=Depends(get_current_user)):
     if not admin.is_admin:
         raise HTTPException(status_code=403, detail="Unauthorized")
 
-    review = db.query(Review).filter(Review.id == review_id).first()
+    # Bloccata: una modifica o cancellazione concorrente non applica delta su voti vecchi
+    review = db.query(Review).filter(Review.id == review_id).with_for_update().first()
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
 
-    db.delete(review)
+    if remove(db, review):
+        review_changed(db, review.course_id, old=review_scores(review))
     db.commit()
 
-    reset_sequence(db, "reviews", "id")
     return {"message": "Review deleted successfully"}
 
+# 🧹 **Eliminazione in blocco (pulizie di moderazione)**
+BULK_TARGETS = {"notes": Note, "reviews": Review, "note_ratings": NoteRating, "reports": Report}
+
+def delete_many(db: Session, target: str, ids: List[int]):
+    """
+    Delete (or tombstone, with ``SOFT_DELETE``) many rows of one kind with a single
+    set-based statement and recompute the rating aggregates they touched, all inside
+    the caller's transaction. Returns the number of rows removed. The GridFS blobs of
+    deleted notes are queued for the GC worker by the ``notes`` delete trigger.
+    """
+    model = BULK_TARGETS[target]
+    key = Report.id_report if model is Report else model.id
+
+    note_ids, course_ids = set(), set()
+    if model is Note:
+        course_ids = set(db.scalars(select(Note.course_id).where(Note.id.in_(ids))))
+    elif model is Review:
+        course_ids = set(db.scalars(select(Review.course_id).where(Review.id.in_(ids))))
+    elif model is NoteRating:
+        rows = db.execute(
+            select(NoteRating.note_id, Note.course_id)
+            .join(Note, Note.id == NoteRating.note_id)
+            .where(NoteRating.id.in_(ids))
+        ).all()
+        note_ids = {row.note_id for row in rows}
+        course_ids = {row.course_id for row in rows}
+
+    if SOFT_DELETE and model is not Report:
+        statement = update(model).where(key.in_(ids), model.deleted_at.is_(None)).values(deleted_at=datetime.utcnow())
+    else:
+        # Valutazioni, segnalazioni e aggregati collegati spariscono con ON DELETE CASCADE
+        statement = delete(model).where(key.in_(ids))
+    deleted = db.execute(statement.execution_options(synchronize_session=False)).rowcount
+
+    refresh_stats(db, note_ids, course_ids)
+    return deleted
+
+@router.post("/bulk-delete", response_model=BulkDeleteResponse)
+def bulk_delete(
+    request: BulkDeleteRequest,
+    db: Session = Depends(get_db),
+    admin=Depends(get_current_user)
+):
+    if not admin.is_admin:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    deleted = delete_many(db, request.target, request.ids)
+    db.commit()
+    return {"deleted": deleted}
+
 # 🏫 3️⃣ **Gestione facoltà e corsi**
 @router.get("/faculties", response_model=List[FacultyResponse])
-def get_faculties(db: Session = Depends(get_db), admin=Depends(get_current_user)):
+def get_faculties(db: Session = Depends(get_db), admin=Depends(get_current_principal)):
     return db.query(Faculty).all()
 
 @router.post("/faculties", response_model=FacultyResponse)
@@ -149,16 +316,15 @@ def delete_faculty(faculty_id: int, db: Session = Depends(get_db), admin=Depends
     db.delete(faculty)
     db.commit()
 
-    reset_sequence(db, "faculties", "id")
     return {"message": "Faculty deleted successfully"}
 
 # 👨‍🏫 4️⃣ **Gestione insegnanti**
 @router.get("/teachers", response_model=List[TeacherResponse])
-def get_all_teachers(db: Session = Depends(get_db), admin=Depends(get_current_user)):
+def get_all_teachers(db: Session = Depends(get_db), admin=Depends(get_current_principal)):
     return db.query(Teacher).all()
 
 @router.get("/courses/{course_id}/teachers", response_model=List[TeacherResponse])
-def get_teacher_by_course(course_id: int, db: Session = Depends(get_db), admin=Depends(get_current_user)):
+def get_teacher_by_course(course_id: int, db: Session = Depends(get_db), admin=Depends(get_current_principal)):
     return db.query(Teacher).join(Course).filter(Course.id == course_id).all()
 
 @router.delete("/teachers/{teacher_id}")
@@ -170,40 +336,77 @@ def delete_teacher(teacher_id: int, db: Session = Depends(get_db), admin=Depends
     db.delete(teacher)
     db.commit()
 
-    reset_sequence(db, "teachers", "id")
     return {"message": "Teacher deleted successfully"}
 
-@router.get("/note-ratings", response_model=List[NoteRatingResponse])
-def get_note_ratings(db: Session = Depends(get_db), admin=Depends(get_current_user)):
+@router.get("/note-ratings", response_model=Page[NoteRatingResponse])
+def get_note_ratings(
+    note_id: Optional[int] = None,
+    course_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db),
+    admin=Depends(get_current_principal)
+):
     if not admin.is_admin:
         raise HTTPException(status_code=403, detail="Unauthorized")
-    return db.query(NoteRating).all()
+
+    query = db.query(NoteRating)
+    if note_id is not None:
+        query = query.filter(NoteRating.note_id == note_id)
+    if course_id is not None:
+        query = query.filter(NoteRating.note_id.in_(select(Note.id).where(Note.course_id == course_id)))
+    if student_id is not None:
+        query = query.filter(NoteRating.student_id == student_id)
+    query = date_range(query, NoteRating.created_at, created_from, created_to)
+
+    return paginate(query, NoteRating.id, limit, cursor, include_total)
 
 @router.delete("/note-ratings/{rating_id}", response_model=NoteRatingDeleteResponse)
 def delete_note_rating(rating_id: int, db: Session = Depends(get_db), admin=Depends(get_current_user)):
     if not admin.is_admin:
         raise HTTPException(status_code=403, detail="Unauthorized")
 
-    rating = db.query(NoteRating).filter(NoteRating.id == rating_id).first()
+    # Bloccata: una modifica o cancellazione concorrente non applica delta su voti vecchi
+    rating = db.query(NoteRating).filter(NoteRating.id == rating_id).with_for_update().first()
     if not rating:
         raise HTTPException(status_code=404, detail="Note rating not found")
 
-    db.delete(rating)
+    if remove(db, rating):
+        note_rating_changed(db, rating.note, old=rating.rating)
     db.commit()
     return {"message": "Note rating deleted successfully"}
 
 # 📚 **5️⃣ Gestione Corsi**
 
-@router.get("/courses", response_model=List[CourseResponse])
-def get_courses(db: Session = Depends(get_db), admin=Depends(get_current_user)):
-    """✅ Ottiene tutti i corsi (solo per admin)"""
+@router.get("/courses", response_model=Page[CourseResponse])
+def get_courses(
+    faculty_id: Optional[int] = None,
+    teacher_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db),
+    admin=Depends(get_current_principal)
+):
+    """✅ Ottiene i corsi, una pagina alla volta (solo per admin)"""
     if not admin.is_admin:
         raise HTTPException(status_code=403, detail="Unauthorized")
-    return db.query(Course).all()
+
+    query = db.query(Course)
+    if faculty_id is not None:
+        query = query.filter(Course.faculty_id == faculty_id)
+    if teacher_id is not None:
+        query = query.filter(Course.teacher_id == teacher_id)
+
+    return paginate(query, Course.id, limit, cursor, include_total, descending=False)
 
 
 @router.get("/faculties/{faculty_id}/courses", response_model=List[CourseResponse])
-def get_courses_by_faculty(faculty_id: int, db: Session = Depends(get_db), admin=Depends(get_current_user)):
+def get_courses_by_faculty(faculty_id: int, db: Session = Depends(get_db), admin=Depends(get_current_principal)):
     """✅ Ottiene tutti i corsi di una specifica facoltà (solo per admin)"""
     if not admin.is_admin:
         raise HTTPException(status_code=403, detail="Unauthorized")
@@ -218,7 +421,7 @@ def get_courses_by_faculty(faculty_id: int, db: Session = Depends(get_db), admin
 
 @router.delete("/courses/{course_id}")
 def delete_course(course_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    """ Deletes a course and resets the course sequence. """
+    """ Deletes a course. """
     
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Permission denied")
@@ -231,9 +434,6 @@ def delete_course(course_id: int, db: Session = Depends(get_db), current_user=De
     db.delete(course)
     db.commit()
 
-    # Reset sequence
-    reset_sequence(db, "courses", "id")
-
     return {"message": "Course deleted successfully"}
 
 
@@ -266,12 +466,41 @@ def add_course(course: CourseCreate, db: Session = Depends(get_db), admin=Depend
     return new_course
 
 
-@router.get("/reports", response_model=List[ReportResponse])
-def get_all_reports(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("/reports", response_model=Page[ReportResponse])
+def get_all_reports(
+    reporter_id: Optional[int] = Query(None, description="Utente che ha fatto la segnalazione"),
+    target: Optional[str] = Query(None, pattern="^(review|note)$"),
+    review_ids: Optional[List[int]] = Query(None),
+    note_ids: Optional[List[int]] = Query(None),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Only admins can view reports.")
 
-    return db.query(Report).all()
+    query = db.query(Report)
+    if reporter_id is not None:
+        query = query.filter(Report.id_user == reporter_id)
+    if target == "review":
+        query = query.filter(Report.id_review.isnot(None))
+    elif target == "note":
+        query = query.filter(Report.id_note.isnot(None))
+    # Segnalazioni di specifiche recensioni/appunti (es. quelli mostrati nella pagina corrente)
+    if review_ids or note_ids:
+        conditions = []
+        if review_ids:
+            conditions.append(Report.id_review.in_(review_ids))
+        if note_ids:
+            conditions.append(Report.id_note.in_(note_ids))
+        query = query.filter(or_(*conditions))
+    query = date_range(query, Report.datetime, created_from, created_to)
+
+    return paginate(query, Report.id_report, limit, cursor, include_total)
 
 @router.delete("/reports/{report_id}")
 def delete_report(report_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -284,4 +513,59 @@ def delete_report(report_id: int, db: Session = Depends(get_db), current_user: U
 
     db.delete(report)
     db.commit()
-    return {"message": "Report deleted successfully."}
\ No newline at end of file
+    return {"message": "Report deleted successfully."}
+
+# 🚨 **Moderazione in blocco delle segnalazioni**
+@router.post("/reports/moderate", response_model=ModerationResponse)
+def moderate_reports(
+    request: ModerationRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Resolve many reports at once, in a single transaction:
+
+    * ``dismiss``: the reports are deleted, the reported notes/reviews stay;
+    * ``delete_target``: the reported notes/reviews are deleted together with every
+      report pointing at them (not only the ones listed);
+    * ``delete_target_and_warn``: as above, and each author gets one warning per batch.
+
+    Every step is one set-based statement whatever the number of reports; the GridFS
+    blobs of the deleted notes are released later by the GC worker.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can moderate reports.")
+
+    reports = db.execute(
+        select(Report.id_note, Report.id_review).where(Report.id_report.in_(request.report_ids))
+    ).all()
+    note_ids = {report.id_note for report in reports if report.id_note is not None}
+    review_ids = {report.id_review for report in reports if report.id_review is not None}
+
+    result = {"reports_resolved": 0, "notes_deleted": 0, "reviews_deleted": 0, "users_warned": 0}
+    resolved = Report.id_report.in_(request.report_ids)
+
+    if request.action != "dismiss":
+        if request.action == "delete_target_and_warn":
+            # Gli autori vanno letti prima di eliminare (o nascondere) i contenuti
+            authors = set(db.scalars(select(Note.student_id).where(Note.id.in_(note_ids))))
+            authors |= set(db.scalars(select(Review.student_id).where(Review.id.in_(review_ids))))
+            result["users_warned"] = db.execute(
+                update(User).where(User.id.in_(authors))
+                .values(warnings_count=User.warnings_count + 1)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+        # Anche le altre segnalazioni sugli stessi contenuti sono risolte
+        resolved = or_(resolved, Report.id_note.in_(note_ids), Report.id_review.in_(review_ids))
+        result["reports_resolved"] = db.scalar(select(func.count()).select_from(Report).where(resolved))
+
+        result["notes_deleted"] = delete_many(db, "notes", list(note_ids))
+        result["reviews_deleted"] = delete_many(db, "reviews", list(review_ids))
+
+    # Senza SOFT_DELETE le segnalazioni dei contenuti eliminati sono già sparite per CASCADE
+    dismissed = db.execute(delete(Report).where(resolved).execution_options(synchronize_session=False)).rowcount
+    if request.action == "dismiss":
+        result["reports_resolved"] = dismissed
+    db.commit()
+    return result
\ No newline at end of file
@@ -1,6 +1,15 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Generic, TypeVar, Literal
 from datetime import date,datetime
+from schemas.report import ReportResponse
+
+T = TypeVar("T")
+
+# 📌 Pagina di una lista (paginazione keyset: next_cursor va ripassato come ?cursor=)
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None  # Solo se richiesto con include_total=true
 
 # 📌 Utente
 class UserResponse(BaseModel):
@@ -11,6 +20,7 @@ class UserResponse(BaseModel):
     birth_date: date
     city: str
     faculty_id: Optional[int] = None
+    warnings_count: int = 0
 
 class UserDeleteResponse(BaseModel):
     message: str
@@ -52,6 +62,35 @@ class NoteRatingResponse(BaseModel):
 class NoteRatingDeleteResponse(BaseModel):
     message: str
 
+# 📌 Eliminazione in blocco
+class BulkDeleteRequest(BaseModel):
+    target: Literal["notes", "reviews", "note_ratings", "reports"]
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class BulkDeleteResponse(BaseModel):
+    deleted: int
+
+# 📌 Importazione utenti da CSV
+class UserImportError(BaseModel):
+    line: Optional[int] = None
+    error: str
+
+class UserImportResponse(BaseModel):
+    created: int
+    skipped_existing: int
+    errors: List[UserImportError]
+
+# 📌 Moderazione delle segnalazioni
+class ModerationRequest(BaseModel):
+    report_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    action: Literal["dismiss", "delete_target", "delete_target_and_warn"]
+
+class ModerationResponse(BaseModel):
+    reports_resolved: int
+    notes_deleted: int
+    reviews_deleted: int
+    users_warned: int
+
 
 # 📌 Facoltà e corsi
 class FacultyResponse(BaseModel):
@@ -86,6 +125,19 @@ class CourseResponse(BaseModel):
 class TeacherCreate(BaseModel):
     name: str
 
+# 📌 Riepilogo dashboard
+class AdminCounts(BaseModel):
+    users: int
+    faculties: int
+    courses: int
+    notes: int
+    reviews: int
+    reports: int
+
+class AdminSummaryResponse(BaseModel):
+    counts: AdminCounts
+    recent_reports: List[ReportResponse]
+
 class Config:
     from_attributes = True
 
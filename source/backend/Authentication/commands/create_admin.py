@@ -0,0 +1,82 @@
+"""
+Create the first administrator (or promote an existing account), explicitly, instead
+of making admin whoever happens to register first.
+
+    python -m commands.create_admin admin@uniroma1.it [--password ...]
+
+The password comes from ``--password``, else from ``ADMIN_PASSWORD``, else it is
+asked on the terminal; it is not needed to promote an existing user. Running it again
+is harmless.
+"""
+import argparse
+import getpass
+import os
+import sys
+from datetime import date
+from typing import Optional
+
+from sapienza_common.database import SessionLocal
+from sapienza_common.models.user import User
+from sapienza_common.passwords import hash_password
+
+
+def create_admin(email: str, password: Optional[str] = None, first_name: str = "Admin", last_name: str = "Sapienza") -> str:
+    """ Make ``email`` an administrator; returns what was done ("created", "promoted" or "unchanged"). """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).with_for_update().first()
+        if user is not None:
+            if user.is_admin:
+                return "unchanged"
+            user.is_admin = True
+            db.commit()
+            return "promoted"
+
+        if not password:
+            raise ValueError("a password is required to create a new administrator")
+        db.add(User(
+            email=email,
+            hashed_password=hash_password(password),
+            is_admin=True,
+            first_name=first_name,
+            last_name=last_name,
+            birth_date=date(2000, 1, 1),  # Obbligatoria nello schema, modificabile dal profilo
+            city="Roma",
+        ))
+        db.commit()
+        return "created"
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create or promote an administrator account.")
+    parser.add_argument("email")
+    parser.add_argument("--password", default=os.getenv("ADMIN_PASSWORD"))
+    parser.add_argument("--first-name", default="Admin")
+    parser.add_argument("--last-name", default="Sapienza")
+    args = parser.parse_args(argv)
+
+    password = args.password
+    db = SessionLocal()
+    try:
+        exists = db.query(User.id).filter(User.email == args.email).first() is not None
+    finally:
+        db.close()
+    if not exists and not password:
+        try:
+            password = getpass.getpass(f"Password for {args.email}: ")
+        except EOFError:  # Nessun terminale (es. job di init): serve --password o ADMIN_PASSWORD
+            password = None
+
+    try:
+        outcome = create_admin(args.email, password, args.first_name, args.last_name)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    print(f"Administrator {args.email}: {outcome}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
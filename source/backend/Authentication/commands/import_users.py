@@ -0,0 +1,56 @@
+"""
+Create the accounts of a whole cohort from a CSV file (same format and logic as
+``POST /admin/users/import``, without its row limit).
+
+    python -m commands.import_users cohort.csv [--dry-run]
+
+Passwords are hashed on a local process pool (``PASSWORD_POOL_SIZE`` workers) and
+rows inserted in batches; accounts whose email already exists are left untouched, so
+an interrupted import can simply be run again. ``--dry-run`` only validates the file.
+"""
+import argparse
+import asyncio
+import sys
+
+from sapienza_common.database import SessionLocal
+from sapienza_common.passwords import stop_pool
+from sapienza_common.user_import import import_users, parse_users_csv
+
+
+def print_errors(errors: list):
+    for error in errors:
+        where = f"line {error['line']}" if error["line"] else "file"
+        print(f"  {where}: {error['error']}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-create user accounts from a CSV file.")
+    parser.add_argument("csv_file")
+    parser.add_argument("--dry-run", action="store_true", help="Validate the file without creating accounts.")
+    args = parser.parse_args(argv)
+
+    with open(args.csv_file, encoding="utf-8-sig", newline="") as handle:
+        try:
+            users, errors = parse_users_csv(handle.read())
+        except ValueError as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            return 1
+
+    if args.dry_run:
+        print(f"{len(users)} valid rows, {len(errors)} invalid.")
+        print_errors(errors)
+        return 1 if errors else 0
+
+    db = SessionLocal()
+    try:
+        result = asyncio.run(import_users(db, users, errors))
+    finally:
+        db.close()
+        stop_pool()
+    print(f"Created {result['created']} accounts, {result['skipped_existing']} already existing, {len(result['errors'])} rows rejected.")
+    print_errors(result["errors"])
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+One-shot database initialization, run before the services start (the ``init`` job in
+docker-compose) instead of at import time in every worker.
+
+    python -m commands.init_db [--seed] [--repair-sequences]
+
+It applies the Alembic migrations (idempotent, and serialized by an advisory lock if
+two runs overlap), creates the missing rating aggregates and, with ``--seed``, inserts
+the sample faculties, teachers, courses, users and reviews into the tables that are
+still empty. ``--repair-sequences`` realigns every serial sequence with its table:
+only needed after a manual import with explicit ids.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import select, text
+
+from sapienza_common.database import SessionLocal, engine
+from sapienza_common.models.course import Course
+from sapienza_common.models.faculty import Faculty
+from sapienza_common.models.review import Review
+from sapienza_common.models.teacher import Teacher
+from sapienza_common.models.user import User
+from sapienza_common.passwords import hash_password
+from sapienza_common.stats import backfill_missing_stats, refresh_stats
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+# Serializza due init lanciati insieme (chiave fissa per pg_advisory_xact_lock)
+SEED_LOCK_KEY = 7_316_002
+
+
+def migrate():
+    command.upgrade(Config(ALEMBIC_INI), "head")
+    with engine.begin() as conn:
+        # Righe di aggregato (note_stats/course_stats) per appunti e corsi che ancora non le hanno
+        backfill_missing_stats(conn)
+
+
+def sample_users() -> list:
+    # Una sola derivazione bcrypt per password distinta, e solo se gli utenti vanno inseriti
+    example, admin = hash_password("example"), hash_password("admin")
+    return [
+        User(id=1, email="user1@example.com", hashed_password=example, is_admin=False, first_name="Alice", last_name="Rossi", birth_date="2000-05-12", city="Roma", faculty_id=1),
+        User(id=2, email="user2@example.com", hashed_password=example, is_admin=False, first_name="Bob", last_name="Bianchi", birth_date="1999-07-24", city="Milano", faculty_id=2),
+        User(id=3, email="user3@example.com", hashed_password=example, is_admin=False, first_name="Charlie", last_name="Verdi", birth_date="2001-02-18", city="Napoli", faculty_id=1),
+        User(id=4, email="admin@example.com", hashed_password=admin, is_admin=True, first_name="Super", last_name="Admin", birth_date="2001-02-18", city="Napoli", faculty_id=1),
+    ]
+
+
+def sample_data() -> dict:
+    """ Sample rows by model (users aside), with explicit ids so that they can reference each other. """
+    today = datetime.utcnow().date()
+    return {
+        Faculty: [
+            Faculty(id=1, name="Ingegneria Informatica"),
+            Faculty(id=2, name="Matematica e Fisica"),
+        ],
+        Teacher: [
+            Teacher(id=1, name="Mario Rossi"),
+            Teacher(id=2, name="Laura Bianchi"),
+            Teacher(id=3, name="Giovanni Verdi"),
+            Teacher(id=4, name="Anna Neri"),
+        ],
+        Course: [
+            Course(id=1, name="Algoritmi e Strutture Dati", faculty_id=1, teacher_id=1),
+            Course(id=2, name="Analisi Matematica 1", faculty_id=2, teacher_id=2),
+            Course(id=3, name="Meccanica Quantistica", faculty_id=2, teacher_id=3),
+        ],
+        Review: [
+            Review(id=1, course_id=1, student_id=1, rating_clarity=5, rating_feasibility=4, rating_availability=5, comment="Corso molto interessante e ben strutturato.", created_at=today),
+            Review(id=2, course_id=2, student_id=2, rating_clarity=3, rating_feasibility=3, rating_availability=4, comment="Analisi è sempre difficile, ma il professore spiega bene.", created_at=today),
+        ],
+    }
+
+
+def seed() -> list:
+    """ Insert the sample data into the tables that are empty, in one transaction; returns the seeded tables. """
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SEED_LOCK_KEY})
+        empty = [model for model in (Faculty, Teacher, Course, User, Review) if db.scalar(select(model.id).limit(1)) is None]
+        if not empty:
+            return []
+
+        data = sample_data()
+        if User in empty:
+            data[User] = sample_users()
+        for model in empty:
+            db.add_all(data[model])
+            db.flush()
+        if Review in empty:
+            refresh_stats(db, course_ids={review.course_id for review in data[Review]})
+
+        # Gli id espliciti non fanno avanzare le sequenze: riallineate solo quelle delle tabelle popolate
+        for model in empty:
+            table = model.__tablename__
+            db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            ))
+        db.commit()
+        return [model.__tablename__ for model in empty]
+    finally:
+        db.close()
+
+
+def reset_all_sequences():
+    """ Reset di tutte le sequenze del database basandosi sui valori attuali delle tabelle. """
+    db = SessionLocal()
+    try:
+        sequences = db.execute(text("""
+            SELECT table_name, column_name
+            FROM information_schema.columns
+            WHERE column_default LIKE 'nextval%'
+        """)).fetchall()
+
+        for table, column in sequences:
+            db.execute(text(f"""
+                SELECT setval(pg_get_serial_sequence('{table}', '{column}'),
+                              COALESCE((SELECT MAX({column}) + 1 FROM {table}), 1), false)
+            """))
+
+        db.commit()
+    finally:
+        db.close()
+
+
+def main(with_seed: bool = False, repair_sequences: bool = False):
+    migrate()
+    print("Database schema is up to date.")
+    if with_seed:
+        seeded = seed()
+        print(f"Sample data inserted into: {', '.join(seeded)}." if seeded else "Sample data already present.")
+    if repair_sequences:
+        reset_all_sequences()
+        print("Sequences realigned.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate (and optionally seed) the database before the services start.")
+    parser.add_argument("--seed", action="store_true", help="Insert the sample data into the empty tables.")
+    parser.add_argument("--repair-sequences", action="store_true", help="Realign every serial sequence with its table.")
+    args = parser.parse_args()
+    sys.exit(main(args.seed, args.repair_sequences))
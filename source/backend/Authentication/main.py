@@ -2,15 +2,15 @@ from fastapi import FastAPI
 from fastapi.security import HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
 from routes.auth import router as auth_router
-from database.database import engine, Base
+from sapienza_common.health import router as health_router
+from sapienza_common.metrics import router as metrics_router
+from sapienza_common.passwords import pool_stats as password_pool_stats, start_pool, stop_pool
 
 app = FastAPI()
 security = HTTPBearer()
 
-# Creazione delle tabelle nel database al primo avvio
-print("Initializing Auth Service database...")
-Base.metadata.create_all(bind=engine)
-print("Auth Service Database initialized successfully!")
+# Lo schema (migrazioni Alembic) e i dati di esempio si preparano una volta sola prima dell'avvio,
+# con `python -m commands.init_db [--seed]`: qui non si tocca il database
 
 
 
@@ -31,11 +31,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pool di processi per bcrypt: avviato subito, così il primo login non attende lo spawn dei worker
+@app.on_event("startup")
+def start_password_pool():
+    start_pool()
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    stop_pool()
+
+@app.get("/metrics/password-pool")
+def password_pool_metrics():
+    return password_pool_stats()
+
 # Inclusione delle route
 app.include_router(auth_router, prefix="/auth")
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 @app.get("/")
 def root():
     return {"message": "Auth Microservice is running!"}
-
-
@@ -0,0 +1,48 @@
+"""
+Alembic environment for the schema shared by all the services.
+
+The URL comes from ``DATABASE_URL`` like the services' own engines. Online runs hold
+a Postgres advisory lock, so replicas of the Auth Service starting together apply
+each migration once; ``alembic upgrade head --sql`` prints the DDL instead.
+"""
+from alembic import context
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from sapienza_common.database import Base, DATABASE_URL
+from sapienza_common.models import load_all
+
+# Tutte le tabelle nei metadata (i servizi mappano i modelli solo quando servono)
+load_all()
+
+# Chiave arbitraria ma fissa per pg_advisory_lock
+MIGRATION_LOCK_KEY = 7_316_001
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    engine = create_engine(DATABASE_URL, poolclass=NullPool)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        connection.commit()
+        try:
+            context.configure(connection=connection, target_metadata=target_metadata)
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,261 @@
+"""Baseline: the schema as created by create_all plus the former startup upgrades
+
+Every statement is idempotent, so this revision both creates a fresh database and
+adopts one created by earlier versions of the services (missing columns, triggers and
+the catalog version row are added, existing objects are left alone). The DDL is frozen
+here on purpose: later schema changes belong in their own revisions, not in the models
+alone.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Tabelle e indici come li creava Base.metadata.create_all
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS blob_gc_queue (
+        id BIGSERIAL NOT NULL,
+        file_id VARCHAR NOT NULL,
+        enqueued_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        available_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+        attempts INTEGER DEFAULT '0' NOT NULL,
+        last_error VARCHAR,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_blob_gc_queue_available_at ON blob_gc_queue (available_at, id)",
+    """
+    CREATE TABLE IF NOT EXISTS cache_versions (
+        name VARCHAR NOT NULL,
+        version BIGINT DEFAULT '0' NOT NULL,
+        PRIMARY KEY (name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS faculties (
+        id SERIAL NOT NULL,
+        name VARCHAR NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (name)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_faculties_id ON faculties (id)",
+    """
+    CREATE TABLE IF NOT EXISTS teachers (
+        id SERIAL NOT NULL,
+        name VARCHAR NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_teachers_id ON teachers (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_teachers_name ON teachers (name)",
+    """
+    CREATE TABLE IF NOT EXISTS courses (
+        id SERIAL NOT NULL,
+        name VARCHAR NOT NULL,
+        faculty_id INTEGER NOT NULL,
+        teacher_id INTEGER,
+        PRIMARY KEY (id),
+        FOREIGN KEY(faculty_id) REFERENCES faculties (id),
+        FOREIGN KEY(teacher_id) REFERENCES teachers (id) ON DELETE SET NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_courses_id ON courses (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_courses_name ON courses (name)",
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL NOT NULL,
+        email VARCHAR NOT NULL,
+        hashed_password VARCHAR NOT NULL,
+        is_admin BOOLEAN,
+        first_name VARCHAR NOT NULL,
+        last_name VARCHAR NOT NULL,
+        birth_date DATE NOT NULL,
+        city VARCHAR NOT NULL,
+        faculty_id INTEGER,
+        token_version INTEGER DEFAULT '0' NOT NULL,
+        warnings_count INTEGER DEFAULT '0' NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(faculty_id) REFERENCES faculties (id) ON DELETE SET NULL
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+    """
+    CREATE TABLE IF NOT EXISTS course_stats (
+        course_id INTEGER NOT NULL,
+        reviews_count INTEGER DEFAULT '0' NOT NULL,
+        sum_clarity INTEGER DEFAULT '0' NOT NULL,
+        sum_feasibility INTEGER DEFAULT '0' NOT NULL,
+        sum_availability INTEGER DEFAULT '0' NOT NULL,
+        clarity_1 INTEGER DEFAULT '0' NOT NULL,
+        clarity_2 INTEGER DEFAULT '0' NOT NULL,
+        clarity_3 INTEGER DEFAULT '0' NOT NULL,
+        clarity_4 INTEGER DEFAULT '0' NOT NULL,
+        clarity_5 INTEGER DEFAULT '0' NOT NULL,
+        feasibility_1 INTEGER DEFAULT '0' NOT NULL,
+        feasibility_2 INTEGER DEFAULT '0' NOT NULL,
+        feasibility_3 INTEGER DEFAULT '0' NOT NULL,
+        feasibility_4 INTEGER DEFAULT '0' NOT NULL,
+        feasibility_5 INTEGER DEFAULT '0' NOT NULL,
+        availability_1 INTEGER DEFAULT '0' NOT NULL,
+        availability_2 INTEGER DEFAULT '0' NOT NULL,
+        availability_3 INTEGER DEFAULT '0' NOT NULL,
+        availability_4 INTEGER DEFAULT '0' NOT NULL,
+        availability_5 INTEGER DEFAULT '0' NOT NULL,
+        note_ratings_count INTEGER DEFAULT '0' NOT NULL,
+        note_ratings_sum INTEGER DEFAULT '0' NOT NULL,
+        PRIMARY KEY (course_id),
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS notes (
+        id SERIAL NOT NULL,
+        course_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        file_id VARCHAR NOT NULL,
+        size BIGINT,
+        sha256 VARCHAR(64),
+        description TEXT,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        deleted_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(course_id) REFERENCES courses (id),
+        FOREIGN KEY(student_id) REFERENCES users (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_notes_id ON notes (id)",
+    """
+    CREATE TABLE IF NOT EXISTS reviews (
+        id SERIAL NOT NULL,
+        course_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        rating_clarity INTEGER NOT NULL,
+        rating_feasibility INTEGER NOT NULL,
+        rating_availability INTEGER NOT NULL,
+        comment VARCHAR,
+        created_at DATE DEFAULT CURRENT_DATE,
+        deleted_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(course_id) REFERENCES courses (id),
+        FOREIGN KEY(student_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_reviews_id ON reviews (id)",
+    """
+    CREATE TABLE IF NOT EXISTS note_ratings (
+        id SERIAL NOT NULL,
+        note_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        rating INTEGER NOT NULL,
+        comment VARCHAR,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        deleted_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(note_id) REFERENCES notes (id) ON DELETE CASCADE,
+        FOREIGN KEY(student_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_note_ratings_id ON note_ratings (id)",
+    """
+    CREATE TABLE IF NOT EXISTS note_stats (
+        note_id INTEGER NOT NULL,
+        course_id INTEGER NOT NULL,
+        ratings_count INTEGER DEFAULT '0' NOT NULL,
+        ratings_sum INTEGER DEFAULT '0' NOT NULL,
+        average_rating NUMERIC GENERATED ALWAYS AS (ratings_sum::numeric / NULLIF(ratings_count, 0)) STORED,
+        stars_1 INTEGER DEFAULT '0' NOT NULL,
+        stars_2 INTEGER DEFAULT '0' NOT NULL,
+        stars_3 INTEGER DEFAULT '0' NOT NULL,
+        stars_4 INTEGER DEFAULT '0' NOT NULL,
+        stars_5 INTEGER DEFAULT '0' NOT NULL,
+        PRIMARY KEY (note_id),
+        FOREIGN KEY(note_id) REFERENCES notes (id) ON DELETE CASCADE,
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_note_stats_course_average ON note_stats (course_id, average_rating ASC NULLS FIRST)",
+    """
+    CREATE TABLE IF NOT EXISTS reports (
+        id_report SERIAL NOT NULL,
+        id_review INTEGER,
+        id_note INTEGER,
+        id_user INTEGER NOT NULL,
+        reason VARCHAR NOT NULL,
+        datetime TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id_report),
+        FOREIGN KEY(id_review) REFERENCES reviews (id) ON DELETE CASCADE,
+        FOREIGN KEY(id_note) REFERENCES notes (id) ON DELETE CASCADE,
+        FOREIGN KEY(id_user) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_reports_id_report ON reports (id_report)",
+]
+
+# Colonne aggiunte dopo la creazione iniziale delle tabelle, trigger e righe di servizio
+SCHEMA_UPGRADES = [
+    "ALTER TABLE notes ADD COLUMN IF NOT EXISTS size BIGINT",
+    "ALTER TABLE notes ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64)",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE notes ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP",
+    "ALTER TABLE note_ratings ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS warnings_count INTEGER NOT NULL DEFAULT 0",
+    # Ogni appunto cancellato (anche per cascata) accoda il suo blob GridFS per il worker di GC
+    """
+    CREATE OR REPLACE FUNCTION enqueue_note_blobs() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO blob_gc_queue (file_id) SELECT file_id FROM deleted_notes;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS notes_enqueue_blobs ON notes",
+    """
+    CREATE TRIGGER notes_enqueue_blobs AFTER DELETE ON notes
+    REFERENCING OLD TABLE AS deleted_notes
+    FOR EACH STATEMENT EXECUTE FUNCTION enqueue_note_blobs()
+    """,
+    # Versione del catalogo (facoltà, corsi, professori) per le cache di Faculty e Course
+    "INSERT INTO cache_versions (name, version) VALUES ('catalog', 0) ON CONFLICT (name) DO NOTHING",
+    """
+    CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE cache_versions SET version = version + 1 WHERE name = 'catalog';
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS faculties_bump_catalog_version ON faculties",
+    """
+    CREATE TRIGGER faculties_bump_catalog_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON faculties
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+    """,
+    "DROP TRIGGER IF EXISTS courses_bump_catalog_version ON courses",
+    """
+    CREATE TRIGGER courses_bump_catalog_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON courses
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+    """,
+    "DROP TRIGGER IF EXISTS teachers_bump_catalog_version ON teachers",
+    """
+    CREATE TRIGGER teachers_bump_catalog_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON teachers
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+    """,
+]
+
+
+def upgrade():
+    for statement in TABLES + SCHEMA_UPGRADES:
+        op.execute(statement)
+
+
+def downgrade():
+    pass  # Irreversibile: adotta anche database già esistenti, per ripartire da zero si elimina il database
@@ -0,0 +1,145 @@
+"""Indexes on the hot filters and one rating/review per student
+
+Adds the foreign-key indexes the list and delete paths filter on, a (course_id,
+created_at) index for the per-course note lists, and partial unique indexes on
+(note_id, student_id) and (course_id, student_id) that back the ``ON CONFLICT``
+upserts of ``add_rating`` and ``add_review``; tombstones (``deleted_at`` set) are
+left out so a student can rate again after a soft delete. Their leading columns also
+serve the filters on ``note_ratings.note_id`` and ``reviews.course_id``.
+
+Live duplicates left by the old read-then-write are removed first (the most recent
+row wins) and the aggregates of the touched notes and courses rebuilt. Indexes are
+built ``CONCURRENTLY`` outside a transaction, so writes keep flowing on a populated
+database; an invalid index left by an interrupted build is dropped and rebuilt.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import text
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_notes_student_id": "ON notes (student_id)",
+    "ix_notes_course_id_created_at": "ON notes (course_id, created_at)",
+    "ix_note_ratings_student_id": "ON note_ratings (student_id)",
+    "ix_reviews_student_id": "ON reviews (student_id)",
+    "ix_courses_faculty_id": "ON courses (faculty_id)",
+    "ix_reports_id_note": "ON reports (id_note)",
+    "ix_reports_id_review": "ON reports (id_review)",
+}
+UNIQUE_INDEXES = {
+    "uq_note_ratings_note_student": "ON note_ratings (note_id, student_id) WHERE deleted_at IS NULL",
+    "uq_reviews_course_student": "ON reviews (course_id, student_id) WHERE deleted_at IS NULL",
+}
+
+# Duplicati vivi: resta la riga più recente (id più alto), come l'ultima scrittura dell'utente
+DEDUPLICATE = {
+    "note_ratings": ("note_id", "student_id"),
+    "reviews": ("course_id", "student_id"),
+}
+
+# Ricalcolo degli aggregati in SQL, congelato a questa revisione (niente codice applicativo:
+# i modelli possono cambiare nelle migrazioni successive)
+STARS = range(1, 6)
+CRITERIA = ("clarity", "feasibility", "availability")
+NOTE_COLUMNS = ["ratings_count", "ratings_sum", *(f"stars_{star}" for star in STARS)]
+COURSE_COLUMNS = [
+    "reviews_count", *(f"sum_{name}" for name in CRITERIA),
+    *(f"{name}_{star}" for name in CRITERIA for star in STARS),
+    "note_ratings_count", "note_ratings_sum",
+]
+REVIEW_AGGREGATES = ", ".join([
+    "count(*) AS reviews_count",
+    *(f"sum(rating_{name}) AS sum_{name}" for name in CRITERIA),
+    *(f"count(*) FILTER (WHERE rating_{name} = {star}) AS {name}_{star}" for name in CRITERIA for star in STARS),
+])
+
+
+def _assign(columns: list) -> str:
+    return ", ".join(f"{column} = excluded.{column}" for column in columns)
+
+
+REBUILD_NOTE_STATS = f"""
+    INSERT INTO note_stats (note_id, course_id, {", ".join(NOTE_COLUMNS)})
+    SELECT n.id, n.course_id, count(r.id), coalesce(sum(r.rating), 0),
+           {", ".join(f"count(r.id) FILTER (WHERE r.rating = {star})" for star in STARS)}
+    FROM notes n LEFT JOIN note_ratings r ON r.note_id = n.id AND r.deleted_at IS NULL
+    WHERE n.deleted_at IS NULL AND n.id = ANY(:ids)
+    GROUP BY n.id
+    ON CONFLICT (note_id) DO UPDATE SET course_id = excluded.course_id, {_assign(NOTE_COLUMNS)}
+"""
+REBUILD_COURSE_STATS = f"""
+    INSERT INTO course_stats (course_id, {", ".join(COURSE_COLUMNS)})
+    SELECT c.id, {", ".join(f"coalesce({column}, 0)" for column in COURSE_COLUMNS)}
+    FROM courses c
+    LEFT JOIN (
+        SELECT course_id, {REVIEW_AGGREGATES}
+        FROM reviews WHERE deleted_at IS NULL AND course_id = ANY(:ids) GROUP BY course_id
+    ) rv ON rv.course_id = c.id
+    LEFT JOIN (
+        SELECT n.course_id, count(r.id) AS note_ratings_count, sum(r.rating) AS note_ratings_sum
+        FROM notes n JOIN note_ratings r ON r.note_id = n.id
+        WHERE n.deleted_at IS NULL AND r.deleted_at IS NULL AND n.course_id = ANY(:ids)
+        GROUP BY n.course_id
+    ) nr ON nr.course_id = c.id
+    WHERE c.id = ANY(:ids)
+    ON CONFLICT (course_id) DO UPDATE SET {_assign(COURSE_COLUMNS)}
+"""
+
+
+def _deduplicate():
+    """ Delete the live duplicates and rebuild the aggregates they were counted in. """
+    bind = op.get_bind()
+    note_ids, course_ids = set(), set()
+    for table, (parent, student) in DEDUPLICATE.items():
+        removed = bind.execute(text(f"""
+            DELETE FROM {table} AS t
+            USING (
+                SELECT id, row_number() OVER (PARTITION BY {parent}, {student} ORDER BY id DESC) AS position
+                FROM {table} WHERE deleted_at IS NULL
+            ) AS ranked
+            WHERE t.id = ranked.id AND ranked.position > 1
+            RETURNING t.{parent}
+        """)).scalars().all()
+        (note_ids if parent == "note_id" else course_ids).update(removed)
+
+    if note_ids:
+        course_ids.update(bind.execute(
+            text("SELECT DISTINCT course_id FROM notes WHERE id = ANY(:ids)"), {"ids": list(note_ids)}
+        ).scalars())
+    if note_ids or course_ids:
+        print(f"Removed duplicate ratings/reviews on {len(note_ids)} notes and {len(course_ids)} courses.")
+        if note_ids:
+            bind.execute(text(REBUILD_NOTE_STATS), {"ids": list(note_ids)})
+        bind.execute(text(REBUILD_COURSE_STATS), {"ids": list(course_ids)})
+
+
+def _create_index(name: str, definition: str, unique: bool = False):
+    bind = op.get_bind()
+    valid = bind.execute(text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+    ), {"name": name}).scalar()
+    if valid is False:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def upgrade():
+    _deduplicate()
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            _create_index(name, definition)
+        for name, definition in UNIQUE_INDEXES.items():
+            _create_index(name, definition, unique=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in [*UNIQUE_INDEXES, *INDEXES]:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,65 @@
+"""Full-text search vectors on notes, courses, teachers and reviews
+
+Adds a ``search_vector`` column to each table, generated by Postgres from the searched
+text (``to_tsvector`` with the Italian configuration, ``simple`` for teacher names)
+and stored, so every write keeps it current, and a GIN index on it: partial on
+``deleted_at IS NULL`` for notes and reviews, as every ORM query excludes tombstones.
+
+Adding a stored generated column rewrites the table under an exclusive lock (seconds
+per million rows); the indexes are then built ``CONCURRENTLY``, an invalid one left by
+an interrupted build being dropped and rebuilt.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import text
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Tabella -> (colonna di testo, configurazione di ricerca)
+VECTORS = {
+    "notes": ("description", "italian"),
+    "courses": ("name", "italian"),
+    "teachers": ("name", "simple"),
+    "reviews": ("comment", "italian"),
+}
+INDEXES = {
+    "ix_notes_search_vector": "ON notes USING gin (search_vector) WHERE deleted_at IS NULL",
+    "ix_courses_search_vector": "ON courses USING gin (search_vector)",
+    "ix_teachers_search_vector": "ON teachers USING gin (search_vector)",
+    "ix_reviews_search_vector": "ON reviews USING gin (search_vector) WHERE deleted_at IS NULL",
+}
+
+
+def _create_index(name: str, definition: str):
+    bind = op.get_bind()
+    valid = bind.execute(text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+    ), {"name": name}).scalar()
+    if valid is False:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def upgrade():
+    for table, (column, config) in VECTORS.items():
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('{config}'::regconfig, coalesce({column}, ''))) STORED"
+        )
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            _create_index(name, definition)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    for table in VECTORS:
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
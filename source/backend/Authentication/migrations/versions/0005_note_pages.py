@@ -0,0 +1,53 @@
+"""Text extracted from the note files, for in-document search
+
+``note_text_queue`` has one job per note whose file is to be (or has been) read:
+``extracted_at`` stays NULL until the worker of the Notes Service is done with it, so
+the table is also the progress of the backfill; pending jobs are indexed by note id.
+``note_pages`` holds the text of each page, with a generated ``search_vector`` (Italian
+configuration, as for the descriptions) and its GIN index. Both go with their note.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "note_text_queue",
+        sa.Column("note_id", sa.Integer, sa.ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("enqueued_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("available_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("extracted_at", sa.DateTime, nullable=True),
+        sa.Column("pages", sa.Integer, nullable=True),
+        sa.Column("last_error", sa.String, nullable=True),
+    )
+    op.create_index(
+        "ix_note_text_queue_pending", "note_text_queue", ["note_id"], postgresql_where=sa.text("extracted_at IS NULL")
+    )
+
+    op.create_table(
+        "note_pages",
+        sa.Column("note_id", sa.Integer, sa.ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("page", sa.Integer, primary_key=True),
+        sa.Column("content", sa.Text, nullable=False),
+        sa.Column(
+            "search_vector", TSVECTOR,
+            sa.Computed("to_tsvector('italian'::regconfig, coalesce(content, ''))", persisted=True),
+        ),
+    )
+    op.create_index("ix_note_pages_search_vector", "note_pages", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade():
+    op.drop_table("note_pages")
+    op.drop_table("note_text_queue")
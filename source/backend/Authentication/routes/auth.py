@@ -1,70 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from database.database import get_db
-from models.user import User
-from schemas.user import UserCreate, UserResponse, UserLogin
-from passlib.context import CryptContext
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from sapienza_common.database import get_db
+from sapienza_common.models.user import User
+from schemas.user import UserCreate, UserResponse, UserLogin, TokenRefresh, LogoutRequest
+from datetime import datetime
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sapienza_common.auth import create_access_token, credentials_error, decode_token, token_claims
+from sapienza_common.passwords import hash_password_async, verify_password_async
+from sapienza_common.refresh_tokens import (
+    issue_refresh_token, purge_expired_refresh_tokens, revoke_refresh_token, rotate_refresh_token,
+)
+from sapienza_common.revocation import purge_expired_revocations, revoke_access_token
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-auth_scheme = HTTPBearer()
-
-# Configurazione JWT
-SECRET_KEY = "a_very_secret_key"  # Cambia questa chiave con una più sicura!
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-# Funzione per creare un token JWT
-def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=30)):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + expires_delta
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-# Funzione per decodificare e verificare il token JWT
-def verify_token(token: str, credentials_exception):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        return email
-    except JWTError:
-        raise credentials_exception
-
-# Funzione per recuperare l'utente corrente
-def get_current_user(db: Session = Depends(get_db), credentials: HTTPAuthorizationCredentials = Depends(auth_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    token = credentials.credentials
-    email = verify_token(token, credentials_exception)
+optional_auth_scheme = HTTPBearer(auto_error=False)
+
+def _find_user(db: Session, email: str):
     user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    
+    if user is not None:
+        db.expunge(user)  # Staccato dalla sessione: il rollback non ne scade gli attributi
+    db.rollback()  # Chiude la transazione: la connessione torna al pool durante l'hashing
     return user
 
-# API di registrazione
-@router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    # Verifica se l'utente esiste già
-    existing_user = db.query(User).filter(User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    # Crea l'hash della password
-    hashed_password = pwd_context.hash(user.password)
-
-    # Se è il primo utente, lo facciamo admin
-    is_admin = db.query(User).count() == 0 
 
+def _create_user(db: Session, user: UserCreate, hashed_password: str) -> tuple:
     # Convertiamo la data di nascita in formato datetime.date
     if isinstance(user.birth_date, str):
         user_birth_date = datetime.strptime(user.birth_date, "%Y-%m-%d").date()
@@ -79,16 +41,52 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         last_name=user.last_name,
         birth_date=user_birth_date,  # Ora è un oggetto `date`
         city=user.city,
-        is_admin=is_admin,
+        is_admin=False,  # Il primo admin si crea con `python -m commands.create_admin`
         faculty_id=None
     )
 
     db.add(new_user)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Stessa email registrata in parallelo mentre si calcolava l'hash
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    refresh_token = issue_refresh_token(db, new_user.id)
     db.commit()
     db.refresh(new_user)
+    return new_user, refresh_token
+
+
+def _open_session(db: Session, user_id: int) -> str:
+    refresh_token = issue_refresh_token(db, user_id)
+    db.commit()
+    return refresh_token
+
+
+def _refresh_session(db: Session, token: str) -> tuple:
+    user_id, refresh_token = rotate_refresh_token(db, token)
+    # Claim aggiornati (facoltà, versione dei token): nessuna verifica bcrypt
+    user = db.query(User).filter(User.id == user_id).first()
+    db.commit()
+    return user, refresh_token
+
+
+# API di registrazione
+# Le route sono async: l'hash bcrypt gira nel pool di processi, le query in threadpool
+@router.post("/register", response_model=UserResponse)
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    # Verifica se l'utente esiste già
+    if await run_in_threadpool(_find_user, db, user.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    # Crea l'hash della password (503 + Retry-After se il pool è saturo)
+    hashed_password = await hash_password_async(user.password)
+
+    new_user, refresh_token = await run_in_threadpool(_create_user, db, user, hashed_password)
 
     # Genera il token JWT per il nuovo utente
-    access_token = create_access_token(data={"sub": new_user.email})
+    access_token = create_access_token(data=token_claims(new_user))
 
     # Restituisci l'utente e il token
     return UserResponse(
@@ -101,33 +99,51 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         is_admin=new_user.is_admin,
         faculty_id=new_user.faculty_id,
         access_token=access_token,
+        refresh_token=refresh_token,
         token_type="bearer"
     )
 
 # API di login
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user.email).first()
+async def login(user: UserLogin, db: Session = Depends(get_db)):
+    existing_user = await run_in_threadpool(_find_user, db, user.email)
     if not existing_user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    # Controlla se la password è corretta
-    if not pwd_context.verify(user.password, existing_user.hashed_password):
+    # Controlla se la password è corretta (nel pool di processi)
+    if not await verify_password_async(user.password, existing_user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    # Genera JWT token
-    access_token = create_access_token(data={"sub": existing_user.email})
+    # Genera JWT token e apre la sessione (refresh token)
+    access_token = create_access_token(data=token_claims(existing_user))
+    refresh_token = await run_in_threadpool(_open_session, db, existing_user.id)
 
-    # Restituisce solo il token
-    return {"access_token": access_token, "token_type": "bearer"}
-
-# API di logout (invalida il token lato client)
-@router.post("/logout")
-def logout():
-    """
-    Simulazione del logout. Poiché JWT è stateless, lato backend non possiamo invalidare un token già generato.
-    Il logout si gestisce lato frontend eliminando il token dallo storage del client.
-    """
-    return {"message": "Logout successful. Please delete the token on client-side."}
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
+# API di refresh: nuovo access token (e nuovo refresh token) senza password né bcrypt
+@router.post("/refresh")
+def refresh(body: TokenRefresh, db: Session = Depends(get_db)):
+    user, refresh_token = _refresh_session(db, body.refresh_token)
+    access_token = create_access_token(data=token_claims(user))
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
+# API di logout: chiude la sessione del refresh token e revoca l'access token presentato
+@router.post("/logout")
+def logout(
+    body: Optional[LogoutRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_auth_scheme),
+    db: Session = Depends(get_db),
+):
+    if body is not None and body.refresh_token:
+        revoke_refresh_token(db, body.refresh_token)
+    if credentials is not None:
+        try:
+            revoke_access_token(db, decode_token(credentials.credentials, credentials_error()))
+        except HTTPException:
+            pass  # Token già scaduto o revocato: non c'è altro da invalidare
+
+    # Pulizia delle righe che non servono più (scadute), a carico dei logout
+    purge_expired_refresh_tokens(db)
+    purge_expired_revocations(db)
+    db.commit()
+    return {"message": "Logout successful."}
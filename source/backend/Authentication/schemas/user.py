@@ -15,6 +15,14 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+# Schema per il rinnovo della sessione
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+# Schema per il logout (il refresh token è facoltativo: chiude la sessione lato server)
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class UserUpdate(BaseModel):
     email: Optional[EmailStr] = None
     password: Optional[str] = None
@@ -34,6 +42,7 @@ class UserResponse(BaseModel):
     is_admin: bool
     faculty_id : Optional[int] = None
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
 
     class Config:
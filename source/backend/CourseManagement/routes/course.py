@@ -1,57 +1,59 @@
+import os
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from database.database import get_db
-from models.course import Course
-from models.review import Review
-from models.user import User
-from models.teacher import Teacher
-from models.report import Report
+from sapienza_common.database import get_db, remove
+from sapienza_common.catalog_cache import catalog_response
+from sapienza_common.models.course import Course
+from sapienza_common.models.review import Review
+from sapienza_common.models.user import User
+from sapienza_common.models.teacher import Teacher
+from sapienza_common.models.report import Report
+from sapienza_common.models.stats import CourseStats
+from sapienza_common.stats import review_changed, review_scores, REVIEW_CRITERIA, STARS
 from schemas.course import CourseCreate, CourseResponse
 from schemas.review import ReviewCreate, ReviewResponse
 from schemas.report import ReportCreate, ReportResponse
-from auth.auth import get_current_user  # Per autenticazione admin
+from sapienza_common.auth import get_current_user, get_current_principal, Principal  # Per autenticazione admin
+from sapienza_common.cache import make_cache
 from fastapi.encoders import jsonable_encoder
 from typing import List  # ✅ Per specificare il tipo di lista nel response_model
 router = APIRouter()
 
-def reset_sequence(db: Session, table_name: str, column_name: str):
-    """ Reset the sequence to the max ID in the table. """
-    db.execute(text(f"""
-        SELECT setval(pg_get_serial_sequence('{table_name}', '{column_name}'), 
-                      COALESCE((SELECT MAX({column_name}) FROM {table_name}) + 1 , 1), false)
-    """))
-    db.commit()
-
-
 # 📌 Ottenere tutti i corsi
+# Le letture del catalogo passano dalla cache con ETag (vedi sapienza_common/catalog_cache.py)
 @router.get("/", response_model=list[CourseResponse])
-def get_courses(db: Session = Depends(get_db)):
-    courses = db.query(Course).all()
-    return courses
+def get_courses(request: Request, db: Session = Depends(get_db)):
+    return catalog_response(request, db, list[CourseResponse], lambda: db.query(Course).all())
 
 # 📌 Ottenere i corsi appartenenti a una specifica facoltà
 @router.get("/faculty/{faculty_id}", response_model=list[CourseResponse])
-def get_courses_by_faculty(faculty_id: int, db: Session = Depends(get_db)):
-    courses = db.query(Course).filter(Course.faculty_id == faculty_id).all()
-    if not courses:
-        raise HTTPException(status_code=404, detail="No courses found for this faculty")
-    return courses
+def get_courses_by_faculty(faculty_id: int, request: Request, db: Session = Depends(get_db)):
+    def build():
+        courses = db.query(Course).filter(Course.faculty_id == faculty_id).all()
+        if not courses:
+            raise HTTPException(status_code=404, detail="No courses found for this faculty")
+        return courses
+
+    return catalog_response(request, db, list[CourseResponse], build)
 
 # 📌 Ottenere il professore di un corso
 @router.get("/{course_id}/teacher", response_model=dict)
-def get_course_teacher(course_id: int, db: Session = Depends(get_db)):
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
+def get_course_teacher(course_id: int, request: Request, db: Session = Depends(get_db)):
+    def build():
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if not course:
+            raise HTTPException(status_code=404, detail="Course not found")
+
+        teacher = db.query(Teacher).filter(Teacher.id == course.teacher_id).first()
+        if not teacher:
+            raise HTTPException(status_code=404, detail="Teacher not found")
 
-    teacher = db.query(Teacher).filter(Teacher.id == course.teacher_id).first()
-    if not teacher:
-        raise HTTPException(status_code=404, detail="Teacher not found")
+        return {"teacher_id": teacher.id, "name": teacher.name}
 
-    return {"teacher_id": teacher.id, "name": teacher.name}
+    return catalog_response(request, db, dict, build)
 
 # 📌 Aggiungere una recensione con controllo del valore minimo
 @router.post("/{course_id}/reviews", response_model=ReviewResponse)
@@ -72,37 +74,49 @@ def add_review(course_id: int, review: ReviewCreate, db: Session = Depends(get_d
     if not course:
         raise HTTPException(status_code=404, detail="Course not found.")
     
-    # Controlla se l'utente ha già lasciato una recensione per questo corso
-    existing_review = db.query(Review).filter(Review.course_id == course_id, Review.student_id == student_id).first()
-
-    if existing_review:
-        # Se una recensione esiste già, permetti di modificarla
-        existing_review.rating_clarity = review.rating_clarity
-        existing_review.rating_feasibility = review.rating_feasibility
-        existing_review.rating_availability = review.rating_availability
-        existing_review.comment = review.comment
-        
-        db.commit()
-        db.refresh(existing_review)
-        
-        return existing_review
-    else:
-        # Se non esiste, crea una nuova recensione
-        new_review = Review(
-            course_id=course_id,
-            student_id=student_id,
-            rating_clarity=review.rating_clarity,
-            rating_feasibility=review.rating_feasibility,
-            rating_availability=review.rating_availability,
-            comment=review.comment
-        )
+    values = {
+        "rating_clarity": review.rating_clarity,
+        "rating_feasibility": review.rating_feasibility,
+        "rating_availability": review.rating_availability,
+        "comment": review.comment,
+    }
 
-        db.add(new_review)
+    # Inserimento atomico: l'indice unico (course_id, student_id) segnala la recensione già presente
+    new_review = db.scalar(
+        insert(Review)
+        .values(course_id=course_id, student_id=student_id, **values)
+        .on_conflict_do_nothing(
+            index_elements=[Review.course_id, Review.student_id],
+            index_where=Review.deleted_at.is_(None),
+        )
+        .returning(Review)
+    )
+    if new_review is not None:
+        review_changed(db, course_id, new=review_scores(new_review))
         db.commit()
         db.refresh(new_review)
 
         return new_review
 
+    # Se una recensione esiste già, permetti di modificarla (bloccata: i delta sugli aggregati
+    # partono dai voti che stiamo davvero sostituendo)
+    existing_review = db.query(Review).filter(
+        Review.course_id == course_id, Review.student_id == student_id
+    ).with_for_update().first()
+    if not existing_review:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="The review was deleted meanwhile, please retry.")
+
+    old_scores = review_scores(existing_review)
+    for column, value in values.items():
+        setattr(existing_review, column, value)
+    review_changed(db, course_id, old=old_scores, new=review_scores(existing_review))
+
+    db.commit()
+    db.refresh(existing_review)
+
+    return existing_review
+
 # 📌 Ottenere tutte le recensioni di un corso
 @router.get("/{course_id}/reviews", response_model=list[ReviewResponse])
 def get_course_reviews(course_id: int, db: Session = Depends(get_db)):
@@ -112,7 +126,7 @@ def get_course_reviews(course_id: int, db: Session = Depends(get_db)):
     return reviews
 
 @router.get("/my-reviews", response_model=list[ReviewResponse])
-def get_student_reviews(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_student_reviews(db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
     reviews = db.query(Review).filter(Review.student_id == current_user.id).all()
     
     if not reviews:
@@ -124,7 +138,8 @@ def get_student_reviews(db: Session = Depends(get_db), current_user=Depends(get_
 # 📌 Modificare una recensione
 @router.put("/reviews/{review_id}", response_model=ReviewResponse)
 def update_review(review_id: int, updated_review: ReviewCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    review = db.query(Review).filter(Review.id == review_id).first()
+    # Bloccata: i delta sugli aggregati partono dai voti che stiamo davvero sostituendo
+    review = db.query(Review).filter(Review.id == review_id).with_for_update().first()
     
     if not review:
         raise HTTPException(status_code=404, detail="Review not found.")
@@ -132,10 +147,12 @@ def update_review(review_id: int, updated_review: ReviewCreate, db: Session = De
     if review.student_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="You can only edit your own reviews.")
 
+    old_scores = review_scores(review)
     review.rating_clarity = updated_review.rating_clarity
     review.rating_feasibility = updated_review.rating_feasibility
     review.rating_availability = updated_review.rating_availability
     review.comment = updated_review.comment
+    review_changed(db, review.course_id, old=old_scores, new=review_scores(review))
 
     db.commit()
     db.refresh(review)
@@ -145,7 +162,8 @@ def update_review(review_id: int, updated_review: ReviewCreate, db: Session = De
 # 📌 Eliminare una recensione
 @router.delete("/reviews/{review_id}")
 def delete_review(review_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    review = db.query(Review).filter(Review.id == review_id).first()
+    # Bloccata: i delta sugli aggregati partono dai voti che stiamo davvero togliendo
+    review = db.query(Review).filter(Review.id == review_id).with_for_update().first()
     
     if not review:
         raise HTTPException(status_code=404, detail="Review not found.")
@@ -153,35 +171,84 @@ def delete_review(review_id: int, db: Session = Depends(get_db), current_user=De
     if review.student_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="You can only delete your own reviews.")
 
-    db.delete(review)
+    if remove(db, review):
+        review_changed(db, review.course_id, old=review_scores(review))
     db.commit()
 
-    reset_sequence(db, "reviews", "id")
-
     return {"message": "Review deleted successfully"}
 
 # 📌 Funzione per arrotondare al primo intero o mezzo superiore
 def round_up_half(value: float) -> float:
     return round(value * 2) / 2
 
+# Massimo numero di corsi per richiesta batch
+MAX_BATCH_COURSES = 200
+
+# Voti dei corsi per id, invalidati dagli helper di sapienza_common/stats.py dopo il commit.
+# Col backend locale le scritture degli altri servizi (admin) si vedono alla scadenza del TTL.
+COURSE_RATINGS_CACHE_TTL = float(os.getenv("COURSE_RATINGS_CACHE_TTL", "30"))
+COURSE_RATINGS_CACHE_SIZE = int(os.getenv("COURSE_RATINGS_CACHE_SIZE", "4096"))
+
+ratings_cache = make_cache("course-ratings", maxsize=COURSE_RATINGS_CACHE_SIZE, ttl=COURSE_RATINGS_CACHE_TTL)
+
+def course_ratings_result(course_id: int, stats) -> dict:
+    """
+    Build the ratings payload from the stored ``CourseStats`` row (or ``None`` when the
+    course has no reviews). Averages are ``sum / count`` rounded with ``round_up_half``,
+    exactly as when the rows were summed in Python.
+    """
+    count = stats.reviews_count if stats is not None else 0
+    result = {"course_id": course_id, "reviews_count": count}
+    histogram = {}
+    for name in REVIEW_CRITERIA:
+        result[f"average_{name}"] = round_up_half(getattr(stats, f"sum_{name}") / count) if count else None
+        histogram[name] = {str(star): getattr(stats, f"{name}_{star}") if count else 0 for star in STARS}
+    result["histogram"] = histogram
+    return result
+
+def cached_ratings(course_ids):
+    """ Cached ratings payloads of ``course_ids`` and the ids that still have to be read. """
+    results, missing = {}, []
+    for course_id in dict.fromkeys(course_ids):
+        result = ratings_cache.get(course_id)
+        if result is None:
+            missing.append(course_id)
+        else:
+            results[course_id] = result
+    return results, missing
+
+def store_ratings(results: dict, missing, rows: dict):
+    """ Build and cache the payloads of the ``missing`` ids from their ``CourseStats`` rows. """
+    for course_id in missing:
+        results[course_id] = course_ratings_result(course_id, rows.get(course_id))
+        ratings_cache.set(course_id, results[course_id])
+
+def check_batch_size(course_ids: List[int]):
+    if len(course_ids) > MAX_BATCH_COURSES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_COURSES} course ids per request.")
+
+# 📌 Ottenere i voti di più corsi in una sola chiamata (es. pagina della facoltà)
+@router.get("/ratings")
+def get_courses_ratings(course_ids: List[int] = Query(...), db: Session = Depends(get_db)):
+    check_batch_size(course_ids)
+    results, missing = cached_ratings(course_ids)
+    if missing:
+        rows = {stats.course_id: stats for stats in db.query(CourseStats).filter(CourseStats.course_id.in_(missing))}
+        store_ratings(results, missing, rows)
+    # Un elemento per ogni id richiesto (nell'ordine della richiesta), anche senza recensioni
+    return [results[course_id] for course_id in dict.fromkeys(course_ids)]
+
 # 📌 Ottenere la media dei voti di un corso con arrotondamento
 @router.get("/{course_id}/ratings")
 def get_course_ratings(course_id: int, db: Session = Depends(get_db)):
-    reviews = db.query(Review).filter(Review.course_id == course_id).all()
-    
-    if not reviews:
-        raise HTTPException(status_code=404, detail="No ratings found for this course.")
+    results, missing = cached_ratings([course_id])
+    if missing:
+        store_ratings(results, missing, {course_id: db.get(CourseStats, course_id)})
 
-    avg_clarity = round_up_half(sum(r.rating_clarity for r in reviews) / len(reviews))
-    avg_feasibility = round_up_half(sum(r.rating_feasibility for r in reviews) / len(reviews))
-    avg_availability = round_up_half(sum(r.rating_availability for r in reviews) / len(reviews))
+    if results[course_id]["reviews_count"] == 0:
+        raise HTTPException(status_code=404, detail="No ratings found for this course.")
 
-    return {
-        "course_id": course_id,
-        "average_clarity": avg_clarity,
-        "average_feasibility": avg_feasibility,
-        "average_availability": avg_availability
-    }
+    return results[course_id]
 
 @router.post("/reports", response_model=ReportResponse)
 def create_report(report: ReportCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -201,7 +268,7 @@ def create_report(report: ReportCreate, db: Session = Depends(get_db), current_u
     return new_report
 
 @router.get("/reports", response_model=List[ReportResponse])
-def get_all_reports(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_all_reports(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Only admins can view reports.")
 
@@ -221,8 +288,11 @@ def delete_report(report_id: int, db: Session = Depends(get_db), current_user: U
     return {"message": "Report deleted successfully."}
 
 @router.get("/{course_id}/details", response_model=CourseResponse)
-def get_course_detail(course_id: int, db: Session = Depends(get_db)):
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
-    return course
\ No newline at end of file
+def get_course_detail(course_id: int, request: Request, db: Session = Depends(get_db)):
+    def build():
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if not course:
+            raise HTTPException(status_code=404, detail="Course not found")
+        return course
+
+    return catalog_response(request, db, CourseResponse, build)
\ No newline at end of file
@@ -0,0 +1,53 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sapienza_common.database import get_async_db
+from sapienza_common.catalog_cache import catalog_response_async
+from sapienza_common.models.course import Course
+from sapienza_common.models.review import Review
+from sapienza_common.models.stats import CourseStats
+from schemas.course import CourseResponse
+from schemas.review import ReviewResponse
+from routes.course import cached_ratings, store_ratings, check_batch_size
+
+# Versioni asincrone (asyncpg) delle route di lettura più usate.
+# Incluse prima del router sincrono solo se DB_ASYNC è attivo: a parità di path vincono queste.
+router = APIRouter()
+
+
+# 📌 Ottenere tutti i corsi
+@router.get("/", response_model=list[CourseResponse])
+async def get_courses(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        return (await db.scalars(select(Course))).all()
+
+    return await catalog_response_async(request, db, list[CourseResponse], build)
+
+# 📌 Ottenere tutte le recensioni di un corso
+@router.get("/{course_id}/reviews", response_model=list[ReviewResponse])
+async def get_course_reviews(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    reviews = (await db.scalars(select(Review).where(Review.course_id == course_id))).all()
+    if not reviews:
+        raise HTTPException(status_code=404, detail="No reviews found for this course.")
+    return reviews
+
+# 📌 Ottenere i voti di più corsi in una sola chiamata
+@router.get("/ratings")
+async def get_courses_ratings(course_ids: List[int] = Query(...), db: AsyncSession = Depends(get_async_db)):
+    check_batch_size(course_ids)
+    results, missing = cached_ratings(course_ids)
+    if missing:
+        stored = await db.scalars(select(CourseStats).where(CourseStats.course_id.in_(missing)))
+        store_ratings(results, missing, {stats.course_id: stats for stats in stored})
+    return [results[course_id] for course_id in dict.fromkeys(course_ids)]
+
+# 📌 Ottenere la media dei voti di un corso con arrotondamento
+@router.get("/{course_id}/ratings")
+async def get_course_ratings(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    results, missing = cached_ratings([course_id])
+    if missing:
+        store_ratings(results, missing, {course_id: await db.get(CourseStats, course_id)})
+    if results[course_id]["reviews_count"] == 0:
+        raise HTTPException(status_code=404, detail="No ratings found for this course.")
+    return results[course_id]
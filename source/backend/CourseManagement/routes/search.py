@@ -0,0 +1,142 @@
+import base64
+import json
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, exists, tuple_, null
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import Session
+from sapienza_common.database import get_db
+from sapienza_common.auth import get_current_principal, Principal
+from sapienza_common.models.course import Course
+from sapienza_common.models.note import Note
+from sapienza_common.models.note_text import NotePage
+from sapienza_common.models.review import Review
+from sapienza_common.models.teacher import Teacher
+from sapienza_common.search import prefix_query, matches, headline, TEXT_SEARCH_CONFIG, NAME_SEARCH_CONFIG, SEARCH_CANDIDATES
+from schemas.search import SearchPage, SearchOverview
+
+# Ricerca full-text su appunti (descrizione e testo dei file), corsi, professori e recensioni
+# (vedi sapienza_common.search): i risultati più recenti ordinati per rilevanza, paginati con
+# un cursore (rank, id) come le liste admin.
+router = APIRouter()
+
+SearchKind = Literal["courses", "teachers", "notes", "reviews", "pages"]
+DEFAULT_SEARCH_PAGE = 20
+MAX_SEARCH_PAGE = 100
+
+
+def encode_cursor(rank: float, last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"rank": rank, "id": last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(data["rank"]), int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def candidates(model, text, query: str, config: str, *conditions, columns=()):
+    """ The ``SEARCH_CANDIDATES`` most recent rows of ``model`` matching ``query``, with their rank. """
+    condition, rank = matches(model.search_vector, query, config)
+    return (
+        select(model.id, text.label("text"), *columns, rank.cast(DOUBLE_PRECISION).label("rank"))
+        .where(condition, *conditions)
+        .order_by(model.id.desc())
+        .limit(SEARCH_CANDIDATES)
+        .subquery()
+    )
+
+
+def search_statement(kind: str, query: str, faculty_id: Optional[int]):
+    """ SELECT of the hits of one kind as (id, text, course_id, faculty_id, rank). """
+    if kind == "teachers":
+        # Professori che tengono almeno un corso della facoltà
+        scope = [exists().where(Course.teacher_id == Teacher.id, Course.faculty_id == faculty_id)] if faculty_id is not None else []
+        hits = candidates(Teacher, Teacher.name, query, NAME_SEARCH_CONFIG, *scope)
+        return select(hits.c.id, hits.c.text, null().label("course_id"), null().label("faculty_id"), hits.c.rank), hits
+
+    if kind == "courses":
+        scope = [Course.faculty_id == faculty_id] if faculty_id is not None else []
+        hits = candidates(Course, Course.name, query, TEXT_SEARCH_CONFIG, *scope, columns=(Course.faculty_id,))
+        return select(hits.c.id, hits.c.text, hits.c.id.label("course_id"), hits.c.faculty_id, hits.c.rank), hits
+
+    if kind == "pages":
+        return pages_statement(query, faculty_id)
+
+    # Appunti e recensioni: la facoltà è quella del corso
+    model, text = (Note, Note.description) if kind == "notes" else (Review, Review.comment)
+    scope = [model.course_id.in_(select(Course.id).where(Course.faculty_id == faculty_id))] if faculty_id is not None else []
+    hits = candidates(model, text, query, TEXT_SEARCH_CONFIG, *scope, columns=(model.course_id,))
+    stmt = select(hits.c.id, hits.c.text, hits.c.course_id, Course.faculty_id, hits.c.rank).join(Course, Course.id == hits.c.course_id)
+    return stmt, hits
+
+
+def pages_statement(query: str, faculty_id: Optional[int]):
+    """ Notes whose file contains the text, one hit per note: its best page, with an excerpt. """
+    condition, rank = matches(NotePage.search_vector, query, TEXT_SEARCH_CONFIG)
+    scope = [Note.course_id.in_(select(Course.id).where(Course.faculty_id == faculty_id))] if faculty_id is not None else []
+    pages = (
+        select(NotePage.note_id.label("id"), NotePage.page, Note.course_id, rank.cast(DOUBLE_PRECISION).label("rank"))
+        .join(Note, Note.id == NotePage.note_id)
+        .where(condition, *scope)
+        .order_by(NotePage.note_id.desc(), NotePage.page.desc())
+        .limit(SEARCH_CANDIDATES)
+        .subquery()
+    )
+    # La pagina migliore di ogni appunto (a parità di rank, la prima)
+    hits = (
+        select(pages)
+        .distinct(pages.c.id)
+        .order_by(pages.c.id, pages.c.rank.desc(), pages.c.page)
+        .subquery()
+    )
+    stmt = (
+        select(hits.c.id, headline(NotePage.content, query).label("text"), hits.c.course_id, Course.faculty_id, hits.c.rank, hits.c.page)
+        .join(NotePage, (NotePage.note_id == hits.c.id) & (NotePage.page == hits.c.page))
+        .join(Course, Course.id == hits.c.course_id)
+    )
+    return stmt, hits
+
+
+def search_page(db: Session, kind: str, q: str, faculty_id: Optional[int], limit: int, cursor: Optional[str] = None) -> dict:
+    query = prefix_query(q)
+    if query is None:
+        return {"items": [], "next_cursor": None}
+
+    stmt, hits = search_statement(kind, query, faculty_id)
+    if cursor:
+        # Il rank è un float8 calcolato uguale a ogni pagina: il confronto per tupla è esatto
+        stmt = stmt.where(tuple_(hits.c.rank, hits.c.id) < tuple_(*decode_cursor(cursor)))
+
+    # Una riga in più per sapere se esiste una pagina successiva
+    rows = db.execute(stmt.order_by(hits.c.rank.desc(), hits.c.id.desc()).limit(limit + 1)).mappings().all()
+    next_cursor = encode_cursor(rows[limit - 1]["rank"], rows[limit - 1]["id"]) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+
+# 🔎 Primi risultati di ogni tipo (es. menu a tendina mentre si digita)
+@router.get("/", response_model=SearchOverview)
+def search_all(
+    q: str = Query(..., min_length=1, max_length=200),
+    faculty_id: Optional[int] = None,
+    limit: int = Query(5, ge=1, le=20),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    return {kind: search_page(db, kind, q, faculty_id, limit)["items"] for kind in ("courses", "teachers", "notes", "reviews", "pages")}
+
+
+# 🔎 Ricerca su un solo tipo, paginata
+@router.get("/{kind}", response_model=SearchPage)
+def search(
+    kind: SearchKind,
+    q: str = Query(..., min_length=1, max_length=200),
+    faculty_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_SEARCH_PAGE, ge=1, le=MAX_SEARCH_PAGE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    return search_page(db, kind, q, faculty_id, limit, cursor)
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+# Schema di un risultato della ricerca full-text (appunto, corso, professore, recensione o pagina di un appunto)
+class SearchHit(BaseModel):
+    id: int
+    text: Optional[str] = None  # Descrizione, nome o commento che ha dato il risultato
+    course_id: Optional[int] = None  # Corso dell'appunto o della recensione (il corso stesso per i corsi)
+    faculty_id: Optional[int] = None
+    rank: float  # Rilevanza: i risultati sono ordinati dal più rilevante
+    page: Optional[int] = None  # Ricerca nei documenti: pagina del file che contiene il testo
+
+# Una pagina di risultati di un solo tipo, con il cursore per la successiva
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_cursor: Optional[str] = None
+
+# Primi risultati di ogni tipo (ricerca mentre si digita)
+class SearchOverview(BaseModel):
+    courses: List[SearchHit]
+    teachers: List[SearchHit]
+    notes: List[SearchHit]
+    reviews: List[SearchHit]
+    pages: List[SearchHit]
@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from fastapi.security import HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
+from sapienza_common.catalog_cache import catalog_cache_stats
 from routes.faculty import router as faculty_router
-from models.teacher import Teacher
-from database.database import engine, Base
+from routes.faculty_async import router as faculty_async_router
+from sapienza_common.database import DB_ASYNC
+from sapienza_common.health import router as health_router
+from sapienza_common.metrics import router as metrics_router
 
 app = FastAPI()
 security = HTTPBearer()
@@ -29,10 +32,16 @@ app.add_middleware(
 )
 
 # Inclusione delle route
+if DB_ASYNC:
+    app.include_router(faculty_async_router, prefix="/faculties")
 app.include_router(faculty_router, prefix="/faculties")
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 @app.get("/")
 def root():
     return {"message": "Faculties Microservice is running!"}
 
-
+@app.get("/metrics/catalog-cache")
+def catalog_cache_metrics():
+    return catalog_cache_stats()
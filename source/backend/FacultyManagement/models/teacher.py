@@ -1,13 +0,0 @@
-from sqlalchemy import Column, Integer, String
-from sqlalchemy.orm import relationship
-from database.database import Base
-
-class Teacher(Base):
-    __tablename__ = "teachers"
-
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True, index=True, nullable=False)
-
-    # Relazione con i corsi
-    courses = relationship("Course", back_populates="teacher", cascade="save-update")
-
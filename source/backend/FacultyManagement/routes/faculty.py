@@ -1,18 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-from database.database import get_db
-from models.faculty import Faculty
-from models.user import User
+from sapienza_common.database import get_db
+from sapienza_common.catalog_cache import catalog_response
+from sapienza_common.models.faculty import Faculty
+from sapienza_common.models.user import User
 from schemas.faculty import FacultyCreate, FacultyResponse
-from auth.auth import get_current_user  # Per autenticazione admin
+from sapienza_common.auth import get_current_user, invalidate_cached_user, create_access_token, token_claims  # Per autenticazione admin
 
 router = APIRouter()
 
 # ✅ **Ottenere tutte le facoltà disponibili**
 @router.get("/", response_model=list[FacultyResponse])
-def get_faculties(db: Session = Depends(get_db)):
-    faculties = db.query(Faculty).all()
-    return faculties
+def get_faculties(request: Request, db: Session = Depends(get_db)):
+    # Servite dalla cache con ETag (vedi sapienza_common/catalog_cache.py)
+    return catalog_response(request, db, list[FacultyResponse], lambda: db.query(Faculty).all())
 
 
 # ✅ **Aggiungere una nuova facoltà (solo admin)**
@@ -50,10 +51,17 @@ def enroll_in_faculty(
 
     # Assegna la facoltà all'utente
     current_user.faculty_id = faculty_id
+    # I token emessi contengono la vecchia facoltà: vanno rinnovati
+    current_user.token_version = (current_user.token_version or 0) + 1
     db.commit()
     db.refresh(current_user)
+    invalidate_cached_user(current_user.email, current_user.id)
 
-    return {"message": f"User successfully enrolled in faculty {faculty.name}"}
+    return {
+        "message": f"User successfully enrolled in faculty {faculty.name}",
+        "access_token": create_access_token(data=token_claims(current_user)),
+        "token_type": "bearer",
+    }
 
 
 # ✅ **Ottenere la facoltà dell'utente autenticato**
@@ -91,7 +99,14 @@ def change_faculty(
 
     # Aggiorna la facoltà dell'utente
     current_user.faculty_id = faculty_id
+    # I token emessi contengono la vecchia facoltà: vanno rinnovati
+    current_user.token_version = (current_user.token_version or 0) + 1
     db.commit()
     db.refresh(current_user)
+    invalidate_cached_user(current_user.email, current_user.id)
 
-    return {"message": f"User successfully changed faculty to {faculty.name}"}
+    return {
+        "message": f"User successfully changed faculty to {faculty.name}",
+        "access_token": create_access_token(data=token_claims(current_user)),
+        "token_type": "bearer",
+    }
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sapienza_common.database import get_async_db
+from sapienza_common.catalog_cache import catalog_response_async
+from sapienza_common.models.faculty import Faculty
+from schemas.faculty import FacultyResponse
+
+# Versioni asincrone (asyncpg) delle route di lettura più usate.
+# Incluse prima del router sincrono solo se DB_ASYNC è attivo: a parità di path vincono queste.
+router = APIRouter()
+
+
+# ✅ **Ottenere tutte le facoltà disponibili**
+@router.get("/", response_model=list[FacultyResponse])
+async def get_faculties(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        return (await db.scalars(select(Faculty))).all()
+
+    return await catalog_response_async(request, db, list[FacultyResponse], build)
@@ -0,0 +1,86 @@
+"""
+Worker that releases the GridFS blobs of deleted notes (see ``database/blob_gc.py``).
+
+Run it from the service directory:
+
+    python -m commands.blob_gc                # worker: drains the queue forever and reconciles periodically
+    python -m commands.blob_gc --once         # drains the queue once and exits
+    python -m commands.blob_gc --reconcile [--dry-run] [--grace-hours H]
+
+The worker is configured with ``BLOB_GC_INTERVAL`` (seconds between polls of an empty
+queue, default 10), ``BLOB_GC_BATCH_SIZE`` (default 500) and ``BLOB_GC_RECONCILE_HOURS``
+(hours between orphan reconciliations, default 24; 0 disables them).
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+from pymongo.errors import PyMongoError
+
+from sapienza_common.database import SessionLocal
+from database.blob_gc import BATCH_SIZE, RECONCILE_GRACE, drain, reconcile
+from database.storage import ensure_indexes
+
+BLOB_GC_INTERVAL = float(os.getenv("BLOB_GC_INTERVAL", "10"))
+BLOB_GC_BATCH_SIZE = int(os.getenv("BLOB_GC_BATCH_SIZE", str(BATCH_SIZE)))
+BLOB_GC_RECONCILE_HOURS = float(os.getenv("BLOB_GC_RECONCILE_HOURS", "24"))
+
+
+def print_reconcile_report(report: dict, dry_run: bool):
+    print(
+        f"Scanned {report['blobs_scanned']} blobs: {report['orphans']} orphaned, "
+        f"{report['bytes_freed'] / 1024 ** 2:.1f} MiB {'reclaimable' if dry_run else 'freed'}."
+    )
+    if report["missing_blobs"]:
+        print(f"  {report['missing_blobs']} notes point at a blob that does not exist.")
+
+
+def run_worker(once: bool = False):
+    ensure_indexes()  # TTL delle chiavi di idempotenza in blob_gc_applied
+    last_reconcile = time.monotonic()
+    while True:
+        db = SessionLocal()
+        try:
+            totals = drain(db, BLOB_GC_BATCH_SIZE)
+            if totals["jobs"]:
+                print(f"Released {totals['jobs']} blobs: {totals['blobs_removed']} removed, {totals['bytes_freed']} bytes freed.")
+
+            if BLOB_GC_RECONCILE_HOURS and time.monotonic() - last_reconcile >= BLOB_GC_RECONCILE_HOURS * 3600:
+                print_reconcile_report(reconcile(db), dry_run=False)
+                last_reconcile = time.monotonic()
+        except PyMongoError as exc:
+            # I job restano in coda (con backoff): si riprova al prossimo giro
+            print(f"GridFS unavailable, retrying later: {exc}")
+        finally:
+            db.close()
+
+        if once:
+            return 0
+        time.sleep(BLOB_GC_INTERVAL)
+
+
+def main(args):
+    if not args.reconcile:
+        return run_worker(args.once)
+
+    db = SessionLocal()
+    try:
+        report = reconcile(db, timedelta(hours=args.grace_hours), args.dry_run)
+        print_reconcile_report(report, args.dry_run)
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Release the GridFS blobs of deleted notes.")
+    parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+    parser.add_argument("--reconcile", action="store_true", help="Delete the blobs no note references, then exit.")
+    parser.add_argument("--dry-run", action="store_true", help="With --reconcile: only report the orphans.")
+    parser.add_argument(
+        "--grace-hours", type=float, default=RECONCILE_GRACE.total_seconds() / 3600,
+        help="With --reconcile: ignore blobs uploaded more recently than this (default 1).",
+    )
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""
+One-off migration to content-addressed note storage.
+
+Hashes every GridFS blob that has no ``sha256`` yet, repoints notes that use
+duplicate blobs at a single copy, sets each blob's ``refcount`` to the number of
+notes referencing it and deletes the redundant copies.
+
+Run it from the service directory while uploads are paused:
+
+    python -m commands.dedupe_notes [--dry-run]
+"""
+import argparse
+import hashlib
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from sapienza_common.database import SessionLocal
+from database.mongo import db as mongo_db, fs
+from sapienza_common.models.note import Note
+
+
+def hash_blob(file_id):
+    grid_out = fs.get(file_id)
+    digest = hashlib.sha256()
+    try:
+        while True:
+            chunk = grid_out.readchunk()
+            if not chunk:
+                break
+            digest.update(chunk)
+    finally:
+        grid_out.close()
+    return digest.hexdigest()
+
+
+def main(dry_run: bool = False):
+    files = mongo_db.fs.files
+
+    # 1. Hash dei blob caricati prima della deduplicazione
+    if not dry_run:
+        for doc in files.find({"sha256": {"$exists": False}}, {"_id": 1}):
+            files.update_one({"_id": doc["_id"]}, {"$set": {"sha256": hash_blob(doc["_id"])}})
+
+    # 2. Raggruppa per hash: il blob più vecchio resta, gli altri sono duplicati
+    groups = defaultdict(list)
+    for doc in files.find({}, {"_id": 1, "sha256": 1, "length": 1, "uploadDate": 1}).sort("uploadDate", 1):
+        if "sha256" not in doc:
+            doc["sha256"] = hash_blob(doc["_id"])  # solo in dry-run
+        groups[doc["sha256"]].append(doc)
+
+    session = SessionLocal()
+    removed = freed = 0
+    try:
+        for sha256, docs in groups.items():
+            keep, duplicates = docs[0], docs[1:]
+            keep_id = str(keep["_id"])
+            duplicate_ids = [str(d["_id"]) for d in duplicates]
+
+            if duplicate_ids and not dry_run:
+                session.query(Note).filter(Note.file_id.in_(duplicate_ids)).update(
+                    {Note.file_id: keep_id}, synchronize_session=False
+                )
+            if not dry_run:
+                session.query(Note).filter(Note.file_id == keep_id, Note.sha256.is_(None)).update(
+                    {Note.sha256: sha256, Note.size: keep["length"]}, synchronize_session=False
+                )
+                session.commit()
+
+            refcount = session.query(func.count(Note.id)).filter(
+                Note.file_id.in_([keep_id] + duplicate_ids)
+            ).scalar()
+            if not dry_run:
+                files.update_one({"_id": keep["_id"]}, {"$set": {"refcount": refcount}})
+
+            for duplicate in duplicates:
+                if not dry_run:
+                    fs.delete(duplicate["_id"])
+                removed += 1
+                freed += duplicate["length"]
+    finally:
+        session.close()
+
+    prefix = "[dry-run] " if dry_run else ""
+    print(f"{prefix}{len(groups)} unique blobs, {removed} duplicates removed, {freed / 1024 / 1024:.1f} MB freed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate note blobs stored in GridFS.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed.")
+    main(parser.parse_args().dry_run)
@@ -0,0 +1,89 @@
+"""
+Worker that extracts the text of the note files for in-document search (see
+``database/note_text.py``).
+
+Run it from the service directory:
+
+    python -m commands.extract_text                     # worker: processes the queue forever
+    python -m commands.extract_text --once              # processes the queue once and exits
+    python -m commands.extract_text --backfill [--after-id N]
+
+``--backfill`` enqueues the notes that have never been extracted (those uploaded before
+the queue existed) and exits; the worker then processes them after the new uploads.
+It commits every ``--batch-size`` notes and prints the last note id enqueued: it can be
+interrupted at any time and run again, optionally from that id.
+
+The worker is configured with ``TEXT_EXTRACTION_POOL_SIZE`` (extraction processes,
+default one per CPU), ``TEXT_EXTRACTION_TIMEOUT`` (seconds per document, default 60),
+``TEXT_EXTRACTION_BATCH_SIZE`` (notes per transaction, default 8) and
+``TEXT_EXTRACTION_INTERVAL`` (seconds between polls of an empty queue, default 10).
+"""
+import argparse
+import os
+import sys
+import time
+
+from pymongo.errors import PyMongoError
+
+from sapienza_common.database import SessionLocal
+from database.extractors import ExtractionPool
+from database.note_text import BACKFILL_BATCH_SIZE, BATCH_SIZE, backfill, process_batch
+
+TEXT_EXTRACTION_INTERVAL = float(os.getenv("TEXT_EXTRACTION_INTERVAL", "10"))
+TEXT_EXTRACTION_BATCH_SIZE = int(os.getenv("TEXT_EXTRACTION_BATCH_SIZE", str(BATCH_SIZE)))
+
+
+def run_worker(once: bool = False):
+    pool = ExtractionPool()
+    try:
+        while True:
+            db = SessionLocal()
+            try:
+                while True:
+                    result = process_batch(db, pool, TEXT_EXTRACTION_BATCH_SIZE)
+                    if result["jobs"]:
+                        print(
+                            f"Extracted {result['extracted']} notes ({result['pages']} pages), "
+                            f"{result['failed']} unreadable, {result['timed_out']} timed out."
+                        )
+                    if result["jobs"] < TEXT_EXTRACTION_BATCH_SIZE:
+                        break
+            except PyMongoError as exc:
+                # I job restano in coda (con backoff): si riprova al prossimo giro
+                print(f"GridFS unavailable, retrying later: {exc}")
+            finally:
+                db.close()
+
+            if once:
+                return 0
+            time.sleep(TEXT_EXTRACTION_INTERVAL)
+    finally:
+        pool.close()
+
+
+def run_backfill(batch_size: int, after_id: int):
+    db = SessionLocal()
+    total = 0
+    try:
+        for last_id, enqueued in backfill(db, batch_size, after_id):
+            total += enqueued
+            print(f"Enqueued {total} notes (up to note {last_id}).")
+    finally:
+        db.close()
+    print(f"Backfill complete: {total} notes enqueued.")
+    return 0
+
+
+def main(args):
+    if args.backfill:
+        return run_backfill(args.batch_size, args.after_id)
+    return run_worker(args.once)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract the text of the note files for in-document search.")
+    parser.add_argument("--once", action="store_true", help="Process the queue once and exit.")
+    parser.add_argument("--backfill", action="store_true", help="Enqueue the notes never extracted, then exit.")
+    parser.add_argument("--after-id", type=int, default=0, help="With --backfill: start after this note id.")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="With --backfill: notes per transaction.")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,53 @@
+"""
+Hard-delete the notes, reviews and note ratings tombstoned by ``SOFT_DELETE``.
+
+Rows whose ``deleted_at`` is older than the retention window are removed for good
+(ratings and reports of a purged note go with it through ``ON DELETE CASCADE``) and
+the GridFS blobs of the purged notes are queued for the GC worker by the ``notes``
+delete trigger. Tombstones are already excluded from the aggregates, so
+``note_stats`` and ``course_stats`` do not change.
+
+Run it from the service directory:
+
+    python -m commands.purge_tombstones [--older-than DAYS] [--dry-run]
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from sapienza_common.database import SessionLocal
+from sapienza_common.models.note import Note
+from sapienza_common.models.note_ratings import NoteRating
+from sapienza_common.models.review import Review
+
+
+def main(older_than: int = 30, dry_run: bool = False):
+    cutoff = datetime.utcnow() - timedelta(days=older_than)
+    db = SessionLocal()
+    try:
+        if dry_run:
+            for model in (NoteRating, Review, Note):
+                count = db.scalar(
+                    select(func.count()).select_from(model).where(model.deleted_at < cutoff)
+                    .execution_options(include_deleted=True)
+                )
+                print(f"{model.__tablename__}: {count} tombstones older than {older_than} days.")
+            return 0
+
+        for model in (NoteRating, Review, Note):
+            purged = db.execute(delete(model).where(model.deleted_at < cutoff)).rowcount
+            print(f"{model.__tablename__}: {purged} purged.")
+        db.commit()
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hard-delete soft-deleted notes, reviews and note ratings.")
+    parser.add_argument("--older-than", type=int, default=30, metavar="DAYS", help="Retention window in days (default 30).")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the tombstones, do not delete.")
+    args = parser.parse_args()
+    sys.exit(main(args.older_than, args.dry_run))
@@ -0,0 +1,61 @@
+"""
+Verify and repair the stored rating aggregates (``note_stats`` and ``course_stats``).
+
+Recomputes every aggregate from ``note_ratings`` and ``reviews``, compares it with
+the stored row and rewrites only the rows that drifted (or are missing).
+
+Run it from the service directory:
+
+    python -m commands.rebuild_stats [--verify]
+
+With ``--verify`` nothing is written and the exit status is 1 if any row drifted.
+"""
+import argparse
+import sys
+
+from sqlalchemy import select
+
+from sapienza_common.database import SessionLocal
+from sapienza_common.stats import note_stats_select, course_stats_select, refresh_stats
+from sapienza_common.models.stats import NoteStats, CourseStats
+
+
+def find_drift(db, model, key: str, expected_stmt):
+    """ Ids whose stored aggregate differs from (or is missing for) the recomputed one. """
+    columns = list(expected_stmt.selected_columns.keys())
+    expected = {row[key]: row for row in db.execute(expected_stmt).mappings()}
+    stored_stmt = select(*[model.__table__.c[column] for column in columns])
+    stored = {row[key]: row for row in db.execute(stored_stmt).mappings()}
+    return sorted(
+        id_ for id_, row in expected.items()
+        if id_ not in stored or any(row[column] != stored[id_][column] for column in columns)
+    )
+
+
+def main(verify: bool = False):
+    db = SessionLocal()
+    try:
+        note_ids = find_drift(db, NoteStats, "note_id", note_stats_select())
+        course_ids = find_drift(db, CourseStats, "course_id", course_stats_select())
+
+        print(f"{len(note_ids)} note aggregates and {len(course_ids)} course aggregates out of sync.")
+        if note_ids:
+            print(f"  notes: {note_ids[:20]}{' ...' if len(note_ids) > 20 else ''}")
+        if course_ids:
+            print(f"  courses: {course_ids[:20]}{' ...' if len(course_ids) > 20 else ''}")
+
+        if verify:
+            return 1 if note_ids or course_ids else 0
+
+        refresh_stats(db, note_ids, course_ids)
+        db.commit()
+        print("Aggregates repaired.")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and repair the stored rating aggregates.")
+    parser.add_argument("--verify", action="store_true", help="Only report drift, do not write.")
+    sys.exit(main(parser.parse_args().verify))
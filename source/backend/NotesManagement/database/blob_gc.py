@@ -0,0 +1,136 @@
+"""
+Garbage collection of the GridFS blobs left behind by deleted notes.
+
+Deleting a note (directly, through a cascade from its user, course or faculty, or
+when a tombstone is purged) only enqueues its ``file_id`` in ``blob_gc_queue``, in the
+same transaction as the ``DELETE``. ``process_batch`` drains the queue a batch at a
+time, so requests never wait on Mongo and a Mongo outage only delays the cleanup.
+
+Decrementing a refcount is not idempotent, so every job id is recorded in the
+``blob_gc_applied`` collection before its reference is dropped: a batch retried after
+a crash between the Mongo writes and the Postgres commit skips the jobs already applied
+and can leak a blob, never delete one still in use. ``reconcile`` reclaims leaks (and
+blobs orphaned before the queue existed) by diffing ``notes.file_id`` with ``fs.files``.
+"""
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+from sqlalchemy import delete, func, literal_column, select, update
+
+from database.mongo import db as mongo_db
+from database.storage import release_blobs
+from sapienza_common.models.blob_gc import BlobGCJob
+from sapienza_common.models.note import Note
+
+BATCH_SIZE = 500
+# Attesa dopo un errore: 2^tentativi minuti, al massimo un'ora
+MAX_BACKOFF_MINUTES = 60
+# Gli upload salvano il blob prima della riga in notes: i blob più giovani non sono orfani
+RECONCILE_GRACE = timedelta(hours=1)
+
+
+def _claim_applied(job_ids) -> set:
+    """ Record ``job_ids`` as applied and return the ones that were not already. """
+    now = datetime.utcnow()
+    try:
+        mongo_db.blob_gc_applied.insert_many([{"_id": job_id, "applied_at": now} for job_id in job_ids], ordered=False)
+        return set(job_ids)
+    except BulkWriteError as exc:
+        errors = exc.details["writeErrors"]
+        if any(error["code"] != 11000 for error in errors):
+            raise
+        return set(job_ids) - {error["op"]["_id"] for error in errors}
+
+
+def process_batch(db, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Release the blobs of up to ``batch_size`` queued jobs and remove them from the queue.
+    Jobs are locked with ``SKIP LOCKED``, so several workers can run side by side. On a
+    Mongo error the batch is postponed with exponential backoff instead of retried at once.
+    Returns the number of jobs processed, blobs removed and bytes freed.
+    """
+    jobs = db.execute(
+        select(BlobGCJob.id, BlobGCJob.file_id)
+        .where(BlobGCJob.available_at <= func.now())
+        .order_by(BlobGCJob.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    result = {"jobs": len(jobs), "blobs_removed": 0, "bytes_freed": 0}
+    if not jobs:
+        db.rollback()
+        return result
+
+    job_ids = [job.id for job in jobs]
+    try:
+        pending = _claim_applied(job_ids)
+        # file_id non validi (appunti di prova, dati legacy): non c'è nulla da rilasciare
+        file_ids = [job.file_id for job in jobs if job.id in pending and ObjectId.is_valid(job.file_id)]
+        result["blobs_removed"], result["bytes_freed"] = release_blobs(file_ids)
+    except PyMongoError as exc:
+        backoff = func.least(func.power(2, BlobGCJob.attempts), MAX_BACKOFF_MINUTES) * literal_column("interval '1 minute'")
+        db.execute(
+            update(BlobGCJob)
+            .where(BlobGCJob.id.in_(job_ids))
+            .values(attempts=BlobGCJob.attempts + 1, available_at=func.now() + backoff, last_error=str(exc)[:500])
+        )
+        db.commit()
+        raise
+
+    db.execute(delete(BlobGCJob).where(BlobGCJob.id.in_(job_ids)))
+    db.commit()
+    return result
+
+
+def drain(db, batch_size: int = BATCH_SIZE) -> dict:
+    """ Process batches until no job is available. """
+    totals = {"jobs": 0, "blobs_removed": 0, "bytes_freed": 0}
+    while True:
+        result = process_batch(db, batch_size)
+        for key in totals:
+            totals[key] += result[key]
+        if result["jobs"] < batch_size:
+            return totals
+
+
+def queue_stats(db) -> dict:
+    """ Queue depth and age of the oldest job, for monitoring. """
+    # Età calcolata da Postgres: enqueued_at è scritto con il suo now()
+    oldest_age = func.extract("epoch", func.now() - func.min(BlobGCJob.enqueued_at))
+    depth, age, retrying = db.execute(
+        select(func.count(), oldest_age, func.count().filter(BlobGCJob.attempts > 0))
+    ).one()
+    return {"depth": depth, "oldest_age_seconds": float(age or 0), "retrying": retrying}
+
+
+def reconcile(db, grace: timedelta = RECONCILE_GRACE, dry_run: bool = False) -> dict:
+    """
+    Delete the GridFS blobs that no note references (tombstoned notes included) and
+    report how many bytes were freed, plus the notes whose blob is missing.
+    Each orphan is deleted only if its refcount is unchanged since the scan, so a blob
+    reused by a concurrent upload survives.
+    """
+    referenced = set(db.scalars(select(Note.file_id).distinct().execution_options(include_deleted=True)))
+    cutoff = datetime.utcnow() - grace
+
+    report = {"blobs_scanned": 0, "orphans": 0, "bytes_freed": 0, "missing_blobs": 0}
+    stored = set()
+    for doc in mongo_db.fs.files.find({}, {"length": 1, "uploadDate": 1, "refcount": 1}):
+        report["blobs_scanned"] += 1
+        stored.add(str(doc["_id"]))
+        if str(doc["_id"]) in referenced or doc["uploadDate"] > cutoff:
+            continue
+
+        report["orphans"] += 1
+        if dry_run:
+            report["bytes_freed"] += doc.get("length", 0)
+            continue
+
+        unchanged = {"_id": doc["_id"], "refcount": doc["refcount"] if "refcount" in doc else {"$exists": False}}
+        if mongo_db.fs.files.delete_one(unchanged).deleted_count:
+            mongo_db.fs.chunks.delete_many({"files_id": doc["_id"]})
+            report["bytes_freed"] += doc.get("length", 0)
+
+    report["missing_blobs"] = len(referenced - stored)
+    return report
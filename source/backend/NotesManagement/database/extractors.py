@@ -0,0 +1,170 @@
+"""
+Text extraction from the note files, page by page, on a pool of worker processes.
+
+PDFs are read with ``pypdf`` (pure Python); plain-text files (``text/*`` or a text
+extension) are decoded as UTF-8, or Latin-1 when they are not valid UTF-8, and cut into
+pages at form feeds and every ``PLAIN_TEXT_PAGE_CHARS`` characters. Other formats raise
+``UnsupportedContent``. A page that cannot be read is skipped, the others are kept.
+
+Parsing is CPU-bound and a malformed PDF can take a long time (or crash the parser), so
+it runs in ``ExtractionPool``: separate processes, a time limit per document counted
+from when it starts, and a pool that is torn down and recreated when a document does
+not finish in time.
+This module only imports the standard library at load time: it is what the spawned
+workers import.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from io import BytesIO
+from pathlib import PurePath
+
+MAX_PAGES = 2000
+# Oltre, la pagina è troncata: i tsvector hanno un limite di 1 MB
+MAX_PAGE_CHARS = 20000
+PLAIN_TEXT_PAGE_CHARS = 3000
+TEXT_EXTENSIONS = {".txt", ".md", ".tex", ".csv", ".py", ".c", ".java", ".sql"}
+
+EXTRACTION_POOL_SIZE = int(os.getenv("TEXT_EXTRACTION_POOL_SIZE", str(os.cpu_count() or 1)))
+# Secondi concessi a un documento prima di considerarlo bloccato
+EXTRACTION_TIMEOUT = float(os.getenv("TEXT_EXTRACTION_TIMEOUT", "60"))
+# Processi riavviati dopo tanti documenti: pypdf trattiene memoria sui file grandi
+MAX_TASKS_PER_WORKER = 100
+
+
+class UnsupportedContent(Exception):
+    """ Raised for files that are neither PDF nor plain text. """
+
+
+def _clean(text: str) -> str:
+    # Postgres non accetta NUL nei testi
+    return text.replace("\x00", "").strip()[:MAX_PAGE_CHARS]
+
+
+def pdf_pages(content: bytes) -> list:
+    from pypdf import PdfReader
+
+    reader = PdfReader(BytesIO(content))
+    if reader.is_encrypted:
+        reader.decrypt("")  # Molti PDF sono cifrati con password utente vuota
+    pages = []
+    for number, page in enumerate(reader.pages, start=1):
+        if number > MAX_PAGES:
+            break
+        try:
+            pages.append((number, page.extract_text() or ""))
+        except Exception:
+            continue  # Pagina illeggibile: le altre restano valide
+    return pages
+
+
+def plain_text_pages(content: bytes) -> list:
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        text = content.decode("latin-1")
+
+    pages = []
+    for sheet in text.split("\f"):
+        page = ""
+        for line in sheet.splitlines(keepends=True):
+            if page and len(page) + len(line) > PLAIN_TEXT_PAGE_CHARS:
+                pages.append(page)
+                page = ""
+            page += line
+        pages.append(page)
+    return list(enumerate(pages[:MAX_PAGES], start=1))
+
+
+def extract_pages(content: bytes, content_type: str = None, filename: str = None) -> list:
+    """ ``[(page_number, text)]`` of the non-empty pages of a file. """
+    if content.startswith(b"%PDF-"):
+        pages = pdf_pages(content)
+    elif (content_type or "").startswith("text/") or PurePath(filename or "").suffix.lower() in TEXT_EXTENSIONS:
+        pages = plain_text_pages(content)
+    else:
+        raise UnsupportedContent(f"unsupported file type {content_type or filename or 'unknown'}")
+    pages = [(number, _clean(text)) for number, text in pages]
+    return [(number, text) for number, text in pages if text]
+
+
+def _extract_task(content: bytes, content_type: str, filename: str) -> tuple:
+    """ ``(pages, error)``: a document that cannot be read is an error, not a crash of the batch. """
+    try:
+        return extract_pages(content, content_type, filename), None
+    except Exception as exc:
+        return [], f"{type(exc).__name__}: {exc}"[:500]
+
+
+def _init_worker():
+    logging.getLogger("pypdf").setLevel(logging.ERROR)  # Avvisi per ogni PDF non conforme
+
+
+class ExtractionPool:
+    """ Process pool running ``extract_pages`` with a time limit. """
+
+    def __init__(self, size: int = EXTRACTION_POOL_SIZE, timeout: float = EXTRACTION_TIMEOUT):
+        self.size = max(size, 1)
+        self.timeout = timeout
+        self._pool = None
+
+    def _start(self):
+        if self._pool is None:
+            # spawn: niente fork di un processo con connessioni Postgres e Mongo aperte
+            context = multiprocessing.get_context("spawn")
+            self._pool = context.Pool(self.size, initializer=_init_worker, maxtasksperchild=MAX_TASKS_PER_WORKER)
+        return self._pool
+
+    def extract(self, documents: dict) -> dict:
+        """
+        Extract ``{key: (content, content_type, filename)}`` in parallel; returns
+        ``{key: (pages, error)}``. At most ``size`` documents are submitted at a time, so
+        each one starts as soon as it is submitted and gets ``timeout`` seconds of a
+        worker from then. The missing keys are the documents that timed out or killed
+        their worker: the pool is then recreated and the documents it was still running
+        are submitted again.
+        """
+        queue = list(documents.items())
+        running = {}  # key -> (documento, AsyncResult, scadenza)
+        results = {}
+        finished = threading.Event()
+
+        def wake(_):
+            finished.set()
+
+        while queue or running:
+            pool = self._start()
+            while queue and len(running) < self.size:
+                key, document = queue.pop(0)
+                async_result = pool.apply_async(_extract_task, document, callback=wake, error_callback=wake)
+                running[key] = (document, async_result, time.monotonic() + self.timeout)
+
+            finished.wait(max(min(deadline for _, _, deadline in running.values()) - time.monotonic(), 0))
+            finished.clear()
+            for key, (_, async_result, _) in list(running.items()):
+                if async_result.ready():
+                    del running[key]
+                    try:
+                        results[key] = async_result.get()
+                    except Exception as exc:  # Es. risultato non serializzabile
+                        results[key] = ([], f"{type(exc).__name__}: {exc}"[:500])
+
+            now = time.monotonic()
+            expired = [key for key, (_, _, deadline) in running.items() if deadline <= now]
+            if expired:
+                # Il processo bloccato va ucciso, e con lui gli altri del pool: i documenti
+                # che stavano girando senza aver superato il limite ripartono da capo
+                self.close()
+                for key in expired:
+                    del running[key]
+                queue[:0] = [(key, document) for key, (document, _, _) in running.items()]
+                running.clear()
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
@@ -1,4 +1,5 @@
 from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 import gridfs
 
 MONGO_URI = "mongodb://mongodb:27017"
@@ -7,3 +8,8 @@ DB_NAME = "notes_db"
 client = MongoClient(MONGO_URI)
 db = client[DB_NAME]
 fs = gridfs.GridFS(db)
+
+# Client asincrono per gli upload in streaming (non blocca l'event loop)
+async_client = AsyncIOMotorClient(MONGO_URI)
+async_db = async_client[DB_NAME]
+bucket = AsyncIOMotorGridFSBucket(async_db)
@@ -0,0 +1,185 @@
+"""
+Extraction of the text of the note files into ``note_pages``, for in-document search.
+
+``upload_note`` enqueues the new note in ``note_text_queue`` in the same transaction that
+creates it; ``backfill`` enqueues the notes uploaded before the queue existed.
+``process_batch`` claims pending jobs (newest notes first, so uploads never wait behind
+the backfill), reads the files from GridFS, extracts them on an ``ExtractionPool`` and
+writes one row per page. Jobs are never deleted: ``extracted_at`` marks them done, which
+is what makes the backfill incremental and any run resumable after a crash.
+
+A file that cannot be read (unsupported format, corrupt PDF, missing blob) is final:
+the job is closed with its ``last_error``. A Mongo error postpones the batch with
+exponential backoff, like the blob GC; a document that does not finish in time is
+retried up to ``MAX_ATTEMPTS`` times. Notes sharing a blob (same ``sha256``) reuse the
+pages already extracted instead of parsing the file again.
+"""
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
+from pymongo.errors import PyMongoError
+from sqlalchemy import delete, func, insert, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from database.storage import BlobTooLarge, read_blob
+from sapienza_common.models.note import Note
+from sapienza_common.models.note_text import NotePage, NoteTextJob
+
+BATCH_SIZE = 8
+BACKFILL_BATCH_SIZE = 1000
+# File più grandi non vengono letti (né tenuti in memoria dal worker)
+MAX_FILE_BYTES = 50 * 1024 * 1024
+# Tentativi per un documento che supera il tempo limite, poi il job è chiuso con l'errore
+MAX_ATTEMPTS = 3
+MAX_BACKOFF_MINUTES = 60
+
+
+def enqueue(db, note_id: int):
+    """ Queue the text extraction of a note (in the caller's transaction). """
+    db.execute(pg_insert(NoteTextJob).values(note_id=note_id).on_conflict_do_nothing())
+
+
+def backfill(db, batch_size: int = BACKFILL_BATCH_SIZE, after_id: int = 0):
+    """
+    Enqueue every note without a job, ``batch_size`` at a time in id order, committing
+    each batch. Yields ``(last_note_id, enqueued)`` after each batch; an interrupted run
+    can be started again (from the beginning or from ``after_id``) at no cost.
+    """
+    while True:
+        note_ids = db.scalars(
+            select(Note.id)
+            .where(Note.id > after_id, ~select(NoteTextJob.note_id).where(NoteTextJob.note_id == Note.id).exists())
+            .order_by(Note.id)
+            .limit(batch_size)
+        ).all()
+        if not note_ids:
+            db.rollback()
+            return
+        enqueued = db.scalars(
+            pg_insert(NoteTextJob)
+            .values([{"note_id": note_id} for note_id in note_ids])
+            .on_conflict_do_nothing()
+            .returning(NoteTextJob.note_id)
+        ).all()
+        db.commit()
+        after_id = note_ids[-1]
+        yield after_id, len(enqueued)
+
+
+def _extracted_twin(db, note_id: int, sha256: str):
+    """ Another note with the same file whose text has already been extracted, if any. """
+    if not sha256:
+        return None
+    return db.scalar(
+        select(NoteTextJob.note_id)
+        .join(Note, Note.id == NoteTextJob.note_id)
+        .where(Note.sha256 == sha256, Note.id != note_id, NoteTextJob.extracted_at.is_not(None), NoteTextJob.last_error.is_(None))
+        .limit(1)
+        .execution_options(include_deleted=True)
+    )
+
+
+def _postpone(db, note_ids: list, error: str):
+    if not note_ids:
+        return
+    backoff = func.least(func.power(2, NoteTextJob.attempts), MAX_BACKOFF_MINUTES) * literal_column("interval '1 minute'")
+    db.execute(
+        update(NoteTextJob)
+        .where(NoteTextJob.note_id.in_(note_ids))
+        .values(attempts=NoteTextJob.attempts + 1, available_at=func.now() + backoff, last_error=error[:500])
+    )
+
+
+def _finish(db, note_id: int, pages: list, error: str = None):
+    # Un job rimesso in coda (es. per rileggere i file con un estrattore migliore) sostituisce le pagine
+    db.execute(delete(NotePage).where(NotePage.note_id == note_id))
+    if pages:
+        db.execute(insert(NotePage), [{"note_id": note_id, "page": number, "content": text} for number, text in pages])
+    db.execute(
+        update(NoteTextJob)
+        .where(NoteTextJob.note_id == note_id)
+        .values(extracted_at=func.now(), pages=len(pages), last_error=error)
+    )
+
+
+def process_batch(db, pool, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Extract the text of up to ``batch_size`` queued notes with ``pool`` (an
+    ``ExtractionPool``). Jobs are locked with ``SKIP LOCKED``, so several workers can
+    run side by side. Returns the number of jobs claimed, notes extracted, pages
+    written, files that could not be read and documents that timed out.
+    """
+    jobs = db.execute(
+        select(NoteTextJob.note_id, NoteTextJob.attempts, Note.file_id, Note.sha256, Note.deleted_at)
+        .join(Note, Note.id == NoteTextJob.note_id)
+        .where(NoteTextJob.extracted_at.is_(None), NoteTextJob.available_at <= func.now())
+        .order_by(NoteTextJob.note_id.desc())
+        .limit(batch_size)
+        .with_for_update(of=NoteTextJob, skip_locked=True)
+        .execution_options(include_deleted=True)
+    ).all()
+    result = {"jobs": len(jobs), "extracted": 0, "pages": 0, "failed": 0, "timed_out": 0}
+    if not jobs:
+        db.rollback()
+        return result
+
+    documents = {}
+    try:
+        for job in jobs:
+            if job.deleted_at is not None:
+                _finish(db, job.note_id, [])  # Appunto eliminato nel frattempo: niente da indicizzare
+                continue
+            twin = _extracted_twin(db, job.note_id, job.sha256)
+            if twin is not None:
+                pages = db.execute(select(NotePage.page, NotePage.content).where(NotePage.note_id == twin)).all()
+                _finish(db, job.note_id, [tuple(page) for page in pages])
+                result["extracted"] += 1
+                result["pages"] += len(pages)
+                continue
+            try:
+                documents[job.note_id] = read_blob(job.file_id, MAX_FILE_BYTES)
+            except (NoFile, InvalidId, BlobTooLarge) as exc:
+                _finish(db, job.note_id, [], f"{type(exc).__name__}: {exc}"[:500])
+                result["failed"] += 1
+    except PyMongoError as exc:
+        db.rollback()
+        _postpone(db, [job.note_id for job in jobs], str(exc))
+        db.commit()
+        raise
+
+    extracted = pool.extract(documents)
+    for note_id, (pages, error) in extracted.items():
+        _finish(db, note_id, pages, error)
+        result["extracted" if error is None else "failed"] += 1
+        result["pages"] += len(pages)
+
+    # Documenti che non hanno finito in tempo (o hanno fatto cadere il processo)
+    attempts = {job.note_id: job.attempts for job in jobs}
+    timed_out = [note_id for note_id in documents if note_id not in extracted]
+    for note_id in timed_out:
+        if attempts[note_id] + 1 >= MAX_ATTEMPTS:
+            _finish(db, note_id, [], f"timed out {MAX_ATTEMPTS} times")
+    _postpone(db, [note_id for note_id in timed_out if attempts[note_id] + 1 < MAX_ATTEMPTS], "timed out")
+    result["timed_out"] = len(timed_out)
+
+    db.commit()
+    return result
+
+
+def queue_stats(db) -> dict:
+    """ Pending jobs, age of the oldest one and totals of the extracted notes, for monitoring. """
+    pending = NoteTextJob.extracted_at.is_(None)
+    oldest_age = func.extract("epoch", func.now() - func.min(NoteTextJob.enqueued_at).filter(pending))
+    depth, age, retrying, extracted, failed, pages = db.execute(
+        select(
+            func.count().filter(pending),
+            oldest_age,
+            func.count().filter(pending, NoteTextJob.attempts > 0),
+            func.count().filter(~pending),
+            func.count().filter(~pending, NoteTextJob.last_error.is_not(None)),
+            func.coalesce(func.sum(NoteTextJob.pages), 0),
+        )
+    ).one()
+    return {
+        "depth": depth, "oldest_age_seconds": float(age or 0), "retrying": retrying,
+        "extracted": extracted, "failed": failed, "pages": pages,
+    }
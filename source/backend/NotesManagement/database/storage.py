@@ -0,0 +1,202 @@
+import calendar
+import hashlib
+import re
+from collections import Counter
+from email.utils import formatdate
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+from database.mongo import db, async_db, bucket, fs
+
+# Dimensione dei blocchi letti dall'upload (uguale al chunk di default di GridFS)
+UPLOAD_CHUNK_SIZE = 255 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """ Raised when a Range header cannot be served for the given file length. """
+
+
+class BlobTooLarge(Exception):
+    """ Raised by ``read_blob`` when the file is bigger than the requested limit. """
+
+
+def parse_range(header: str, length: int):
+    """
+    Parse a single-range ``Range`` header into an inclusive ``(start, end)`` tuple.
+    Returns ``None`` when the header should be ignored (malformed or multi-range),
+    in which case the whole file is sent with a 200.
+    """
+    if not header:
+        return None
+
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if not start:
+        # Suffix range: gli ultimi N byte del file
+        suffix = int(end)
+        if suffix == 0:
+            raise RangeNotSatisfiable()
+        return max(length - suffix, 0), length - 1
+
+    start = int(start)
+    end = int(end) if end else length - 1
+    if start >= length or start > end:
+        raise RangeNotSatisfiable()
+    return start, min(end, length - 1)
+
+
+def file_etag(grid_out) -> str:
+    """ Strong ETag for a GridFS file: blobs are immutable, so the ObjectId identifies the content. """
+    return f'"{grid_out._id}"'
+
+
+def file_last_modified(grid_out) -> str:
+    """ ``Last-Modified`` value (IMF-fixdate) from the GridFS upload date. """
+    return formatdate(calendar.timegm(grid_out.upload_date.utctimetuple()), usegmt=True)
+
+
+def iter_file(grid_out, start: int, end: int):
+    """
+    Yield the bytes ``start..end`` (inclusive) of a GridFS file one chunk at a time,
+    so at most a single chunk is held in memory per download.
+    """
+    grid_out.seek(start)
+    remaining = end - start + 1
+    try:
+        while remaining > 0:
+            chunk = grid_out.readchunk()
+            if not chunk:
+                break
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        grid_out.close()
+
+
+def read_blob(file_id, max_bytes: int):
+    """
+    Whole content of a GridFS file with its content type and name, as
+    ``(content, content_type, filename)``. Raises ``BlobTooLarge`` past ``max_bytes``,
+    ``NoFile``/``InvalidId`` if there is no such file.
+    """
+    grid_out = fs.get(ObjectId(file_id))
+    try:
+        if grid_out.length > max_bytes:
+            raise BlobTooLarge(f"file of {grid_out.length} bytes, limit {max_bytes}")
+        return grid_out.read(), grid_out.content_type, grid_out.filename
+    finally:
+        grid_out.close()
+
+
+async def _hash_upload(upload):
+    """ Hash the (already spooled) upload without keeping it in memory, then rewind it. """
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    await upload.seek(0)
+    return digest.hexdigest(), size
+
+
+async def store_upload(upload):
+    """
+    Store an ``UploadFile`` in content-addressed GridFS and return ``(file_id, size, sha256)``.
+
+    Blobs are keyed by SHA-256 and carry a ``refcount`` of the notes pointing at them:
+    if an identical blob already exists its counter is bumped and it is reused without
+    writing anything. Otherwise the file is streamed into GridFS chunk by chunk; if the
+    write fails (or the request is cancelled) the partial chunks are removed.
+    """
+    sha256, size = await _hash_upload(upload)
+
+    existing = await async_db.fs.files.find_one_and_update(
+        {"sha256": sha256, "refcount": {"$gt": 0}},
+        {"$inc": {"refcount": 1}},
+    )
+    if existing:
+        return existing["_id"], existing["length"], sha256
+
+    grid_in = bucket.open_upload_stream(upload.filename)
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            await grid_in.write(chunk)
+
+        await grid_in.set("contentType", upload.content_type)
+        await grid_in.set("sha256", sha256)
+        await grid_in.set("refcount", 1)
+        await grid_in.close()
+    except BaseException:
+        await grid_in.abort()
+        raise
+
+    return grid_in._id, size, sha256
+
+
+async def release_blob_async(file_id):
+    """
+    Drop the reference taken by a failed upload and delete the blob if it was the only one.
+    Blobs of deleted notes go through the GC queue instead (see ``database/blob_gc.py``).
+    """
+    file_id = ObjectId(file_id)
+    doc = await async_db.fs.files.find_one_and_update(
+        {"_id": file_id}, {"$inc": {"refcount": -1}}, return_document=ReturnDocument.AFTER
+    )
+    if doc is None or doc["refcount"] > 0:
+        return False
+
+    deleted = await async_db.fs.files.delete_one({"_id": file_id, "refcount": {"$lte": 0}})
+    if deleted.deleted_count:
+        await async_db.fs.chunks.delete_many({"files_id": file_id})
+        return True
+    return False
+
+
+def release_blobs(file_ids):
+    """
+    Drop one reference per occurrence of each id (a blob shared by two deleted notes is
+    released twice) and delete the blobs no note points at any more, with one bulk
+    write and one ``delete_many`` per collection whatever the number of ids.
+    Blobs stored before deduplication have no counter and go on their first release.
+    Returns ``(blobs_removed, bytes_freed)``.
+    """
+    counts = Counter(ObjectId(file_id) for file_id in file_ids)
+    if not counts:
+        return 0, 0
+
+    db.fs.files.bulk_write(
+        [UpdateOne({"_id": file_id}, {"$inc": {"refcount": -count}}) for file_id, count in counts.items()],
+        ordered=False,
+    )
+    # Un blob con refcount <= 0 non viene più riusato dagli upload (store_upload cerca refcount > 0)
+    dead = list(db.fs.files.find({"_id": {"$in": list(counts)}, "refcount": {"$lte": 0}}, {"length": 1}))
+    if not dead:
+        return 0, 0
+
+    dead_ids = [doc["_id"] for doc in dead]
+    db.fs.files.delete_many({"_id": {"$in": dead_ids}})
+    db.fs.chunks.delete_many({"files_id": {"$in": dead_ids}})
+    return len(dead), sum(doc.get("length", 0) for doc in dead)
+
+
+def ensure_indexes():
+    """ Index used to look blobs up by content hash, and expiry of the GC idempotency keys. """
+    db.fs.files.create_index("sha256")
+    db.blob_gc_applied.create_index("applied_at", expireAfterSeconds=7 * 24 * 3600)
@@ -1,11 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database.database import engine, Base, get_db
+from sapienza_common.database import DB_ASYNC, SessionLocal
+from sapienza_common.health import router as health_router, readiness_check
+from sapienza_common.metrics import router as metrics_router
+from database.blob_gc import queue_stats
+from database.note_text import queue_stats as text_queue_stats
 from routes.notes import router as note_router
-from models.note import Note
-from models.user import User
-from models.course import Course
-from models.teacher import Teacher
+from routes.notes_async import router as note_async_router
+from database.storage import ensure_indexes
+from database.mongo import client as mongo_client
+from pymongo.errors import PyMongoError
+import pymongo
+import threading
+import time
 
 app = FastAPI()
 # Aggiungi il middleware CORS alla tua app FastAPI
@@ -20,9 +27,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Indici Mongo creati in background: l'avvio non aspetta Mongo, /ready sì
+mongo_indexes_ready = threading.Event()
+
+def create_mongo_indexes():
+    while not mongo_indexes_ready.is_set():
+        try:
+            ensure_indexes()
+            mongo_indexes_ready.set()
+        except PyMongoError as exc:
+            print(f"MongoDB indexes not created yet, retrying: {exc}")
+            time.sleep(5)
+
+@app.on_event("startup")
+def start_mongo_indexes():
+    threading.Thread(target=create_mongo_indexes, name="mongo-indexes", daemon=True).start()
+
+@readiness_check("mongodb")
+def mongo_ready():
+    if not mongo_indexes_ready.is_set():
+        raise RuntimeError("indexes not created yet")
+    # Timeout breve: la sonda non deve aspettare i 30 s di server selection di pymongo
+    with pymongo.timeout(2):
+        mongo_client.admin.command("ping")
+
 # Inclusione delle route specifiche per la gestione degli appunti
+if DB_ASYNC:
+    app.include_router(note_async_router, prefix="/notes")
 app.include_router(note_router, prefix="/notes")
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 @app.get("/")
 def root():
     return {"message": "Notes Management Microservice is running!"}
+
+@app.get("/metrics/blob-gc")
+def blob_gc_metrics():
+    db = SessionLocal()
+    try:
+        return queue_stats(db)
+    finally:
+        db.close()
+
+@app.get("/metrics/text-extraction")
+def text_extraction_metrics():
+    db = SessionLocal()
+    try:
+        return text_queue_stats(db)
+    finally:
+        db.close()
@@ -1,38 +1,40 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form
-from sqlalchemy import text
-from typing import List
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form, Request, Response, Query
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional
+from collections import defaultdict
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
-from database.database import get_db
+from sapienza_common.database import get_db, remove
 from database.mongo import fs
-from models.note import Note
-from models.course import Course
-from models.note_ratings import NoteRating
-from models.user import User
-from models.report import Report
-from schemas.note import NoteCreate, NoteResponse
+from database.note_text import enqueue as enqueue_text_extraction
+from database.storage import (
+    RangeNotSatisfiable, parse_range, iter_file, file_etag, file_last_modified,
+    store_upload, release_blob_async,
+)
+from sapienza_common.models.note import Note
+from sapienza_common.models.course import Course
+from sapienza_common.models.note_ratings import NoteRating
+from sapienza_common.models.user import User
+from sapienza_common.models.report import Report
+from sapienza_common.models.stats import NoteStats, CourseStats
+from sapienza_common.stats import create_note_stats, note_rating_changed, refresh_stats
+from schemas.note import NoteCreate, NoteResponse, NoteWithDetailsResponse
 from schemas.rating import NoteRatingCreate, NoteRatingUpdate, NoteRatingResponse
 from schemas.report import ReportCreate, ReportResponse
-from auth.auth import get_current_user
+from sapienza_common.auth import get_current_user, get_current_principal, Principal
 from bson.objectid import ObjectId
-from io import BytesIO
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
 
 router = APIRouter()
 
 
-def reset_sequence(db, table_name, column_name):
-    """ Reset the sequence to the next available ID, avoiding conflicts. """
-    db.execute(text(f"""
-        SELECT setval(pg_get_serial_sequence('{table_name}', '{column_name}'), 
-                      COALESCE((SELECT MAX({column_name}) FROM {table_name}) + 1, 1), false)
-    """))
-    db.commit()
-
-
 # 🔍 **1. Ottenere gli appunti per un corso**
 @router.get("/{course_id}", response_model=list[NoteResponse])
-def get_notes(course_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_notes(course_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
     # **Controllo se il corso esiste**
     course = db.query(Course).filter(Course.id == course_id).first()
     if not course:
@@ -41,42 +43,131 @@ def get_notes(course_id: int, db: Session = Depends(get_db), current_user=Depend
     notes = db.query(Note).filter(Note.course_id == course_id).all()
     return notes
 
-# 📤 **2. Caricare un nuovo appunto**
-@router.post("/", response_model=NoteResponse)
-def upload_note(
-    course_id: int = Form(...),
-    description: str = Form(...),
-    file: UploadFile = File(...),
+# 🔍 **1b. Appunti di un corso con media, numero e lista delle valutazioni**
+@router.get("/{course_id}/details", response_model=list[NoteWithDetailsResponse])
+def get_notes_with_details(
+    course_id: int,
+    ratings_limit: Optional[int] = Query(None, ge=0),
+    ratings_offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_principal)
 ):
-    # **Verifica che il corso esista**
+    """
+    Return every note of a course with its average rating, rating count and ratings
+    in a fixed number of queries (stored aggregates + one batched IN-load), instead of two
+    extra requests per note. ``ratings_limit``/``ratings_offset`` page the ratings
+    embedded in each note (newest first).
+    """
+    course = db.query(Course).filter(Course.id == course_id).first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found.")
+
+    rows = (
+        db.query(Note, NoteStats.average_rating, NoteStats.ratings_count)
+        .outerjoin(NoteStats, NoteStats.note_id == Note.id)
+        .filter(Note.course_id == course_id)
+        .order_by(Note.id)
+        .all()
+    )
+
+    note_ids = [note.id for note, _, _ in rows]
+    ratings_by_note = defaultdict(list)
+    if note_ids and ratings_limit != 0:
+        position = func.row_number().over(
+            partition_by=NoteRating.note_id,
+            order_by=(NoteRating.created_at.desc(), NoteRating.id.desc()),
+        ).label("position")
+        ranked = (
+            db.query(NoteRating.id.label("id"), position)
+            .filter(NoteRating.note_id.in_(note_ids))
+            .subquery()
+        )
+        ratings_query = (
+            db.query(NoteRating)
+            .join(ranked, ranked.c.id == NoteRating.id)
+            .filter(ranked.c.position > ratings_offset)
+        )
+        if ratings_limit is not None:
+            ratings_query = ratings_query.filter(ranked.c.position <= ratings_offset + ratings_limit)
+
+        for rating in ratings_query.order_by(NoteRating.note_id, ranked.c.position):
+            ratings_by_note[rating.note_id].append(rating)
+
+    return [
+        {
+            "id": note.id,
+            "course_id": note.course_id,
+            "student_id": note.student_id,
+            "file_id": note.file_id,
+            "size": note.size,
+            "sha256": note.sha256,
+            "description": note.description,
+            "created_at": note.created_at,
+            "average_rating": round(average_rating or 0, 2),
+            "ratings_count": ratings_count or 0,
+            "ratings": ratings_by_note[note.id],
+        }
+        for note, average_rating, ratings_count in rows
+    ]
+
+
+def _check_upload_allowed(db: Session, course_id: int, current_user) -> int:
+    """ Validate the target course and release the DB connection before the (long) file transfer. """
     course = db.query(Course).filter(Course.id == course_id).first()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found.")
 
-    # **Verifica che l'utente appartenga alla facoltà del corso**
     if course.faculty_id != current_user.faculty_id:
         raise HTTPException(status_code=403, detail="You are not authorized to upload notes for this course.")
 
-    # **Salva il file in GridFS**
-    file_id = fs.put(file.file, filename=file.filename, content_type=file.content_type)
+    student_id = current_user.id
+    db.rollback()  # Chiude la transazione: la connessione torna al pool durante l'upload
+    return student_id
 
-    # **Salva i metadati dell'appunto in PostgreSQL**
-    new_note = Note(
-        course_id=course_id,
-        student_id=current_user.id,
-        file_id=str(file_id),
-        description=description
-    )
 
+def _create_note(db: Session, **fields) -> Note:
+    new_note = Note(**fields)
     db.add(new_note)
+    db.flush()
+    create_note_stats(db, new_note)
+    enqueue_text_extraction(db, new_note.id)  # Il testo del file viene estratto in background (commands/extract_text.py)
     db.commit()
     db.refresh(new_note)
-
     return new_note
 
 
+# 📤 **2. Caricare un nuovo appunto**
+@router.post("/", response_model=NoteResponse)
+async def upload_note(
+    course_id: int = Form(...),
+    description: str = Form(...),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    # **Verifica corso e facoltà dell'utente**
+    student_id = await run_in_threadpool(_check_upload_allowed, db, course_id, current_user)
+
+    # **Salva il file in GridFS (riusando il blob se il contenuto è già presente)**
+    file_id, size, sha256 = await store_upload(file)
+
+    # **Salva i metadati dell'appunto in PostgreSQL solo a upload completato**
+    try:
+        return await run_in_threadpool(
+            _create_note,
+            db,
+            course_id=course_id,
+            student_id=student_id,
+            file_id=str(file_id),
+            description=description,
+            size=size,
+            sha256=sha256,
+        )
+    except BaseException:
+        await release_blob_async(file_id)
+        raise
+
+
 # 📝 **3. Modificare un appunto**
 @router.put("/{note_id}")
 def update_note(note_id: int, description: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
@@ -100,23 +191,20 @@ def delete_note(note_id: int, db: Session = Depends(get_db), current_user=Depend
     if note.student_id != current_user.id:
         raise HTTPException(status_code=403, detail="You are not authorized to delete this note.")
 
-    # **Elimina il file da GridFS (MongoDB)**
-    try:
-        fs.delete(ObjectId(note.file_id))  # Cancella il file associato all'appunto
-    except Exception:
-        pass  # Se il file non esiste, ignora l'errore
-
     # **Elimina il record dell'appunto dal database PostgreSQL**
-    db.delete(note)
+    course_id = note.course_id
+    remove(db, note)
+    db.flush()
+    refresh_stats(db, course_ids=[course_id])  # Le valutazioni dell'appunto spariscono con lui
     db.commit()
 
-    reset_sequence(db, "notes", "id")
-    
+    # Il file in GridFS viene rilasciato in background dal worker di GC (commands/blob_gc.py):
+    # il DELETE lo ha già accodato in blob_gc_queue
     return {"message": "Note and associated file deleted successfully."}
 
 # 📥 **5. Scaricare un appunto (Download)**
 @router.get("/download/{note_id}")
-def download_note(note_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def download_note(note_id: int, request: Request, db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
     note = db.query(Note).filter(Note.id == note_id).first()
     if not note:
         raise HTTPException(status_code=404, detail="Note not found.")
@@ -124,16 +212,46 @@ def download_note(note_id: int, db: Session = Depends(get_db), current_user=Depe
     if note.course.faculty_id != current_user.faculty_id:
         raise HTTPException(status_code=403, detail="You are not authorized to download notes for this course.")
 
-    file = fs.get(ObjectId(note.file_id))
-    if not file:
+    try:
+        file = fs.get(ObjectId(note.file_id))
+    except (NoFile, InvalidId):
         raise HTTPException(status_code=404, detail="File not found in storage.")
 
-    response = StreamingResponse(BytesIO(file.read()), media_type=file.content_type)
-    # Rimuove eventuali header duplicati e imposta solo uno.
-    if "Content-Disposition" in response.headers:
-        del response.headers["Content-Disposition"]
-    response.headers["Content-Disposition"] = f'attachment; filename="{file.filename}"'
-    return response
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": file_etag(file),
+        "Last-Modified": file_last_modified(file),
+        "Content-Disposition": f'attachment; filename="{file.filename}"',
+    }
+
+    # **Il client ha già la versione corrente del file**
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        file.close()
+        return Response(status_code=304, headers=headers)
+
+    # **Richiesta parziale (download riprendibili)**
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range in (headers["ETag"], headers["Last-Modified"]):
+        try:
+            byte_range = parse_range(request.headers.get("range"), file.length)
+        except RangeNotSatisfiable:
+            file.close()
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{file.length}"})
+
+    start, end = byte_range or (0, file.length - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    status_code = 200
+    if byte_range:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{file.length}"
+
+    return StreamingResponse(
+        iter_file(file, start, end),
+        status_code=status_code,
+        media_type=file.content_type or "application/octet-stream",
+        headers=headers,
+    )
 
 
 # ⭐ **6. Aggiungere una valutazione a una nota**
@@ -153,21 +271,27 @@ def add_rating(
     if current_user.faculty_id != note.course.faculty_id:
         raise HTTPException(status_code=403, detail="You can only rate notes from your faculty's courses.")
 
-    existing_rating = db.query(NoteRating).filter(
-        NoteRating.note_id == rating_data.note_id,
-        NoteRating.student_id == current_user.id
-    ).first()
-    if existing_rating:
-        raise HTTPException(status_code=400, detail="You have already rated this note.")
-
-    new_rating = NoteRating(
-        note_id=rating_data.note_id,
-        student_id=current_user.id,
-        rating=rating_data.rating,
-        comment=rating_data.comment
+    # Inserimento atomico: l'indice unico (note_id, student_id) scarta il secondo voto,
+    # anche se due richieste dello stesso studente arrivano insieme
+    new_rating = db.scalar(
+        insert(NoteRating)
+        .values(
+            note_id=rating_data.note_id,
+            student_id=current_user.id,
+            rating=rating_data.rating,
+            comment=rating_data.comment
+        )
+        .on_conflict_do_nothing(
+            index_elements=[NoteRating.note_id, NoteRating.student_id],
+            index_where=NoteRating.deleted_at.is_(None),
+        )
+        .returning(NoteRating)
     )
+    if new_rating is None:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="You have already rated this note.")
 
-    db.add(new_rating)
+    note_rating_changed(db, note, new=new_rating.rating)
     db.commit()
     db.refresh(new_rating)
 
@@ -181,14 +305,16 @@ def update_rating(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
+    # Bloccata: i delta sugli aggregati partono dal voto che stiamo davvero sostituendo
     rating = db.query(NoteRating).filter(
         NoteRating.id == rating_id,
         NoteRating.student_id == current_user.id
-    ).first()
+    ).with_for_update().first()
 
     if not rating:
         raise HTTPException(status_code=404, detail="Rating not found or unauthorized.")
 
+    note_rating_changed(db, rating.note, old=rating.rating, new=rating_data.rating)
     rating.rating = rating_data.rating
     rating.comment = rating_data.comment
     db.commit()
@@ -203,72 +329,70 @@ def delete_rating(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
+    # Bloccata: i delta sugli aggregati partono dal voto che stiamo davvero togliendo
     rating = db.query(NoteRating).filter(
         NoteRating.id == rating_id,
         NoteRating.student_id == current_user.id
-    ).first()
+    ).with_for_update().first()
 
     if not rating:
         raise HTTPException(status_code=404, detail="Rating not found or unauthorized.")
 
-    db.delete(rating)
+    if remove(db, rating):
+        note_rating_changed(db, rating.note, old=rating.rating)
     db.commit()
 
-    reset_sequence(db, "note_ratings", "id")
-
     return {"message": "Rating deleted successfully."}
 
 # 📊 **9. Ottenere la valutazione media degli appunti di un corso**
 @router.get("/{course_id}/average-rating")
 def get_course_notes_average(course_id: int, db: Session = Depends(get_db)):
-    avg_rating = (
-        db.query(func.coalesce(func.avg(NoteRating.rating), 0))
-        .join(Note, NoteRating.note_id == Note.id)
-        .filter(Note.course_id == course_id)
-        .scalar()
-    )
+    stats = db.get(CourseStats, course_id)
+    avg_rating = stats.note_ratings_sum / stats.note_ratings_count if stats and stats.note_ratings_count else 0
 
     return {"course_id": course_id, "average_rating": round(avg_rating, 2)}
 
-# 📑 **10. Ottenere la lista ordinata degli appunti di un corso**
-@router.get("/{course_id}/notes-sorted", response_model=list[NoteResponse])
-def get_sorted_notes(course_id: int, order: str = "desc", db: Session = Depends(get_db)):
-    notes_query = (
-        db.query(
-            Note,
-            func.coalesce(func.avg(NoteRating.rating), -1).label("average_rating")
-        )
-        .outerjoin(NoteRating, Note.id == NoteRating.note_id)
-        .filter(Note.course_id == course_id)
-        .group_by(Note.id)
+def sorted_notes_statement(course_id: int, order: str = "desc"):
+    """
+    Notes of a course ordered by their stored average rating (shared by the sync and async
+    routes). Unrated notes come last in descending order and first in ascending order,
+    which is the order of the ``(course_id, average_rating)`` index.
+    """
+    average_rating = NoteStats.average_rating
+    ordering = average_rating.asc().nullsfirst() if order.lower() == "asc" else average_rating.desc().nullslast()
+    return (
+        select(Note, average_rating)
+        .join(NoteStats, NoteStats.note_id == Note.id)
+        .where(NoteStats.course_id == course_id)
+        .order_by(ordering, Note.created_at.desc())
     )
 
-    if order.lower() == "asc":
-        notes_query = notes_query.order_by(func.coalesce(func.avg(NoteRating.rating), -1).asc(), Note.created_at.desc())
-    else:
-        notes_query = notes_query.order_by(func.coalesce(func.avg(NoteRating.rating), -1).desc(), Note.created_at.desc())
-
-    notes = notes_query.all()
-
-    result = [
+def sorted_notes_result(rows):
+    return [
         {
             "id": note.id,
             "course_id": note.course_id,
             "student_id": note.student_id,
             "file_id": note.file_id,
+            "size": note.size,
+            "sha256": note.sha256,
             "description": note.description,
             "created_at": note.created_at,
-            "average_rating": round(average_rating, 2) if average_rating != -1 else None
+            "average_rating": round(average_rating, 2) if average_rating is not None else None
         }
-        for note, average_rating in notes
+        for note, average_rating in rows
     ]
 
-    return result
+# 📑 **10. Ottenere la lista ordinata degli appunti di un corso**
+@router.get("/{course_id}/notes-sorted", response_model=list[NoteResponse])
+def get_sorted_notes(course_id: int, order: str = "desc", db: Session = Depends(get_db)):
+    rows = db.execute(sorted_notes_statement(course_id, order)).all()
+    return sorted_notes_result(rows)
 
 @router.get("/usr/my-notes", response_model=list[NoteResponse])
 def get_my_notes(
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_principal)
 ):
     # **Recupera tutti gli appunti creati dall'utente autenticato**
     user_notes = db.query(Note).filter(Note.student_id == current_user.id).all()
@@ -281,7 +405,7 @@ def get_my_notes(
 @router.get("/usr/my-reviews", response_model=list[NoteRatingResponse])
 def get_my_reviews(
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_principal)
 ):
     # **Recupera tutte le recensioni fatte dall'utente autenticato**
     user_reviews = db.query(NoteRating).filter(NoteRating.student_id == current_user.id).all()
@@ -300,7 +424,8 @@ def get_note_reviews(note_id: int, db: Session = Depends(get_db)):
 # ⭐ **8. Ottenere la media delle recensioni di un singolo appunto**
 @router.get("/notes/{note_id}/average-rating")
 def get_note_average_rating(note_id: int, db: Session = Depends(get_db)):
-    avg_rating = db.query(func.coalesce(func.avg(NoteRating.rating), 0)).filter(NoteRating.note_id == note_id).scalar()
+    stats = db.get(NoteStats, note_id)
+    avg_rating = stats.average_rating if stats and stats.average_rating is not None else 0
     return {"note_id": note_id, "average_rating": round(avg_rating, 2)}
 
 # 📑 **9. Ordinare le recensioni di un singolo appunto**
@@ -335,7 +460,7 @@ def create_report(report: ReportCreate, db: Session = Depends(get_db), current_u
 
 
 @router.get("/reports", response_model=List[ReportResponse])
-def get_all_reports(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_all_reports(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Only admins can view reports.")
 
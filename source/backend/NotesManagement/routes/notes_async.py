@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sapienza_common.database import get_async_db
+from sapienza_common.models.note import Note
+from sapienza_common.models.course import Course
+from schemas.note import NoteResponse
+from sapienza_common.auth import get_current_principal
+from routes.notes import sorted_notes_statement, sorted_notes_result
+
+# Versioni asincrone (asyncpg) delle route di lettura più usate.
+# Incluse prima del router sincrono solo se DB_ASYNC è attivo: a parità di path vincono queste.
+router = APIRouter()
+
+
+# 🔍 **1. Ottenere gli appunti per un corso**
+@router.get("/{course_id}", response_model=list[NoteResponse])
+async def get_notes(course_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_principal)):
+    course = await db.get(Course, course_id)
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found.")
+
+    notes = await db.scalars(select(Note).where(Note.course_id == course_id))
+    return notes.all()
+
+# 📑 **10. Ottenere la lista ordinata degli appunti di un corso**
+@router.get("/{course_id}/notes-sorted", response_model=list[NoteResponse])
+async def get_sorted_notes(course_id: int, order: str = "desc", db: AsyncSession = Depends(get_async_db)):
+    rows = (await db.execute(sorted_notes_statement(course_id, order))).all()
+    return sorted_notes_result(rows)
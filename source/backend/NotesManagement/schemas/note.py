@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
+from schemas.rating import NoteRatingResponse
 
 class NoteBase(BaseModel):
     course_id: int
@@ -14,7 +15,14 @@ class NoteResponse(NoteBase):
     course_id : int
     student_id: int
     file_id: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+class NoteWithDetailsResponse(NoteResponse):
+    average_rating: float
+    ratings_count: int
+    ratings: List[NoteRatingResponse] = []
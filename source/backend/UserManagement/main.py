@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.security import HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
+from sapienza_common.health import router as health_router
+from sapienza_common.metrics import router as metrics_router
+from sapienza_common.passwords import pool_stats as password_pool_stats, start_pool, stop_pool
 from routes.user import router as user_router
 
 
@@ -27,11 +30,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pool di processi per bcrypt: avviato subito, così il primo login non attende lo spawn dei worker
+@app.on_event("startup")
+def start_password_pool():
+    start_pool()
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    stop_pool()
+
+@app.get("/metrics/password-pool")
+def password_pool_metrics():
+    return password_pool_stats()
+
 # Inclusione delle route
 app.include_router(user_router, prefix="/users")
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 @app.get("/")
 def root():
     return {"message": "User Microservice is running!"}
-
-
@@ -1,17 +0,0 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship
-from database.database import Base
-
-class Course(Base):
-    __tablename__ = "courses"
-
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True, index=True, nullable=False)
-    faculty_id = Column(Integer, ForeignKey("faculties.id"), nullable=False)
-    teacher_id = Column(Integer, ForeignKey("teachers.id", ondelete="SET NULL"), nullable=True)
-
-    faculty = relationship("Faculty", back_populates="courses")
-    teacher = relationship("Teacher", back_populates="courses")
-
-    notes = relationship("Note", back_populates="course", cascade="all, delete-orphan")
-    reviews = relationship("Review", back_populates="course", cascade="all, delete-orphan")  # Relazione con le recensioni
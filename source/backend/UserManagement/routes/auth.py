@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from database.database import get_db
-from models.user import User
+from sapienza_common.database import get_db
+from sapienza_common.models.user import User
 from schemas.user import UserCreate, UserResponse, UserLogin
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
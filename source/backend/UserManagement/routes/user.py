@@ -1,19 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import text
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, func, literal, cast, union_all, DateTime
 from sqlalchemy.orm import Session
-from database.database import get_db
-from passlib.context import CryptContext
-from models.user import User
+from sapienza_common.database import get_db
+from sapienza_common.stats import refresh_stats, stats_affected_by_user
+from sapienza_common.models.user import User
+from sapienza_common.models.course import Course
+from sapienza_common.models.note import Note
+from sapienza_common.models.note_ratings import NoteRating
+from sapienza_common.models.review import Review
 from schemas.user import UserUpdate
 from schemas.user import UpdatePasswordRequest
-from schemas.user import UserResponse
-from auth.auth import get_current_user
+from schemas.user import UserResponse, UserSummaryResponse
+from sapienza_common.auth import get_current_user, invalidate_cached_user, create_access_token, token_claims
+from sapienza_common.passwords import hash_password_async, verify_password_async
+from sapienza_common.refresh_tokens import issue_refresh_token, revoke_user_refresh_tokens
 
 router = APIRouter()
 
-# Configurazione di Passlib per l'hashing delle password
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # API per aggiornare i dettagli dell'utente (no email/password)
 @router.put("/update", response_model=UserUpdate)
 def update_user_profile(
@@ -44,42 +48,67 @@ def update_user_profile(
     
     db.commit()
     db.refresh(db_user)
+    invalidate_cached_user(db_user.email)
     
     return db_user
-def reset_sequence(db: Session, table_name: str, column_name: str):
-    """ Reset the sequence to the max ID in the table. """
-    db.execute(text(f"""
-        SELECT setval(pg_get_serial_sequence('{table_name}', '{column_name}'), 
-                      COALESCE((SELECT MAX({column_name}) FROM {table_name}) + 1, 1), false)
-    """))
-    db.commit()
 
 
+def _load_password_hash(db: Session, user_id: int) -> str:
+    db_user = db.query(User).filter(User.id == user_id).first()
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    hashed_password = db_user.hashed_password
+    db.rollback()  # Chiude la transazione: la connessione torna al pool durante l'hashing
+    return hashed_password
+
+
+def _store_password_hash(db: Session, user_id: int, old_hash: str, new_hash: str) -> tuple:
+    db_user = db.query(User).filter(User.id == user_id).with_for_update().first()
+    # La password è cambiata (richiesta concorrente) mentre si verificava quella vecchia
+    if not db_user or db_user.hashed_password != old_hash:
+        raise HTTPException(status_code=409, detail="Password changed concurrently, please retry")
+
+    db_user.hashed_password = new_hash
+    # 🔹 Invalida i token emessi con la vecchia password
+    db_user.token_version = (db_user.token_version or 0) + 1
+    # 🔹 Chiude tutte le sessioni (refresh token) e ne apre una nuova per chi ha cambiato la password
+    revoke_user_refresh_tokens(db, user_id)
+    refresh_token = issue_refresh_token(db, user_id)
+
+    db.commit()
+    db.refresh(db_user)
+    db.expunge(db_user)
+    invalidate_cached_user(db_user.email, db_user.id)
+    return db_user, refresh_token
+
 
 # API per cambiare la password di un utente
+# Async: verifica e hash bcrypt girano nel pool di processi, le query in threadpool
 @router.put("/update-password")
-def update_password(
+async def update_password(
     request: UpdatePasswordRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """ Permette all'utente autenticato di cambiare la propria password SOLO se fornisce quella vecchia. """
-    db_user = db.query(User).filter(User.id == current_user.id).first()
-
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    old_hash = await run_in_threadpool(_load_password_hash, db, current_user.id)
 
     # 🔹 Verifica che la vecchia password sia corretta
-    if not pwd_context.verify(request.old_password, db_user.hashed_password):
+    if not await verify_password_async(request.old_password, old_hash):
         raise HTTPException(status_code=400, detail="Old password is incorrect")
 
     # 🔹 Aggiorna la password con l'hash della nuova
-    db_user.hashed_password = pwd_context.hash(request.new_password)
-
-    db.commit()
-    db.refresh(db_user)
-
-    return {"message": "Password updated successfully"}
+    new_hash = await hash_password_async(request.new_password)
+    db_user, refresh_token = await run_in_threadpool(_store_password_hash, db, current_user.id, old_hash, new_hash)
+
+    # 🔹 Nuovi token per la sessione che ha cambiato la password
+    access_token = create_access_token(data=token_claims(db_user))
+    return {
+        "message": "Password updated successfully",
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
 
 @router.get("/me", response_model=UserResponse)
 def get_current_user_details(current_user: User = Depends(get_current_user)):
@@ -87,24 +116,81 @@ def get_current_user_details(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return current_user
 
+# 📊 Riepilogo per la dashboard dello studente: contatori e attività recenti in una sola richiesta
+@router.get("/me/summary", response_model=UserSummaryResponse)
+def get_current_user_summary(
+    recent: int = Query(10, ge=0, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Counts of the user's course reviews, notes and note ratings plus the ``recent`` latest
+    of those activities. Counts are three COUNT subqueries in one statement; the activity
+    feed takes the newest ``recent`` rows of each table and merges them, so the payload
+    does not grow with the user's history.
+    """
+    user_id = current_user.id
+
+    def count(model):
+        return select(func.count()).select_from(model).where(model.student_id == user_id).scalar_subquery()
+
+    counts = db.execute(select(
+        count(Review).label("course_reviews"),
+        count(Note).label("notes"),
+        count(NoteRating).label("note_ratings"),
+    )).one()
+
+    activities = []
+    if recent:
+        latest = union_all(
+            select(literal("course_review").label("type"), Review.id, Review.course_id, cast(Review.created_at, DateTime).label("created_at"))
+            .where(Review.student_id == user_id)
+            .order_by(Review.created_at.desc(), Review.id.desc())
+            .limit(recent),
+            select(literal("note").label("type"), Note.id, Note.course_id, Note.created_at)
+            .where(Note.student_id == user_id)
+            .order_by(Note.created_at.desc(), Note.id.desc())
+            .limit(recent),
+            select(literal("note_rating").label("type"), NoteRating.id, Note.course_id, NoteRating.created_at)
+            .join(Note, Note.id == NoteRating.note_id)
+            .where(NoteRating.student_id == user_id)
+            .order_by(NoteRating.created_at.desc(), NoteRating.id.desc())
+            .limit(recent),
+        ).subquery()
+        activities = db.execute(
+            select(latest, Course.name.label("course_name"))
+            .outerjoin(Course, Course.id == latest.c.course_id)
+            .order_by(latest.c.created_at.desc().nullslast())
+            .limit(recent)
+        ).mappings().all()
+
+    return {
+        "first_name": current_user.first_name,
+        "last_name": current_user.last_name,
+        "counts": counts._asdict(),
+        "recent_activity": activities,
+    }
+
 #  API per eliminare completamente un utente
 @router.delete("/delete")
 def delete_user(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """ Deletes the user and resets the sequence. """
+    """ Deletes the user. """
 
     db_user = db.query(User).filter(User.id == current_user.id).first()
     
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    email, user_id = db_user.email, db_user.id
+    note_ids, course_ids = stats_affected_by_user(db, user_id)
     db.delete(db_user)
+    db.flush()
+    refresh_stats(db, note_ids, course_ids)  # Recensioni e valutazioni dell'utente vengono eliminate con lui
     db.commit()
-    
-    # Reset sequence after deletion
-    reset_sequence(db, "users", "id")
+    invalidate_cached_user(email, user_id)
 
     return {"message": "User account deleted successfully"}
 
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Optional, List
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -43,3 +43,22 @@ class UserResponse(BaseModel):
 class UpdatePasswordRequest(BaseModel):
     old_password: str
     new_password: str
+
+# Riepilogo per la dashboard dello studente
+class UserActivityCounts(BaseModel):
+    course_reviews: int
+    notes: int
+    note_ratings: int
+
+class UserActivity(BaseModel):
+    type: str  # "course_review" | "note" | "note_rating"
+    id: int
+    course_id: int
+    course_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class UserSummaryResponse(BaseModel):
+    first_name: str
+    last_name: str
+    counts: UserActivityCounts
+    recent_activity: List[UserActivity]
@@ -0,0 +1,77 @@
+"""
+Minimal HTTP load generator used to compare service configurations.
+
+Fires ``--requests`` GET requests at ``url`` keeping ``--concurrency`` of them in
+flight and prints throughput and latency percentiles. Example, sync vs async DB
+layer of CourseManagement:
+
+    DB_ASYNC=0 uvicorn main:app --port 8003 &
+    python benchmarks/http_load.py http://localhost:8003/courses/1/reviews -c 200 -n 5000
+    # restart with DB_ASYNC=1 and run the same command again
+
+Requires ``httpx`` (not a service dependency).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run(url, concurrency, total, headers, method="GET", json_body=None):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60, headers=headers) as client:
+        async def worker():
+            nonlocal errors
+            for _ in counter:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, json=json_body)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "req_per_s": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url")
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("--token", help="Bearer token for authenticated endpoints")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    result = asyncio.run(run(args.url, args.concurrency, args.requests, headers))
+    for key, value in result.items():
+        print(f"{key:>10}: {value}")
+
+
+if __name__ == "__main__":
+    main()
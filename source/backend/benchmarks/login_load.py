@@ -0,0 +1,107 @@
+"""
+Login benchmark: throughput and latency of ``POST /auth/login`` under concurrent load,
+and what that load does to the other requests of the Auth Service.
+
+Keeps ``-c`` logins in flight (``-n`` in total) and, at the same time, polls a cheap
+endpoint (``--probe``, default ``/health``) one request at a time: its p99 shows whether
+bcrypt is starving the rest of the service. Logins refused with 503 (the password pool
+is full) are counted separately from other errors. Example, inline hashing vs pool:
+
+    PASSWORD_POOL_SIZE=0 PASSWORD_MAX_PENDING=10000 uvicorn main:app --port 8000 &
+    python benchmarks/login_load.py http://localhost:8000 -c 50 -n 500
+    # restart without PASSWORD_POOL_SIZE (one process per CPU) and run it again
+
+Uses the sample user of ``commands.init_db --seed`` unless ``--email``/``--password``
+are given. Requires ``httpx`` (not a service dependency).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from http_load import percentile
+
+
+async def logins(client, url, concurrency, total, credentials):
+    latencies = []
+    rejected = errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal rejected, errors
+        for _ in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=credentials)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response.status_code == 503:
+                rejected += 1
+            elif response.status_code != 200:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "logins": total,
+        "rejected_503": rejected,
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "logins_per_s": round(len(latencies) / elapsed, 1),
+        # Latenze dei soli login riusciti: i 503 rispondono subito e abbasserebbero i percentili
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+    }
+
+
+async def probe(client, url, stop):
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get(url)
+        except httpx.HTTPError:
+            pass
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def run(base_url, concurrency, total, credentials, probe_path):
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        stop = asyncio.Event()
+        probing = asyncio.create_task(probe(client, base_url + probe_path, stop))
+        result = await logins(client, base_url + "/auth/login", concurrency, total, credentials)
+        stop.set()
+        probe_latencies = await probing
+
+    result["probe_p50_ms"] = round(statistics.median(probe_latencies) * 1000, 1)
+    result["probe_p99_ms"] = round(percentile(probe_latencies, 99) * 1000, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base_url", help="Auth Service, e.g. http://localhost:8000")
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("-n", "--requests", type=int, default=500)
+    parser.add_argument("--email", default="user1@example.com")
+    parser.add_argument("--password", default="example")
+    parser.add_argument("--probe", default="/health", help="Cheap endpoint timed during the load (default /health)")
+    args = parser.parse_args()
+
+    credentials = {"email": args.email, "password": args.password}
+    result = asyncio.run(run(args.base_url.rstrip("/"), args.concurrency, args.requests, credentials, args.probe))
+    for key, value in result.items():
+        print(f"{key:>14}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Startup-time benchmark: how long a service takes from process start to serving.
+
+Starts ``uvicorn main:app`` in the service directory ``--runs`` times and polls
+``--path`` (the readiness probe by default) until it answers 200, then prints the
+median and worst time to ready. Example, against an initialized database:
+
+    python -m commands.init_db --seed          # once, from Authentication/
+    python benchmarks/startup_time.py CourseManagement --runs 5
+    python benchmarks/startup_time.py Authentication --workers 4
+
+The service inherits the environment (``DATABASE_URL``, ``CACHE_BACKEND``, ...).
+Requires ``httpx`` (not a service dependency).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_to_ready(service: str, port: int, path: str, workers: int, timeout: float) -> float:
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=os.path.join(BACKEND, service))
+    try:
+        with httpx.Client(timeout=1) as client:
+            while time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    raise RuntimeError(f"{service} exited with status {process.returncode}")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}{path}").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.02)
+        raise RuntimeError(f"{service} not ready after {timeout} s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("service", help="Service directory, e.g. CourseManagement")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--path", default="/ready", help="Endpoint that must answer 200 (default /ready)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers; ready once one of them answers")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    timings = [time_to_ready(args.service, args.port, args.path, args.workers, args.timeout) for _ in range(args.runs)]
+    print(
+        f"{args.service}: ready in {statistics.median(timings) * 1000:.0f} ms (median of {args.runs}), "
+        f"worst {max(timings) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
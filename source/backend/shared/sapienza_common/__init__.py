@@ -0,0 +1,13 @@
+"""
+Code shared by the Sapienza Advisor services, installed in each of them as the
+``sapienza-common`` package (``pip install ../shared``):
+
+* ``database``: engine, session factories, soft delete and pool metrics;
+* ``models``: the SQLAlchemy models, mapped on demand;
+* ``auth``: token handling and the ``get_current_user``/``get_current_principal`` dependencies;
+* ``cache``: local or Redis-backed caches and their invalidation;
+* ``stats``: maintenance of the rating aggregates;
+* ``catalog_cache``: response cache of the public catalog reads;
+* ``metrics``: the ``/metrics`` endpoints every service exposes;
+* ``health``: the ``/health`` and ``/ready`` probes.
+"""
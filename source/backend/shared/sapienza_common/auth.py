@@ -0,0 +1,150 @@
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from jose import JWTError, jwt
+from fastapi import HTTPException, Depends, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sapienza_common.database import get_db, SessionLocal
+from sapienza_common.models.user import User
+from sapienza_common.cache import user_cache, token_version_cache
+from sapienza_common.revocation import is_revoked
+
+
+SECRET_KEY = "a_very_secret_key"
+ALGORITHM = "HS256"
+# Access token brevi: la sessione prosegue con i refresh token (vedi sapienza_common.refresh_tokens)
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+
+auth_scheme = HTTPBearer()
+
+
+@dataclass(frozen=True)
+class Principal:
+    """ Identity of the caller, built from the signed token claims without touching the database. """
+    id: int
+    email: str
+    is_admin: bool
+    faculty_id: Optional[int]
+    token_version: int
+
+
+def token_claims(user) -> dict:
+    """ Claims embedded in every access token so that other services can authorize from the token alone. """
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "adm": bool(user.is_admin),
+        "fac": user.faculty_id,
+        "ver": user.token_version or 0,
+    }
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    to_encode = data.copy()
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # jti: identificativo del singolo token, per poterlo revocare al logout
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+def credentials_error(detail: str = "Could not validate credentials"):
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def decode_token(token: str, credentials_exception) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    if is_revoked(payload):
+        raise credentials_error("Token has been revoked, please log in again")
+    return payload
+
+def verify_token(token: str, credentials_exception):
+    return decode_token(token, credentials_exception)["sub"]
+
+def current_token_version(user_id: int, token_version: Optional[int] = None) -> Optional[int]:
+    """
+    Current ``token_version`` of a user (cached; ``None`` if the user no longer exists).
+    A ``token_version`` newer than the cached one means the row changed after the entry
+    was stored (the invalidation only reached the service that changed it): the row is
+    read again.
+    """
+    version = token_version_cache.get(user_id)
+    if version is not None and token_version is not None and token_version > version:
+        token_version_cache.invalidate(user_id)
+        version = None
+    if version is None:
+        db = SessionLocal()
+        try:
+            version = db.query(User.token_version).filter(User.id == user_id).scalar()
+        finally:
+            db.close()
+        if version is None:
+            return None
+        token_version_cache.set(user_id, version)
+    return version
+
+def get_current_principal(credentials: HTTPAuthorizationCredentials = Depends(auth_scheme)) -> Principal:
+    """
+    Authorize from the token claims only. Tokens minted before the claims were added
+    are rejected, as are tokens whose version is older than the user's (faculty or
+    password change): the client has to log in again.
+    """
+    payload = decode_token(credentials.credentials, credentials_error())
+    if "uid" not in payload:
+        raise credentials_error()
+
+    # Solo i token più vecchi della versione corrente sono scaduti: uno più nuovo arriva
+    # da un altro servizio che ha appena cambiato l'utente mentre qui la cache è vecchia
+    current = current_token_version(payload["uid"], payload.get("ver", 0))
+    if current is None or payload.get("ver", 0) < current:
+        raise credentials_error("Token is outdated, please log in again")
+
+    return Principal(
+        id=payload["uid"],
+        email=payload["sub"],
+        is_admin=payload.get("adm", False),
+        faculty_id=payload.get("fac"),
+        token_version=payload.get("ver", 0),
+    )
+
+def get_current_user(db: Session = Depends(get_db), credentials: HTTPAuthorizationCredentials = Depends(auth_scheme)):
+    credentials_exception = credentials_error()
+    payload = decode_token(credentials.credentials, credentials_exception)
+    email = payload["sub"]
+
+    # In cache ci sono solo i valori delle colonne, così la voce può stare anche su Redis
+    cached_user = user_cache.get(email)
+    if cached_user is not None and payload.get("ver", 0) > (cached_user["token_version"] or 0):
+        # Token emesso dopo la voce in cache (l'invalidazione ha raggiunto solo l'altro servizio)
+        user_cache.invalidate(email)
+        cached_user = None
+    if cached_user is None:
+        user = db.query(User).filter(User.email == email).first()
+        if user is None:
+            raise credentials_exception
+        cached_user = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        user_cache.set(email, cached_user)
+
+    if "ver" in payload and payload["ver"] < (cached_user["token_version"] or 0):
+        raise credentials_error("Token is outdated, please log in again")
+
+    # Istanza legata alla sessione della richiesta, senza query (load=False):
+    # le route possono modificarla e fare commit/refresh come prima
+    user = User(**cached_user)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+def invalidate_cached_user(email: str, user_id: Optional[int] = None):
+    """ Drop a user from this process' caches after a change to their row. """
+    user_cache.invalidate(email)
+    if user_id is not None:
+        token_version_cache.invalidate(user_id)
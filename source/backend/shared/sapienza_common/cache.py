@@ -0,0 +1,259 @@
+"""
+Caches shared by the services, behind one interface (``get``/``set``/``invalidate``).
+
+``CACHE_BACKEND`` selects the implementation for the whole service:
+
+* ``local`` (default): a ``TTLCache`` per process. Invalidations only reach this
+  process, the other replicas and services see a change when their entry expires.
+* ``redis``: a ``RedisCache`` shared by every replica through ``REDIS_URL`` (any server
+  speaking the Redis protocol; ``fakeredis://`` uses an in-memory stand-in for tests),
+  with a small per-process near cache. Invalidations delete the shared entry and are
+  published on ``CACHE_CHANNEL``, so every replica drops its near copy as well.
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "local").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+# Durata massima di una copia locale (near cache) di una voce condivisa su Redis
+CACHE_NEAR_TTL = float(os.getenv("CACHE_NEAR_TTL", "5"))
+CACHE_CHANNEL = "cache-invalidation"
+
+if CACHE_BACKEND == "redis":
+    from redis.exceptions import RedisError
+else:  # il client redis pesa all'avvio e serve solo con CACHE_BACKEND=redis
+    RedisError = Exception
+
+
+class TTLCache:
+    """ Thread-safe LRU cache whose entries also expire ``ttl`` seconds after being stored. """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "local",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class RedisCache:
+    """
+    Cache stored on a Redis-compatible server and shared by every replica, fronted by a
+    per-process ``TTLCache`` that keeps hot entries for at most ``CACHE_NEAR_TTL``.
+    Values are pickled, so the server must only be reachable by the services. If the
+    server is down the cache degrades to misses instead of failing the request.
+    """
+
+    def __init__(self, name: str, client, maxsize: int, ttl: float):
+        self.name = name
+        self.client = client
+        self.ttl = ttl
+        self.near = TTLCache(maxsize=maxsize, ttl=min(ttl, CACHE_NEAR_TTL))
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key) -> str:
+        return f"cache:{self.name}:{key!r}"
+
+    def get(self, key):
+        value = self.near.get(key)
+        if value is not None:
+            return value
+        try:
+            raw = self.client.get(self._key(key))
+        except RedisError:
+            self.errors += 1
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value = pickle.loads(raw)
+        self.near.set(key, value)
+        return value
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        self.near.set(key, value)
+        try:
+            self.client.set(self._key(key), pickle.dumps(value), px=int(self.ttl * 1000))
+        except RedisError:
+            self.errors += 1
+
+    def invalidate(self, key):
+        self.near.invalidate(key)
+        try:
+            self.client.delete(self._key(key))
+            self.client.publish(CACHE_CHANNEL, pickle.dumps((self.name, key)))
+        except RedisError:
+            self.errors += 1
+
+    def clear(self):
+        self.near.clear()
+        try:
+            for redis_key in self.client.scan_iter(match=f"cache:{self.name}:*"):
+                self.client.delete(redis_key)
+            self.client.publish(CACHE_CHANNEL, pickle.dumps((self.name, None)))
+        except RedisError:
+            self.errors += 1
+
+    def drop_local(self, key):
+        """ Forget the near copy after another replica invalidated the entry (``None``: all of them). """
+        if key is None:
+            self.near.clear()
+        else:
+            self.near.invalidate(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "near": self.near.stats(),
+        }
+
+
+# Cache di questo processo per nome, per applicare le invalidazioni ricevute
+caches = {}
+_redis_client = None
+_subscriber = None
+
+
+def redis_client():
+    global _redis_client
+    if _redis_client is None:
+        if REDIS_URL.startswith("fakeredis://"):
+            import fakeredis
+            _redis_client = fakeredis.FakeRedis()
+        else:
+            import redis
+            _redis_client = redis.Redis.from_url(REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+    return _redis_client
+
+
+def _on_invalidation(message):
+    name, key = pickle.loads(message["data"])
+    cache = caches.get(name)
+    if isinstance(cache, RedisCache):
+        cache.drop_local(key)
+
+
+def _subscribe():
+    """ Listen (once per process, in a daemon thread) for the invalidations of the other replicas. """
+    global _subscriber
+    if _subscriber is None:
+        pubsub = redis_client().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CACHE_CHANNEL: _on_invalidation})
+        _subscriber = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+
+def make_cache(name: str, maxsize: int, ttl: float):
+    """ The cache called ``name``, on the backend chosen with ``CACHE_BACKEND``. """
+    if CACHE_BACKEND == "redis":
+        cache = RedisCache(name, redis_client(), maxsize, ttl)
+        _subscribe()
+    else:
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    caches[name] = cache
+    return cache
+
+
+def invalidate(name: str, key):
+    """
+    Drop ``key`` from the cache called ``name``, also when this service does not use
+    that cache itself (e.g. an admin delete invalidating the course ratings): with the
+    Redis backend the shared entry goes and every replica is notified.
+    """
+    cache = caches.get(name)
+    if cache is not None:
+        cache.invalidate(key)
+    elif CACHE_BACKEND == "redis":
+        RedisCache(name, redis_client(), 0, 0).invalidate(key)
+
+
+def invalidate_after_commit(db, name: str, key):
+    """
+    Invalidate once ``db`` commits: invalidating earlier would let a concurrent read
+    cache the old value again before the write is visible. Dropped on rollback.
+    """
+    if isinstance(db, Session):
+        db.info.setdefault("cache_invalidations", set()).add((name, key))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for name, key in session.info.pop("cache_invalidations", ()):
+        invalidate(name, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("cache_invalidations", None)
+
+
+# Cache degli utenti autenticati, indicizzata per email (il "sub" del token)
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+user_cache = make_cache("users", maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# Versione corrente dei token per utente (indicizzata per id), usata da get_current_principal
+TOKEN_VERSION_TTL = float(os.getenv("TOKEN_VERSION_TTL", "30"))
+
+token_version_cache = make_cache("token-versions", maxsize=USER_CACHE_SIZE, ttl=TOKEN_VERSION_TTL)
@@ -0,0 +1,93 @@
+"""
+Response cache for the public catalog endpoints (faculties, courses, teachers).
+
+Every write to ``faculties``, ``courses`` or ``teachers`` bumps the ``catalog`` row of
+``cache_versions`` through a statement trigger, whichever service performs it. Reads
+look that version up (a primary-key read) and serve the body cached under
+``(version, path)``, so an admin write invalidates every replica at its next request
+without any message between services; entries of older versions simply age out.
+The cache itself is local or shared on Redis depending on ``CACHE_BACKEND``.
+
+Responses carry a strong ``ETag`` (hash of the body) and a ``Cache-Control`` the nginx
+front and browsers can honour; a matching ``If-None-Match`` gets a bodiless 304.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from sapienza_common.cache import make_cache
+from sapienza_common.models.cache_version import CacheVersion
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "1024"))
+# Rete di sicurezza: la versione invalida già tutto a ogni scrittura
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "3600"))
+# max-age per nginx e browser: per questo tempo possono servire il catalogo senza chiedere
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "60"))
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE}"
+
+catalog_cache = make_cache("catalog", maxsize=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL)
+not_modified = 0
+
+catalog_version_query = select(CacheVersion.version).where(CacheVersion.name == "catalog")
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def _serialize(schema, data):
+    """ Validate ``data`` (ORM objects included) against ``schema`` and return ``(body, etag)``. """
+    adapter = _adapter(schema)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """ ``If-None-Match`` uses the weak comparison: ``W/"x"`` matches ``"x"``. """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _respond(request: Request, entry) -> Response:
+    global not_modified
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def catalog_response(request: Request, db, schema, build) -> Response:
+    """
+    Serve the catalog read ``build()`` (validated against ``schema``) from the cache.
+    ``build`` only runs on a miss; any ``HTTPException`` it raises is not cached.
+    """
+    key = (db.scalar(catalog_version_query) or 0, request.url.path)
+    entry = catalog_cache.get(key)
+    if entry is None:
+        entry = _serialize(schema, build())
+        catalog_cache.set(key, entry)
+    return _respond(request, entry)
+
+
+async def catalog_response_async(request: Request, db, schema, build) -> Response:
+    """ ``catalog_response`` for the asyncpg routes: ``build`` is a coroutine function. """
+    key = (await db.scalar(catalog_version_query) or 0, request.url.path)
+    entry = catalog_cache.get(key)
+    if entry is None:
+        entry = _serialize(schema, await build())
+        catalog_cache.set(key, entry)
+    return _respond(request, entry)
+
+
+def catalog_cache_stats() -> dict:
+    return {**catalog_cache.stats(), "not_modified": not_modified, "max_age": CATALOG_MAX_AGE}
@@ -0,0 +1,170 @@
+from sqlalchemy import create_engine, Column, DateTime, event, update
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker, Session, with_loader_criteria
+from sqlalchemy.pool import NullPool, QueuePool
+from datetime import datetime
+import os
+import threading
+import time
+
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:admin@db/sapienza_advisor")
+
+# Configurazione del pool di connessioni (per servizio, da variabili d'ambiente)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+# "pgbouncer": nessun pool locale, ogni checkout apre una connessione verso PgBouncer
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+
+# Modalità asincrona (opt-in): le route più usate girano su asyncpg senza occupare il threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+)
+
+# Cancellazione logica (opt-in): appunti, recensioni e valutazioni vengono marcati con deleted_at
+# invece di essere eliminati (e poi rimossi in blocco da commands.purge_tombstones)
+SOFT_DELETE = os.getenv("SOFT_DELETE", "false").lower() in ("1", "true", "yes")
+
+
+class InstrumentedQueuePool(QueuePool):
+    """ QueuePool that records how long callers wait to get a connection. """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = {"checkouts": 0, "timeouts": 0, "total_wait": 0.0, "max_wait": 0.0}
+        self._wait_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._wait_lock:
+                self.wait_stats["timeouts"] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.wait_stats["checkouts"] += 1
+                self.wait_stats["total_wait"] += waited
+                self.wait_stats["max_wait"] = max(self.wait_stats["max_wait"], waited)
+
+    def recreate(self):
+        # Usato da SQLAlchemy dopo un errore di connessione: conserva le statistiche
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+if DB_POOL_MODE == "pgbouncer":
+    engine = create_engine(DATABASE_URL, poolclass=NullPool, pool_pre_ping=DB_POOL_PRE_PING)
+else:
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base = declarative_base()
+
+
+class SoftDeleteMixin:
+    """ Models whose rows can be tombstoned instead of deleted (see ``SOFT_DELETE``). """
+    deleted_at = Column(DateTime, nullable=True)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_tombstones(execute_state):
+    """
+    Tombstoned rows are invisible to every ORM query, whatever the current mode, unless
+    the statement is run with ``execution_options(include_deleted=True)``. Relationship
+    loads still see them, so ORM cascades (user or course deletes) remove them too.
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(SoftDeleteMixin, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
+
+
+def remove(db, obj) -> bool:
+    """
+    Delete ``obj``, or tombstone it when ``SOFT_DELETE`` is on and its model supports it.
+    Returns ``False`` when the row had already been tombstoned by a concurrent request:
+    the caller must not apply the removal to the aggregates a second time.
+    """
+    if SOFT_DELETE and isinstance(obj, SoftDeleteMixin):
+        model = type(obj)
+        # UPDATE condizionato: di due cancellazioni concorrenti solo una trova la riga ancora viva
+        tombstoned = db.execute(
+            update(model).where(model.id == obj.id, model.deleted_at.is_(None)).values(deleted_at=datetime.utcnow())
+        )
+        return tombstoned.rowcount > 0
+    db.delete(obj)
+    return True
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    if DB_POOL_MODE == "pgbouncer":
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool, pool_pre_ping=DB_POOL_PRE_PING)
+    else:
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def pool_stats() -> dict:
+    """ Snapshot of the connection pool used by this service. """
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {"mode": DB_POOL_MODE, "pool": type(pool).__name__}
+
+    wait = pool.wait_stats
+    return {
+        "mode": DB_POOL_MODE,
+        "pool_size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": wait["checkouts"],
+        "timeouts": wait["timeouts"],
+        "avg_wait_ms": round(wait["total_wait"] / wait["checkouts"] * 1000, 3) if wait["checkouts"] else 0.0,
+        "max_wait_ms": round(wait["max_wait"] * 1000, 3),
+    }
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """ ``AsyncSession`` dependency, available when ``DB_ASYNC`` is enabled. """
+    async with AsyncSessionLocal() as db:
+        yield db
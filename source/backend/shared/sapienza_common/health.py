@@ -0,0 +1,57 @@
+"""
+Liveness and readiness probes common to every service.
+
+``/health`` answers as soon as the process serves requests. ``/ready`` answers 200
+only once the database is reachable and initialized (``commands.init_db`` of the Auth
+Service has recorded an Alembic revision) and every check the service registered with
+``readiness_check`` passes; otherwise 503 with the failing checks, so an orchestrator
+keeps traffic away until then.
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from sapienza_common.database import engine
+
+router = APIRouter(tags=["health"])
+
+# Controlli aggiuntivi per servizio: nome -> funzione che solleva un'eccezione se non pronto
+checks = {}
+
+
+def readiness_check(name: str):
+    """ Register the decorated function as a readiness check of this service. """
+    def register(function):
+        checks[name] = function
+        return function
+    return register
+
+
+@readiness_check("database")
+def database_ready():
+    try:
+        with engine.connect() as conn:
+            revision = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except SQLAlchemyError as exc:
+        raise RuntimeError(f"database unavailable or not initialized: {exc.__class__.__name__}")
+    if revision is None:
+        raise RuntimeError("database not initialized")
+
+
+@router.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready():
+    failed = {}
+    for name, check in checks.items():
+        try:
+            check()
+        except Exception as exc:
+            failed[name] = str(exc)
+    if failed:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "checks": failed})
+    return {"status": "ready"}
@@ -0,0 +1,33 @@
+"""
+Monitoring endpoints common to every service; service-specific ones (blob GC queue,
+catalog cache, ...) stay in the service's ``main.py``.
+"""
+from fastapi import APIRouter
+
+from sapienza_common.cache import caches, user_cache
+from sapienza_common.database import pool_stats
+from sapienza_common.revocation import revoked_tokens
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/db-pool")
+def db_pool_metrics():
+    return pool_stats()
+
+
+@router.get("/user-cache")
+def user_cache_metrics():
+    return user_cache.stats()
+
+
+@router.get("/caches")
+def caches_metrics():
+    """ Every cache of this process, by name. """
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+@router.get("/revocations")
+def revocations_metrics():
+    """ Access tokens revoked by a logout, as known to this process. """
+    return revoked_tokens.stats()
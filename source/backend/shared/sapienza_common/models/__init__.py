@@ -0,0 +1,72 @@
+"""
+SQLAlchemy models of the schema shared by all the services, mapped on demand.
+
+Importing the package maps nothing: ``from sapienza_common.models import Note`` (or
+``from sapienza_common.models.note import Note``) imports that one module. Relationships
+name their targets as strings, so when the first query configures the mappers the
+``before_configured`` hook below imports the models they point to, transitively; a
+service that never touches, say, ``BlobGCJob`` never maps it. ``load_all`` maps
+everything, for tools that need the full metadata (Alembic).
+"""
+import importlib
+
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper, RelationshipProperty
+
+from sapienza_common.database import Base
+
+# Modulo di ogni modello, per importarlo solo quando serve
+MODULES = {
+    "User": "user",
+    "Faculty": "faculty",
+    "Course": "course",
+    "Teacher": "teacher",
+    "Note": "note",
+    "Review": "review",
+    "NoteRating": "note_ratings",
+    "Report": "report",
+    "NoteStats": "stats",
+    "CourseStats": "stats",
+    "BlobGCJob": "blob_gc",
+    "CacheVersion": "cache_version",
+    "RefreshToken": "refresh_token",
+    "RevokedToken": "revoked_token",
+    "NoteTextJob": "note_text",
+    "NotePage": "note_text",
+}
+
+__all__ = [*MODULES, "load_all"]
+
+
+def _load(name: str):
+    return getattr(importlib.import_module(f"{__name__}.{MODULES[name]}"), name)
+
+
+def __getattr__(name: str):
+    if name in MODULES:
+        return _load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def load_all():
+    """ Map every model (and register every table in ``Base.metadata``). """
+    for name in MODULES:
+        _load(name)
+
+
+@event.listens_for(Mapper, "before_configured")
+def _load_relationship_targets():
+    """ Import the models that the mapped classes reach through their relationships. """
+    while True:
+        mapped = {mapper.class_.__name__ for mapper in Base.registry.mappers}
+        # Prima della configurazione il target di una relationship è ancora la stringa del nome
+        missing = {
+            prop.argument
+            for mapper in Base.registry.mappers
+            for prop in mapper._props.values()
+            if isinstance(prop, RelationshipProperty) and isinstance(prop.argument, str)
+        } - mapped
+        if not missing:
+            return
+        for name in missing:
+            _load(name)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from sapienza_common.database import Base
+
+# Coda durevole dei blob GridFS da rilasciare. Le righe sono inserite da un trigger su
+# "notes" (vedi SCHEMA_UPGRADES in Authentication), quindi anche le cancellazioni a cascata
+# di utenti, corsi e facoltà ci finiscono, nella stessa transazione del DELETE.
+# La svuota il worker di NotesManagement (commands/blob_gc.py).
+
+class BlobGCJob(Base):
+    __tablename__ = "blob_gc_queue"
+
+    id = Column(BigInteger, primary_key=True)
+    file_id = Column(String, nullable=False)
+    enqueued_at = Column(DateTime, nullable=False, server_default=func.now())
+    available_at = Column(DateTime, nullable=False, server_default=func.now())  # Spostato in avanti dopo un errore
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(String, nullable=True)
+
+    __table_args__ = (Index("ix_blob_gc_queue_available_at", "available_at", "id"),)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, BigInteger, String
+from sapienza_common.database import Base
+
+# Contatori di versione dei dati quasi statici (es. "catalog": facoltà, corsi, professori).
+# Li incrementano dei trigger (vedi SCHEMA_UPGRADES in Authentication) a ogni scrittura,
+# da qualunque servizio arrivi: le cache delle letture sono indicizzate per versione.
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
@@ -1,17 +1,21 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
-from database.database import Base
+from sapienza_common.database import Base
+from sapienza_common.search import search_vector_column
 
 class Course(Base):
     __tablename__ = "courses"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
-    faculty_id = Column(Integer, ForeignKey("faculties.id"), nullable=False)
+    faculty_id = Column(Integer, ForeignKey("faculties.id"), nullable=False, index=True)
     teacher_id = Column(Integer, ForeignKey("teachers.id", ondelete="SET NULL"), nullable=True)
+    search_vector = search_vector_column("name")  # Ricerca full-text (vedi sapienza_common.search)
 
     faculty = relationship("Faculty", back_populates="courses")
     teacher = relationship("Teacher", back_populates="courses")
 
     notes = relationship("Note", back_populates="course", cascade="all, delete-orphan")
     reviews = relationship("Review", back_populates="course", cascade="all, delete-orphan")  # Relazione con le recensioni
+
+    __table_args__ = (Index("ix_courses_search_vector", "search_vector", postgresql_using="gin"),)
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
-from database.database import Base
+from sapienza_common.database import Base
 
 class Faculty(Base):
     __tablename__ = "faculties"
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, ForeignKey, DateTime, Index, text
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from sapienza_common.database import Base, SoftDeleteMixin
+from sapienza_common.search import search_vector_column
+
+class Note(SoftDeleteMixin, Base):
+    __tablename__ = "notes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    file_id = Column(String, nullable=False)  # ID di GridFS
+    size = Column(BigInteger, nullable=True)  # Dimensione del file in byte
+    sha256 = Column(String(64), nullable=True)  # Hash del contenuto del file
+    description = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    search_vector = search_vector_column("description")  # Ricerca full-text (vedi sapienza_common.search)
+
+    # Relazioni
+    course = relationship("Course", back_populates="notes")
+    student = relationship("User", back_populates="notes")
+    ratings = relationship("NoteRating", back_populates="note", cascade="all, delete-orphan")
+    reports = relationship("Report", back_populates="note", cascade="all, delete")
+
+    __table_args__ = (
+        # Appunti di un corso, dal più recente (copre anche i filtri su course_id)
+        Index("ix_notes_course_id_created_at", "course_id", "created_at"),
+        Index("ix_notes_search_vector", "search_vector", postgresql_using="gin", postgresql_where=text("deleted_at IS NULL")),
+    )
\ No newline at end of file
@@ -1,14 +1,14 @@
-from sqlalchemy import Column, Integer, ForeignKey, String, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from database.database import Base
+from sapienza_common.database import Base, SoftDeleteMixin
 
-class NoteRating(Base):
+class NoteRating(SoftDeleteMixin, Base):
     __tablename__ = "note_ratings"
 
     id = Column(Integer, primary_key=True, index=True)
     note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)  # Nota valutata
-    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)  # Studente che vota
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)  # Studente che vota
     rating = Column(Integer, nullable=False)  # Voto da 1 a 5
     comment = Column(String, nullable=True)  # Commento opzionale
     created_at = Column(DateTime, default=datetime.utcnow)  # Data della valutazione
@@ -16,3 +16,8 @@ class NoteRating(Base):
     # Relazioni
     note = relationship("Note", back_populates="ratings")
     student = relationship("User", back_populates="ratings")
+
+    # Un voto per studente e appunto (i tombstone non contano); copre anche i filtri su note_id
+    __table_args__ = (
+        Index("uq_note_ratings_note_student", "note_id", "student_id", unique=True, postgresql_where=text("deleted_at IS NULL")),
+    )
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
+from sqlalchemy.sql import func
+from sapienza_common.database import Base
+from sapienza_common.search import search_vector_column
+
+# Testo estratto dai file degli appunti (PDF e testo semplice), una riga per pagina, per la
+# ricerca dentro i documenti. Lo scrive il worker di NotesManagement (commands/extract_text.py)
+# a partire da note_text_queue, in cui upload_note e il backfill accodano gli appunti.
+
+class NoteTextJob(Base):
+    __tablename__ = "note_text_queue"
+
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    enqueued_at = Column(DateTime, nullable=False, server_default=func.now())
+    available_at = Column(DateTime, nullable=False, server_default=func.now())  # Spostato in avanti dopo un errore
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    extracted_at = Column(DateTime, nullable=True)  # NULL finché il testo non è stato estratto
+    pages = Column(Integer, nullable=True)  # Pagine con del testo
+    last_error = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Job ancora da fare, dal più recente: gli upload passano davanti al backfill
+        Index("ix_note_text_queue_pending", "note_id", postgresql_where=text("extracted_at IS NULL")),
+    )
+
+
+class NotePage(Base):
+    __tablename__ = "note_pages"
+
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    page = Column(Integer, primary_key=True)  # Numero di pagina nel file, da 1
+    content = Column(Text, nullable=False)
+    search_vector = search_vector_column("content")  # Ricerca full-text (vedi sapienza_common.search)
+
+    __table_args__ = (Index("ix_note_pages_search_vector", "search_vector", postgresql_using="gin"),)
@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sapienza_common.database import Base
+
+# Refresh token opachi, salvati solo come hash SHA-256 (sono casuali a 256 bit: niente bcrypt).
+# Ogni uso li ruota: il vecchio riceve rotated_at e ne nasce uno nuovo nella stessa famiglia
+# (una famiglia = una sessione di login). Il riuso di un token già ruotato revoca la famiglia.
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    rotated_at = Column(DateTime, nullable=True)  # Sostituito da un token più recente della famiglia
+    revoked_at = Column(DateTime, nullable=True)  # Logout, cambio password o riuso sospetto
@@ -1,19 +1,27 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, func
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Index, func, text
 from sqlalchemy.orm import relationship
-from database.database import Base
+from sapienza_common.database import Base, SoftDeleteMixin
+from sapienza_common.search import search_vector_column
 
-class Review(Base):
+class Review(SoftDeleteMixin, Base):
     __tablename__ = "reviews"
 
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
-    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     rating_clarity = Column(Integer, nullable=False)
     rating_feasibility = Column(Integer, nullable=False)
     rating_availability = Column(Integer, nullable=False)
     comment = Column(String, nullable=True)
     created_at = Column(Date, server_default=func.current_date())
+    search_vector = search_vector_column("comment")  # Ricerca full-text (vedi sapienza_common.search)
 
     course = relationship("Course", back_populates="reviews")
     student = relationship("User", back_populates="reviews")
-    reports = relationship("Report", back_populates="review", cascade="all, delete")
\ No newline at end of file
+    reports = relationship("Report", back_populates="review", cascade="all, delete")
+
+    # Una recensione per studente e corso (i tombstone non contano); copre anche i filtri su course_id
+    __table_args__ = (
+        Index("uq_reviews_course_student", "course_id", "student_id", unique=True, postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_reviews_search_vector", "search_vector", postgresql_using="gin", postgresql_where=text("deleted_at IS NULL")),
+    )
\ No newline at end of file
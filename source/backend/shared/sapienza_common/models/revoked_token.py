@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from sapienza_common.database import Base
+
+# Access token revocati prima della scadenza (logout), per "jti". Ogni servizio ne tiene
+# in memoria l'insieme e lo aggiorna leggendo le righe nuove (vedi sapienza_common.revocation);
+# le righe servono solo fino a expires_at, poi vengono eliminate.
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
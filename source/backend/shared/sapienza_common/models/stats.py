@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, Computed, Index
+from sapienza_common.database import Base
+
+# Aggregati dei voti mantenuti ad ogni scrittura (vedi sapienza_common/stats.py), così le letture
+# non devono più scorrere note_ratings e reviews.
+
+class NoteStats(Base):
+    __tablename__ = "note_stats"
+
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
+    ratings_count = Column(Integer, nullable=False, default=0, server_default="0")
+    ratings_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    # Media calcolata da Postgres (colonna generata): non può andare fuori sincrono con count/sum
+    average_rating = Column(Numeric, Computed("ratings_sum::numeric / NULLIF(ratings_count, 0)", persisted=True))
+    # Istogramma: numero di voti da 1 a 5 stelle
+    stars_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    stars_5 = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Appunti di un corso ordinati per media (i non votati, NULL, in fondo all'ordine decrescente)
+        Index("ix_note_stats_course_average", "course_id", average_rating.asc().nullsfirst()),
+    )
+
+
+class CourseStats(Base):
+    __tablename__ = "course_stats"
+
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+
+    # Recensioni del corso
+    reviews_count = Column(Integer, nullable=False, default=0, server_default="0")
+    sum_clarity = Column(Integer, nullable=False, default=0, server_default="0")
+    sum_feasibility = Column(Integer, nullable=False, default=0, server_default="0")
+    sum_availability = Column(Integer, nullable=False, default=0, server_default="0")
+    clarity_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    clarity_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    clarity_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    clarity_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    clarity_5 = Column(Integer, nullable=False, default=0, server_default="0")
+    feasibility_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    feasibility_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    feasibility_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    feasibility_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    feasibility_5 = Column(Integer, nullable=False, default=0, server_default="0")
+    availability_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    availability_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    availability_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    availability_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    availability_5 = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Valutazioni di tutti gli appunti del corso
+    note_ratings_count = Column(Integer, nullable=False, default=0, server_default="0")
+    note_ratings_sum = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Index
+from sqlalchemy.orm import relationship
+from sapienza_common.database import Base
+from sapienza_common.search import search_vector_column, NAME_SEARCH_CONFIG
+
+class Teacher(Base):
+    __tablename__ = "teachers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)
+    search_vector = search_vector_column("name", NAME_SEARCH_CONFIG)  # Ricerca full-text (vedi sapienza_common.search)
+
+    # Relazione con i corsi
+    courses = relationship("Course", back_populates="teacher", cascade="save-update")
+
+    __table_args__ = (Index("ix_teachers_search_vector", "search_vector", postgresql_using="gin"),)
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey
 from sqlalchemy.orm import relationship
-from database.database import Base
+from sapienza_common.database import Base
 
 class User(Base):
     __tablename__ = "users"
@@ -14,6 +14,8 @@ class User(Base):
     birth_date = Column(Date, nullable=False)
     city = Column(String, nullable=False)
     faculty_id = Column(Integer, ForeignKey("faculties.id", ondelete="SET NULL"), nullable=True) 
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Incrementato per invalidare i token emessi
+    warnings_count = Column(Integer, nullable=False, default=0, server_default="0")  # Ammonizioni ricevute dalla moderazione
 
     faculty = relationship("Faculty", back_populates="students")
     notes = relationship("Note", back_populates="student", cascade="all, delete-orphan")
@@ -0,0 +1,141 @@
+"""
+Password hashing (bcrypt) on a dedicated, size-limited process pool.
+
+A bcrypt hash or verification costs ~250 ms of CPU. Run inline in a route it holds a
+threadpool worker (and the GIL-bound interpreter) for all that time, so a burst of
+logins serializes and starves every other request of the service. The async helpers
+below send the work to ``PASSWORD_POOL_SIZE`` worker processes instead, and admit at
+most ``PASSWORD_MAX_PENDING`` calls (running or queued) per service process: beyond
+that they fail fast with ``503`` and ``Retry-After`` rather than letting the queue,
+and the latency of every caller, grow without bound.
+
+``PASSWORD_POOL_SIZE=0`` hashes in the threadpool of the service, as before, keeping
+the admission limit (the baseline of ``benchmarks/login_load.py``).
+``hash_password``/``verify_password`` stay synchronous for scripts (``init_db``).
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", str(os.cpu_count() or 1)))
+# Richieste ammesse contemporaneamente (in esecuzione + in coda) prima di rispondere 503
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", str(max(PASSWORD_POOL_SIZE, 1) * 4)))
+PASSWORD_RETRY_AFTER = int(os.getenv("PASSWORD_RETRY_AFTER", "1"))
+
+_pool = None
+# Contatori toccati solo dal thread dell'event loop: nessun lock necessario
+_pending = 0
+_stats = {"completed": 0, "rejected": 0, "max_pending": 0, "seconds": 0.0}
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn e non fork: il processo del servizio ha già thread (pool DB, pub/sub della cache)
+        _pool = ProcessPoolExecutor(PASSWORD_POOL_SIZE, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def start_pool():
+    """ Start the worker processes now (on startup) so that the first login does not pay for it. """
+    if not PASSWORD_POOL_SIZE:
+        return
+    executor = _executor()
+    for future in [executor.submit(os.getpid) for _ in range(PASSWORD_POOL_SIZE)]:
+        future.result()
+
+
+def stop_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _overloaded() -> HTTPException:
+    _stats["rejected"] += 1
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password checks in progress, retry shortly.",
+        headers={"Retry-After": str(PASSWORD_RETRY_AFTER)},
+    )
+
+
+async def _run(function, *args):
+    global _pending, _pool
+    if _pending >= PASSWORD_MAX_PENDING:
+        raise _overloaded()
+
+    _pending += 1
+    _stats["max_pending"] = max(_stats["max_pending"], _pending)
+    started = time.perf_counter()
+    try:
+        if PASSWORD_POOL_SIZE:
+            result = await asyncio.get_running_loop().run_in_executor(_executor(), function, *args)
+        else:
+            result = await run_in_threadpool(function, *args)
+    except BrokenProcessPool:
+        # Un worker è morto (OOM, kill): il pool non accetta più lavoro, se ne crea uno nuovo alla prossima chiamata
+        _pool = None
+        raise _overloaded()
+    finally:
+        _pending -= 1
+    _stats["completed"] += 1
+    _stats["seconds"] += time.perf_counter() - started
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+def _hash_many(passwords: list) -> list:
+    return [hash_password(password) for password in passwords]
+
+
+async def hash_passwords_async(passwords: list) -> list:
+    """
+    Hash a batch of passwords (bulk import): one job per worker instead of one per
+    password, each admitted like a single call, so the whole batch needs at most
+    ``PASSWORD_POOL_SIZE`` slots. Results are in the order of ``passwords``.
+    """
+    if not passwords:
+        return []
+    size = -(-len(passwords) // max(PASSWORD_POOL_SIZE, 1))
+    chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+    results = await asyncio.gather(*(_run(_hash_many, chunk) for chunk in chunks))
+    return [hashed for chunk in results for hashed in chunk]
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await _run(verify_password, password, hashed_password)
+
+
+def pool_stats() -> dict:
+    completed = _stats["completed"]
+    return {
+        "workers": PASSWORD_POOL_SIZE,
+        "max_pending": PASSWORD_MAX_PENDING,
+        "pending": _pending,
+        "peak_pending": _stats["max_pending"],
+        "completed": completed,
+        "rejected": _stats["rejected"],
+        "avg_ms": round(_stats["seconds"] / completed * 1000, 1) if completed else None,
+    }
@@ -0,0 +1,89 @@
+"""
+Rotating refresh tokens.
+
+A login opens a *family* (one per session) and returns its first refresh token.
+``/auth/refresh`` trades a valid token for a new access token and the next token of
+the family: one indexed SHA-256 lookup and no bcrypt. A token that was already rotated
+and is presented again means that two parties hold the family (a stolen token): the
+whole family is revoked, unless the rotation is younger than ``REFRESH_REUSE_GRACE``
+seconds (two tabs refreshing at once), which only gets a 401.
+"""
+import hashlib
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, update
+
+from sapienza_common.auth import credentials_error
+from sapienza_common.models.refresh_token import RefreshToken
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+REFRESH_REUSE_GRACE = float(os.getenv("REFRESH_REUSE_GRACE", "10"))
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db, user_id: int, family_id: Optional[str] = None) -> str:
+    """ Store a new refresh token (a new family unless ``family_id``) and return it; saved on commit. """
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=_digest(token),
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+def rotate_refresh_token(db, token: str) -> tuple:
+    """
+    Consume ``token`` and return ``(user_id, next token of the family)``; raises 401 if
+    the token is unknown, expired, revoked or already rotated.
+    """
+    now = datetime.utcnow()
+    current = db.query(RefreshToken).filter(RefreshToken.token_hash == _digest(token)).with_for_update().first()
+    if current is None or current.revoked_at is not None or current.expires_at <= now:
+        raise credentials_error("Invalid refresh token")
+
+    if current.rotated_at is not None:
+        if now - current.rotated_at > timedelta(seconds=REFRESH_REUSE_GRACE):
+            # Riuso di un token già sostituito: la sessione è compromessa, si chiude per entrambi
+            revoke_family(db, current.family_id)
+            db.commit()
+        raise credentials_error("Refresh token already used")
+
+    current.rotated_at = now
+    return current.user_id, issue_refresh_token(db, current.user_id, current.family_id)
+
+
+def revoke_family(db, family_id: str):
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+def revoke_refresh_token(db, token: str):
+    """ Close the session ``token`` belongs to (logout); unknown tokens are ignored. """
+    family_id = db.query(RefreshToken.family_id).filter(RefreshToken.token_hash == _digest(token)).scalar()
+    if family_id is not None:
+        revoke_family(db, family_id)
+
+
+def revoke_user_refresh_tokens(db, user_id: int):
+    """ Close every session of a user (password change). """
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+def purge_expired_refresh_tokens(db):
+    db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= datetime.utcnow()))
@@ -0,0 +1,108 @@
+"""
+Revocation list of the access tokens, checked on every authenticated request.
+
+Every access token carries a random ``jti``. ``/auth/logout`` stores it in
+``revoked_tokens`` until the token would have expired. Each service process keeps the
+unexpired ids in a set and reads only the rows revoked since its previous read, at most
+every ``REVOCATION_POLL_SECONDS`` and only while requests come in: the check itself is a
+set lookup, and a logout reaches every replica within that interval (at once in the
+process that wrote it).
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from sapienza_common.database import engine
+from sapienza_common.models.revoked_token import RevokedToken
+
+REVOCATION_POLL_SECONDS = float(os.getenv("REVOCATION_POLL_SECONDS", "2"))
+# Margine di rilettura: una revoca può diventare visibile (commit) dopo la lettura successiva al suo revoked_at
+REVOCATION_OVERLAP = timedelta(seconds=30)
+
+
+class RevocationList:
+    """ Set of the revoked, still unexpired token ids, kept in sync with ``revoked_tokens``. """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self.polls = 0
+        self.errors = 0
+        self._revoked = {}  # jti -> expires_at
+        self._since = None  # Inizio dell'ultima lettura riuscita (None: insieme mai caricato)
+        self._next_poll = 0.0
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+
+    def add(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def _poll(self):
+        now = datetime.utcnow()
+        query = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > now)
+        if self._since is not None:
+            query = query.where(RevokedToken.revoked_at >= self._since - REVOCATION_OVERLAP)
+        with engine.connect() as conn:
+            rows = conn.execute(query).all()
+
+        with self._lock:
+            self._revoked.update(rows)
+            # Un token scaduto è già rifiutato dalla firma: non serve più ricordarlo
+            self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+        self._since = now
+        self.polls += 1
+
+    def refresh(self):
+        """ Read the new revocations if the last read is older than ``poll_interval``. """
+        if time.monotonic() < self._next_poll:
+            return
+        # Legge un solo thread per volta; gli altri usano l'insieme com'è
+        if not self._poll_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() < self._next_poll:
+                return
+            try:
+                self._poll()
+            except SQLAlchemyError:
+                self.errors += 1  # Si riprova alla prossima scadenza, intanto vale l'insieme già noto
+            self._next_poll = time.monotonic() + self.poll_interval
+        finally:
+            self._poll_lock.release()
+
+    def __contains__(self, jti) -> bool:
+        self.refresh()
+        return jti in self._revoked
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._revoked)
+        return {"revoked": size, "poll_interval": self.poll_interval, "polls": self.polls, "errors": self.errors}
+
+
+revoked_tokens = RevocationList(REVOCATION_POLL_SECONDS)
+
+
+def is_revoked(payload: dict) -> bool:
+    """ Whether the decoded access token was revoked (tokens without ``jti`` predate the list). """
+    jti = payload.get("jti")
+    return jti is not None and jti in revoked_tokens
+
+
+def revoke_access_token(db, payload: dict):
+    """ Add the decoded access token to the revocation list; effective once ``db`` commits. """
+    jti = payload.get("jti")
+    if jti is None:
+        return
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    db.execute(insert(RevokedToken).values(jti=jti, expires_at=expires_at).on_conflict_do_nothing())
+    revoked_tokens.add(jti, expires_at)
+
+
+def purge_expired_revocations(db):
+    db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
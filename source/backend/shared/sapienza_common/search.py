@@ -0,0 +1,69 @@
+"""
+Full-text search over the catalog and the students' content.
+
+Each searchable model has a ``search_vector`` column: a ``tsvector`` generated by
+Postgres from the text column (``GENERATED ALWAYS ... STORED``), so it is recomputed by
+every INSERT/UPDATE whatever service or script writes the row, and indexed with GIN.
+Free text (note descriptions, course names, review comments) uses the Italian
+configuration, with stemming and stop words; proper names (teachers) use ``simple``.
+
+``prefix_query`` turns what the user typed into a ``tsquery`` in which every word is a
+prefix (``analisi mat`` -> ``analisi:* & mat:*``), for search-as-you-type. Words shorter
+than ``MIN_PREFIX_LENGTH`` are matched whole: a one- or two-letter prefix matches
+hundreds of words and most of the table.
+
+Ranking reads every matching row, so a common word ("appunti") would rank hundreds of
+thousands of them. Searches rank only the ``SEARCH_CANDIDATES`` most recent matches,
+which Postgres finds by walking the primary key backwards when the word is frequent and
+through the GIN index when it is rare: the cost stays bounded whatever the word.
+"""
+import os
+import re
+from typing import Optional
+
+from sqlalchemy import Column, Computed, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+
+TEXT_SEARCH_CONFIG = "italian"  # Testi liberi: stemming e stop word italiane
+NAME_SEARCH_CONFIG = "simple"  # Nomi propri: solo minuscole, nessuno stemming
+
+# Parole considerate per query: oltre, la query è solo più lenta e non più precisa
+MAX_QUERY_TERMS = 8
+MIN_PREFIX_LENGTH = 3
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "1000"))
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_vector_column(source: str, config: str = TEXT_SEARCH_CONFIG):
+    """ Generated ``tsvector`` of the text column ``source``; deferred, loaded only if asked for. """
+    return deferred(Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{config}'::regconfig, coalesce({source}, ''))", persisted=True),
+    ))
+
+
+def prefix_query(text: str) -> Optional[str]:
+    """ ``tsquery`` source matching every word of ``text`` as a prefix; ``None`` if there are no words. """
+    # Solo lettere e cifre: niente operatori tsquery (& | ! : ( )) che arrivino dall'utente
+    terms = _WORD.findall(text.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" if len(term) >= MIN_PREFIX_LENGTH else term for term in terms)
+
+
+def _tsquery(query: str, config: str):
+    return func.to_tsquery(literal_column(f"'{config}'::regconfig"), query)
+
+
+def matches(vector, query: str, config: str):
+    """ ``(condition, rank)`` for ``vector @@ query``; the rank orders the results, best first. """
+    tsquery = _tsquery(query, config)
+    return vector.op("@@")(tsquery), func.ts_rank(vector, tsquery)
+
+
+def headline(text, query: str, config: str = TEXT_SEARCH_CONFIG):
+    """ Excerpt of ``text`` around the words matching ``query``, which are wrapped in ``<b>``. """
+    return func.ts_headline(
+        literal_column(f"'{config}'::regconfig"), text, _tsquery(query, config), "MaxFragments=1, MinWords=10, MaxWords=30"
+    )
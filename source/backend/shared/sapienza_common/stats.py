@@ -0,0 +1,197 @@
+"""
+Maintenance of the denormalized rating aggregates (``note_stats`` and ``course_stats``).
+
+Every write that adds, changes or removes a note rating or a course review calls one of
+the ``*_changed`` helpers before committing, so the aggregate moves in the same
+transaction as the row it describes. Deltas are applied with
+``INSERT ... ON CONFLICT DO UPDATE SET col = col + delta``, which is atomic under
+concurrent writers. Deletes that cascade (users, notes) recompute the affected rows
+with ``refresh_stats`` instead, and ``rebuild_*`` repair any drift. Tombstoned rows
+(``deleted_at`` set) never count.
+"""
+from sqlalchemy import func, select, exists, or_, and_
+from sqlalchemy.dialects.postgresql import insert
+
+from sapienza_common.models.course import Course
+from sapienza_common.models.note import Note
+from sapienza_common.models.note_ratings import NoteRating
+from sapienza_common.models.review import Review
+from sapienza_common.models.stats import NoteStats, CourseStats
+from sapienza_common.cache import invalidate_after_commit
+
+STARS = range(1, 6)
+REVIEW_CRITERIA = ("clarity", "feasibility", "availability")
+
+
+def review_scores(review) -> tuple:
+    """ ``(clarity, feasibility, availability)`` of a review, as stored. """
+    return int(review.rating_clarity), int(review.rating_feasibility), int(review.rating_availability)
+
+
+def _histogram_deltas(prefix: str, old, new) -> dict:
+    deltas = {}
+    if old is not None:
+        deltas[f"{prefix}_{int(old)}"] = deltas.get(f"{prefix}_{int(old)}", 0) - 1
+    if new is not None:
+        deltas[f"{prefix}_{int(new)}"] = deltas.get(f"{prefix}_{int(new)}", 0) + 1
+    return deltas
+
+
+def _add(db, model, key: dict, deltas: dict, insert_only: dict = None):
+    """ Add ``deltas`` to the aggregate row identified by ``key``, creating it if missing. """
+    deltas = {column: value for column, value in deltas.items() if value}
+    if not deltas:
+        return
+
+    stmt = insert(model).values(**key, **(insert_only or {}), **deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={column: model.__table__.c[column] + stmt.excluded[column] for column in deltas},
+    )
+    db.execute(stmt)
+
+
+def create_note_stats(db, note):
+    """ Empty aggregate row for a new note, so it shows up in the listings sorted by average. """
+    db.execute(
+        insert(NoteStats)
+        .values(note_id=note.id, course_id=note.course_id)
+        .on_conflict_do_nothing(index_elements=["note_id"])
+    )
+
+
+def note_rating_changed(db, note, old=None, new=None):
+    """
+    Apply a rating of ``note`` going from ``old`` to ``new`` (``None`` for insert/delete)
+    to the note and course aggregates.
+    """
+    count = (new is not None) - (old is not None)
+    total = (new or 0) - (old or 0)
+
+    deltas = {"ratings_count": count, "ratings_sum": total}
+    deltas.update(_histogram_deltas("stars", old, new))
+    _add(db, NoteStats, {"note_id": note.id}, deltas, insert_only={"course_id": note.course_id})
+    _add(db, CourseStats, {"course_id": note.course_id}, {"note_ratings_count": count, "note_ratings_sum": total})
+
+
+def review_changed(db, course_id: int, old: tuple = None, new: tuple = None):
+    """
+    Apply a review of ``course_id`` going from ``old`` to ``new`` score tuples
+    (see ``review_scores``; ``None`` for insert/delete) to the course aggregate.
+    """
+    deltas = {"reviews_count": (new is not None) - (old is not None)}
+    for index, name in enumerate(REVIEW_CRITERIA):
+        old_score = old[index] if old else None
+        new_score = new[index] if new else None
+        deltas[f"sum_{name}"] = (new_score or 0) - (old_score or 0)
+        deltas.update(_histogram_deltas(name, old_score, new_score))
+    _add(db, CourseStats, {"course_id": course_id}, deltas)
+    invalidate_after_commit(db, "course-ratings", course_id)
+
+
+# --- Ricalcolo dalle tabelle sorgente (cancellazioni a cascata, backfill, riparazione) ---
+
+def note_stats_select(note_ids=None):
+    """ Expected ``note_stats`` rows aggregated from ``note_ratings`` (every note if ``note_ids`` is None). """
+    columns = [
+        Note.id.label("note_id"),
+        Note.course_id.label("course_id"),
+        func.count(NoteRating.id).label("ratings_count"),
+        func.coalesce(func.sum(NoteRating.rating), 0).label("ratings_sum"),
+    ]
+    columns += [func.count(NoteRating.id).filter(NoteRating.rating == star).label(f"stars_{star}") for star in STARS]
+
+    stmt = (
+        select(*columns)
+        .outerjoin(NoteRating, and_(NoteRating.note_id == Note.id, NoteRating.deleted_at.is_(None)))
+        .where(Note.deleted_at.is_(None))
+        .group_by(Note.id)
+    )
+    if note_ids is not None:
+        stmt = stmt.where(Note.id.in_(note_ids))
+    return stmt
+
+
+def course_stats_select(course_ids=None):
+    """ Expected ``course_stats`` rows aggregated from ``reviews`` and ``note_ratings``. """
+    review_columns = [func.count().label("reviews_count")]
+    for name in REVIEW_CRITERIA:
+        column = getattr(Review, f"rating_{name}")
+        review_columns.append(func.sum(column).label(f"sum_{name}"))
+        review_columns += [func.count().filter(column == star).label(f"{name}_{star}") for star in STARS]
+    reviews = select(Review.course_id, *review_columns).where(Review.deleted_at.is_(None)).group_by(Review.course_id)
+
+    note_ratings = (
+        select(
+            Note.course_id,
+            func.count(NoteRating.id).label("note_ratings_count"),
+            func.sum(NoteRating.rating).label("note_ratings_sum"),
+        )
+        .join(NoteRating, NoteRating.note_id == Note.id)
+        .where(Note.deleted_at.is_(None), NoteRating.deleted_at.is_(None))
+        .group_by(Note.course_id)
+    )
+
+    stmt = select(Course.id.label("course_id"))
+    if course_ids is not None:
+        reviews = reviews.where(Review.course_id.in_(course_ids))
+        note_ratings = note_ratings.where(Note.course_id.in_(course_ids))
+        stmt = stmt.where(Course.id.in_(course_ids))
+
+    reviews, note_ratings = reviews.subquery(), note_ratings.subquery()
+    aggregates = [c for c in reviews.c if c.name != "course_id"] + [c for c in note_ratings.c if c.name != "course_id"]
+    return (
+        stmt.add_columns(*[func.coalesce(c, 0).label(c.name) for c in aggregates])
+        .outerjoin(reviews, reviews.c.course_id == Course.id)
+        .outerjoin(note_ratings, note_ratings.c.course_id == Course.id)
+    )
+
+
+def _replace(db, model, key: str, stmt):
+    """ Overwrite (or create) the aggregate rows with the result of ``stmt``. """
+    columns = list(stmt.selected_columns.keys())
+    upsert = insert(model).from_select(columns, stmt)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[key],
+        set_={column: upsert.excluded[column] for column in columns if column != key},
+    )
+    db.execute(upsert)
+
+
+def rebuild_note_stats(db, note_ids=None):
+    _replace(db, NoteStats, "note_id", note_stats_select(note_ids))
+
+
+def rebuild_course_stats(db, course_ids=None):
+    _replace(db, CourseStats, "course_id", course_stats_select(course_ids))
+
+
+def refresh_stats(db, note_ids=(), course_ids=()):
+    """ Recompute the aggregates of the given notes and courses (after a cascading delete). """
+    if note_ids:
+        rebuild_note_stats(db, list(note_ids))
+    if course_ids:
+        rebuild_course_stats(db, list(course_ids))
+        for course_id in course_ids:
+            invalidate_after_commit(db, "course-ratings", course_id)
+
+
+def stats_affected_by_user(db, user_id: int):
+    """
+    Notes and courses whose aggregates change when ``user_id`` is deleted together with
+    the notes, ratings and reviews it owns. Call it before the delete, then pass the
+    result to ``refresh_stats`` once the delete has been flushed.
+    """
+    rated_notes = select(NoteRating.note_id).where(NoteRating.student_id == user_id)
+    note_ids = set(db.scalars(rated_notes))
+    course_ids = set(db.scalars(select(Review.course_id).where(Review.student_id == user_id)))
+    course_ids |= set(db.scalars(
+        select(Note.course_id).where(or_(Note.id.in_(rated_notes), Note.student_id == user_id))
+    ))
+    return note_ids, course_ids
+
+
+def backfill_missing_stats(db):
+    """ Create the aggregate rows of notes and courses that have none yet (e.g. right after the upgrade). """
+    rebuild_note_stats(db, select(Note.id).where(~exists().where(NoteStats.note_id == Note.id)))
+    rebuild_course_stats(db, select(Course.id).where(~exists().where(CourseStats.course_id == Course.id)))
@@ -0,0 +1,129 @@
+"""
+Bulk creation of user accounts from a CSV file, to onboard a whole cohort at once.
+
+The file has a header with at least ``email, password, first_name, last_name,
+birth_date, city`` (``birth_date`` as ``YYYY-MM-DD``) and optionally ``faculty_id``.
+Invalid rows, duplicated emails and unknown faculties are reported by line and left
+out; the valid rows are imported in batches of ``USER_IMPORT_BATCH_SIZE``. Each batch
+skips the emails that already exist (without hashing their passwords), hashes the
+others as one job per worker of the password pool, and inserts them with a single
+``INSERT ... ON CONFLICT DO NOTHING``, committed per batch.
+
+Used by ``POST /admin/users/import`` and by ``commands.import_users`` of the Auth Service.
+"""
+import csv
+import io
+import os
+from datetime import date
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, EmailStr, Field, ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from sapienza_common.models.faculty import Faculty
+from sapienza_common.models.user import User
+from sapienza_common.passwords import hash_passwords_async
+
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", "500"))
+REQUIRED_COLUMNS = ("email", "password", "first_name", "last_name", "birth_date", "city")
+
+
+class ImportedUser(BaseModel):
+    email: EmailStr
+    password: str = Field(min_length=1)
+    first_name: str = Field(min_length=1)
+    last_name: str = Field(min_length=1)
+    birth_date: date
+    city: str = Field(min_length=1)
+    faculty_id: Optional[int] = None
+    line: Optional[int] = None  # Riga del file, per gli errori
+
+
+def parse_users_csv(content: str) -> tuple:
+    """
+    Validate the CSV ``content``; returns ``(users, errors)`` where errors are
+    ``{"line": n, "error": message}``. Raises ``ValueError`` if required columns are missing.
+    """
+    reader = csv.DictReader(io.StringIO(content))
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+
+    users, errors, seen = [], [], set()
+    for record in reader:
+        line = reader.line_num
+        # Celle vuote come assenti (faculty_id facoltativo), spazi ai bordi ignorati
+        values = {key: value.strip() for key, value in record.items() if key and value and value.strip()}
+        try:
+            user = ImportedUser(**{**values, "line": line})
+        except ValidationError as exc:
+            problems = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+            errors.append({"line": line, "error": problems})
+            continue
+        if user.email in seen:
+            errors.append({"line": line, "error": f"Duplicate email {user.email} in the file"})
+            continue
+        seen.add(user.email)
+        users.append(user)
+    return users, errors
+
+
+def _existing_emails(db, emails: list) -> set:
+    existing = set(db.scalars(select(User.email).where(User.email.in_(emails))))
+    db.rollback()  # La connessione torna al pool durante l'hashing
+    return existing
+
+
+def _insert_users(db, users: list, hashes: list) -> int:
+    rows = [
+        {
+            "email": user.email,
+            "hashed_password": hashed_password,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "birth_date": user.birth_date,
+            "city": user.city,
+            "faculty_id": user.faculty_id,
+            "is_admin": False,
+        }
+        for user, hashed_password in zip(users, hashes)
+    ]
+    # Un'email registrata nel frattempo viene saltata invece di far fallire il batch
+    created = db.scalars(
+        insert(User).values(rows).on_conflict_do_nothing(index_elements=[User.email]).returning(User.id)
+    ).all()
+    db.commit()
+    return len(created)
+
+
+def _unknown_faculties(db, users: list) -> set:
+    requested = {user.faculty_id for user in users if user.faculty_id is not None}
+    if not requested:
+        return set()
+    known = set(db.scalars(select(Faculty.id).where(Faculty.id.in_(requested))))
+    db.rollback()
+    return requested - known
+
+
+async def import_users(db, users: list, errors: Optional[list] = None) -> dict:
+    """ Create the accounts of ``users`` (from ``parse_users_csv``); returns the counts and the errors. """
+    errors = list(errors or [])
+    unknown = await run_in_threadpool(_unknown_faculties, db, users)
+    if unknown:
+        errors.extend(
+            {"line": user.line, "error": f"Unknown faculty_id {user.faculty_id}"} for user in users if user.faculty_id in unknown
+        )
+        users = [user for user in users if user.faculty_id not in unknown]
+
+    created = skipped = 0
+    for start in range(0, len(users), USER_IMPORT_BATCH_SIZE):
+        batch = users[start:start + USER_IMPORT_BATCH_SIZE]
+        existing = await run_in_threadpool(_existing_emails, db, [user.email for user in batch])
+        new_users = [user for user in batch if user.email not in existing]
+        hashes = await hash_passwords_async([user.password for user in new_users])
+        inserted = await run_in_threadpool(_insert_users, db, new_users, hashes) if new_users else 0
+        created += inserted
+        skipped += len(batch) - inserted
+    return {"created": created, "skipped_existing": skipped, "errors": errors}
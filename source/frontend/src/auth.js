@@ -0,0 +1,94 @@
+// src/auth.js
+// Gestione dei token: access token breve (15 min) + refresh token rotante.
+// L'interceptor di axios rinnova l'access token quando una richiesta autenticata
+// riceve 401 e la ripete una volta; se il rinnovo fallisce si torna al login.
+import axios from 'axios';
+
+const AUTH_API_URL = process.env.REACT_APP_AUTH_API_URL;
+
+// Salva i token ricevuti da login, register, refresh o cambio password
+export const saveTokens = ({ access_token, refresh_token }) => {
+  localStorage.setItem('access_token', access_token);
+  if (refresh_token) {
+    localStorage.setItem('refresh_token', refresh_token);
+  }
+};
+
+export const clearTokens = () => {
+  localStorage.removeItem('access_token');
+  localStorage.removeItem('refresh_token');
+};
+
+// Logout lato server: chiude la sessione e revoca l'access token, poi pulisce lo storage
+export const logout = async () => {
+  const accessToken = localStorage.getItem('access_token');
+  const refreshToken = localStorage.getItem('refresh_token');
+  try {
+    await axios.post(
+      `${AUTH_API_URL}/auth/logout`,
+      { refresh_token: refreshToken },
+      accessToken ? { headers: { Authorization: `Bearer ${accessToken}` } } : {}
+    );
+  } catch (err) {
+    console.error('Logout request failed:', err);
+  } finally {
+    clearTokens();
+  }
+};
+
+// Un solo rinnovo alla volta: le richieste che ricevono 401 insieme aspettano lo stesso
+let refreshing = null;
+
+const refreshAccessToken = () => {
+  if (!refreshing) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshing = (refreshToken
+      ? axios.post(`${AUTH_API_URL}/auth/refresh`, { refresh_token: refreshToken })
+      : Promise.reject(new Error('No refresh token'))
+    )
+      .then(({ data }) => {
+        saveTokens(data);
+        return data.access_token;
+      })
+      .catch((err) => {
+        // Un'altra scheda può aver già ruotato il refresh token: in tal caso usiamo i suoi token
+        if (refreshToken && localStorage.getItem('refresh_token') !== refreshToken) {
+          return localStorage.getItem('access_token');
+        }
+        throw err;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
+
+axios.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const request = error.config;
+    // Solo richieste autenticate, una volta sola (login e refresh non hanno Authorization)
+    if (
+      error.response?.status !== 401 ||
+      !request ||
+      request._retried ||
+      !request.headers?.get('Authorization')
+    ) {
+      return Promise.reject(error);
+    }
+    request._retried = true;
+
+    try {
+      const accessToken = await refreshAccessToken();
+      request.headers.set('Authorization', `Bearer ${accessToken}`);
+      return axios(request);
+    } catch {
+      clearTokens();
+      if (window.location.pathname !== '/') {
+        window.location.assign('/');
+      }
+      return Promise.reject(error);
+    }
+  }
+);
@@ -1,14 +1,15 @@
 // src/components/AdminDashboard.js
 import React from 'react';
 import { Link, Outlet, useLocation, useNavigate } from 'react-router-dom';
+import { logout } from '../auth';
 import './Dashboard.scss';
 
 const AdminDashboard = () => {
   const navigate = useNavigate();
   const location = useLocation();
 
-  const handleLogout = () => {
-    localStorage.removeItem('access_token');
+  const handleLogout = async () => {
+    await logout();
     navigate('/');
   };
 
@@ -27,70 +27,24 @@ const AdminDashboardHome = () => {
     const fetchData = async () => {
       const token = localStorage.getItem('access_token');
       try {
-        // Prepare promises with 404 handling
-        const usersPromise = axios
-          .get(
-            `${process.env.REACT_APP_ADMIN_API_URL}/admin/users`,
-            { headers: { Authorization: `Bearer ${token}` } }
-          )
-          .catch(err => {
-            if (err.response && err.response.status === 404) {
-              console.warn('Users endpoint returned 404, using empty array');
-              return { data: [] };
-            }
-            throw err;
-          });
+        // Counters and latest reports come from a single summary request
+        const summaryRes = await axios.get(
+          `${process.env.REACT_APP_ADMIN_API_URL}/admin/summary`,
+          {
+            headers: { Authorization: `Bearer ${token}` },
+            params: { recent: 10 },
+          }
+        );
+        const { counts, recent_reports: recentReportsData } = summaryRes.data;
 
-        const facultiesPromise = axios
-          .get(
-            `${process.env.REACT_APP_ADMIN_API_URL}/admin/faculties`,
-            { headers: { Authorization: `Bearer ${token}` } }
-          )
-          .catch(err => {
-            if (err.response && err.response.status === 404) {
-              console.warn('Faculties endpoint returned 404, using empty array');
-              return { data: [] };
-            }
-            throw err;
-          });
-
-        const reportsPromise = axios
-          .get(
-            `${process.env.REACT_APP_ADMIN_API_URL}/admin/reports`,
-            { headers: { Authorization: `Bearer ${token}` } }
-          )
-          .catch(err => {
-            if (err.response && err.response.status === 404) {
-              console.warn('Reports endpoint returned 404, using empty array');
-              return { data: [] };
-            }
-            throw err;
-          });
-
-        // Execute all
-        const [usersRes, facultiesRes, reportsRes] = await Promise.all([
-          usersPromise,
-          facultiesPromise,
-          reportsPromise,
-        ]);
-
-        // Extract data or default to empty array
-        const usersData = Array.isArray(usersRes.data) ? usersRes.data : [];
-        const facultiesData = Array.isArray(facultiesRes.data) ? facultiesRes.data : [];
-        const reportsData = Array.isArray(reportsRes.data) ? reportsRes.data : [];
-
-        // Set overview counts
         setOverview({
-          userCount: usersData.length,
-          facultyCount: facultiesData.length,
-          reportCount: reportsData.length,
+          userCount: counts.users,
+          facultyCount: counts.faculties,
+          reportCount: counts.reports,
         });
 
-        // Sort and set recent reports (latest first), or empty
-        const sortedReports = reportsData
-          .slice()
-          .sort((a, b) => new Date(b.datetime || 0) - new Date(a.datetime || 0));
-        setRecentReports(sortedReports);
+        // The server returns the latest reports first
+        setRecentReports(recentReportsData);
       } catch (err) {
         console.error('Error loading admin overview:', err);
         setError('Unable to retrieve admin data.');
@@ -15,9 +15,25 @@ import DeleteIcon from '@mui/icons-material/Delete';
 import StarIcon from '@mui/icons-material/Star';
 import StarBorderIcon from '@mui/icons-material/StarBorder';
 
+const PAGE_SIZE = 20;
+
+// Groups reports by the id of the review/note they point at
+const groupReports = (reports, key) => {
+  const grouped = {};
+  reports.forEach(r => {
+    if (r[key]) {
+      grouped[r[key]] = grouped[r[key]] || [];
+      grouped[r[key]].push(r);
+    }
+  });
+  return grouped;
+};
+
 const AdminReportsPage = () => {
   const [reviews, setReviews] = useState([]);
   const [notes, setNotes] = useState([]);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
+  const [notesCursor, setNotesCursor] = useState(null);
   const [reportsByReview, setReportsByReview] = useState({});
   const [reportsByNote, setReportsByNote] = useState({});
   const [loading, setLoading] = useState(true);
@@ -27,39 +43,39 @@ const AdminReportsPage = () => {
   const token = localStorage.getItem('access_token');
   const headers = { Authorization: `Bearer ${token}` };
 
+  // Reports of the given reviews/notes only (the ones shown on the current page)
+  const fetchReports = async (key, ids) => {
+    if (ids.length === 0) return {};
+    const res = await axios.get(`${apiBase}/admin/reports`, {
+      headers,
+      params: { [key === 'id_review' ? 'review_ids' : 'note_ids']: ids, limit: 500 },
+      paramsSerializer: { indexes: null },
+    });
+    return groupReports(res.data.items, key);
+  };
+
+  // One page of reported reviews (or notes) plus their reports
+  const fetchReported = async (kind, cursor = null) => {
+    const params = { reported: true, limit: PAGE_SIZE };
+    if (cursor) params.cursor = cursor;
+    const res = await axios.get(`${apiBase}/admin/${kind}`, { headers, params });
+    const key = kind === 'reviews' ? 'id_review' : 'id_note';
+    const reports = await fetchReports(key, res.data.items.map(item => item.id));
+    return { items: res.data.items, nextCursor: res.data.next_cursor, reports };
+  };
+
   const fetchData = async () => {
     setLoading(true);
     setError('');
     try {
-      const revPromise = axios.get(`${apiBase}/admin/reviews`, { headers })
-        .catch(err => err.response?.status === 404 ? { data: [] } : Promise.reject(err));
-      const notePromise = axios.get(`${apiBase}/admin/notes`, { headers })
-        .catch(err => err.response?.status === 404 ? { data: [] } : Promise.reject(err));
-      const reportPromise = axios.get(`${apiBase}/admin/reports`, { headers })
-        .catch(err => err.response?.status === 404 ? { data: [] } : Promise.reject(err));
-
-      const [revRes, noteRes, repRes] = await Promise.all([revPromise, notePromise, reportPromise]);
-      const revs = Array.isArray(revRes.data) ? revRes.data : [];
-      const nts = Array.isArray(noteRes.data) ? noteRes.data : [];
-      const reps = Array.isArray(repRes.data) ? repRes.data : [];
-
-      const byReview = {};
-      const byNote = {};
-      reps.forEach(r => {
-        if (r.id_review) {
-          byReview[r.id_review] = byReview[r.id_review] || [];
-          byReview[r.id_review].push(r);
-        }
-        if (r.id_note) {
-          byNote[r.id_note] = byNote[r.id_note] || [];
-          byNote[r.id_note].push(r);
-        }
-      });
-
-      setReviews(revs.filter(r => byReview[r.id]?.length));
-      setNotes(nts.filter(n => byNote[n.id]?.length));
-      setReportsByReview(byReview);
-      setReportsByNote(byNote);
+      const [revPage, notePage] = await Promise.all([fetchReported('reviews'), fetchReported('notes')]);
+
+      setReviews(revPage.items);
+      setReviewsCursor(revPage.nextCursor);
+      setReportsByReview(revPage.reports);
+      setNotes(notePage.items);
+      setNotesCursor(notePage.nextCursor);
+      setReportsByNote(notePage.reports);
     } catch (err) {
       console.error(err);
       setError('Unable to load reported items.');
@@ -68,6 +84,28 @@ const AdminReportsPage = () => {
     }
   };
 
+  const handleLoadMoreReviews = async () => {
+    try {
+      const page = await fetchReported('reviews', reviewsCursor);
+      setReviews(prev => [...prev, ...page.items]);
+      setReviewsCursor(page.nextCursor);
+      setReportsByReview(prev => ({ ...prev, ...page.reports }));
+    } catch {
+      setError('Unable to load reported items.');
+    }
+  };
+
+  const handleLoadMoreNotes = async () => {
+    try {
+      const page = await fetchReported('notes', notesCursor);
+      setNotes(prev => [...prev, ...page.items]);
+      setNotesCursor(page.nextCursor);
+      setReportsByNote(prev => ({ ...prev, ...page.reports }));
+    } catch {
+      setError('Unable to load reported items.');
+    }
+  };
+
   useEffect(() => {
     fetchData();
   }, []);
@@ -102,6 +140,27 @@ const AdminReportsPage = () => {
     }
   };
 
+  // Resolves many reports in one request: 'dismiss', 'delete_target' or 'delete_target_and_warn'
+  const moderate = async (reportIds, action) => {
+    if (reportIds.length === 0) return;
+    try {
+      await axios.post(`${apiBase}/admin/reports/moderate`, { report_ids: reportIds, action }, { headers });
+      fetchData();
+    } catch {
+      setError('Unable to moderate reports.');
+    }
+  };
+
+  const reportIdsOf = (grouped, ids) => ids.flatMap(id => (grouped[id] || []).map(r => r.id_report));
+
+  const handleModerateAll = (action, message) => {
+    if (!window.confirm(message)) return;
+    moderate([
+      ...reportIdsOf(reportsByReview, reviews.map(review => review.id)),
+      ...reportIdsOf(reportsByNote, notes.map(note => note.id)),
+    ], action);
+  };
+
   if (loading) {
     return <Box sx={{ display: 'flex', justifyContent: 'center', mt: 4 }}><CircularProgress /></Box>;
   }
@@ -111,6 +170,17 @@ const AdminReportsPage = () => {
       <Typography variant="h4" textAlign= 'center' gutterBottom><strong>Reports</strong></Typography>
       {error && <Alert severity="error" sx={{ mb: 2 }}>{error}</Alert>}
 
+      {(reviews.length > 0 || notes.length > 0) && (
+        <Box sx={{ display: 'flex', gap: 2, mb: 2 }}>
+          <Button variant="outlined" onClick={() => handleModerateAll('dismiss', 'Dismiss all the reports shown?')}>
+            Dismiss all
+          </Button>
+          <Button variant="contained" color="error" onClick={() => handleModerateAll('delete_target_and_warn', 'Delete every reported item shown and warn its author?')}>
+            Delete all and warn authors
+          </Button>
+        </Box>
+      )}
+
       <Typography variant="h5" sx={{ mt: 2 }}>Reported Reviews</Typography>
       {reviews.length > 0 ? reviews.map(review => (
         <Card key={review.id} sx={{ mb: 2 }}>
@@ -160,9 +230,13 @@ const AdminReportsPage = () => {
             <Button size="small" color="error" onClick={() => handleDeleteReview(review.id)}>
               Delete Review
             </Button>
+            <Button size="small" onClick={() => moderate(reportIdsOf(reportsByReview, [review.id]), 'dismiss')}>
+              Dismiss Reports
+            </Button>
           </CardActions>
         </Card>
       )) : <Typography>No reported reviews.</Typography>}
+      {reviewsCursor && <Button onClick={handleLoadMoreReviews}>Load more reviews</Button>}
 
       <Typography variant="h5" sx={{ mt: 4 }}>Reported Notes</Typography>
       {notes.length > 0 ? notes.map(note => (
@@ -185,9 +259,13 @@ const AdminReportsPage = () => {
             <Button size="small" color="error" onClick={() => handleDeleteNote(note.id)}>
               Delete Note
             </Button>
+            <Button size="small" onClick={() => moderate(reportIdsOf(reportsByNote, [note.id]), 'dismiss')}>
+              Dismiss Reports
+            </Button>
           </CardActions>
         </Card>
       )) : <Typography>No reported notes.</Typography>}
+      {notesCursor && <Button onClick={handleLoadMoreNotes}>Load more notes</Button>}
     </Box>
   );
 };
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import {
   Box,
+  Button,
   TextField,
   List,
   ListItem,
@@ -13,47 +14,52 @@ import {
 } from '@mui/material';
 import CloseIcon from '@mui/icons-material/Close';
 
+const PAGE_SIZE = 50;
+
 const AdminUsersPage = () => {
   const [users, setUsers] = useState([]);
-  const [filtered, setFiltered] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [total, setTotal] = useState(null);
   const [search, setSearch] = useState('');
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
 
-  // Fetch all users
-  useEffect(() => {
-    const fetchUsers = async () => {
-      const token = localStorage.getItem('access_token');
-      try {
-        const res = await axios.get(
-          `${process.env.REACT_APP_ADMIN_API_URL}/admin/users`,
-          { headers: { Authorization: `Bearer ${token}` } }
-        );
-        setUsers(res.data);
-        setFiltered(res.data);
-      } catch (err) {
-        console.error('Error fetching users:', err);
-        setError('Unable to load users.');
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchUsers();
-  }, []);
+  // Fetch one page of users (the search is done by the server)
+  const fetchUsers = async (cursor = null) => {
+    const token = localStorage.getItem('access_token');
+    const params = { limit: PAGE_SIZE, include_total: cursor === null };
+    if (search) params.search = search;
+    if (cursor) params.cursor = cursor;
+    try {
+      const res = await axios.get(
+        `${process.env.REACT_APP_ADMIN_API_URL}/admin/users`,
+        { headers: { Authorization: `Bearer ${token}` }, params }
+      );
+      setUsers(prev => (cursor ? [...prev, ...res.data.items] : res.data.items));
+      setNextCursor(res.data.next_cursor);
+      if (res.data.total !== null) setTotal(res.data.total);
+    } catch (err) {
+      console.error('Error fetching users:', err);
+      setError('Unable to load users.');
+    }
+  };
 
-  // Filter users based on search text
+  // First page, reloaded (with a short debounce) when the search text changes
   useEffect(() => {
-    setFiltered(
-      users.filter(u => {
-        const term = search.toLowerCase();
-        return (
-          u.first_name.toLowerCase().includes(term) ||
-          u.last_name.toLowerCase().includes(term) ||
-          u.email.toLowerCase().includes(term)
-        );
-      })
-    );
-  }, [search, users]);
+    const timer = setTimeout(async () => {
+      setLoading(true);
+      await fetchUsers();
+      setLoading(false);
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    await fetchUsers(nextCursor);
+    setLoadingMore(false);
+  };
 
   // Handle delete user
   const handleDelete = async (id) => {
@@ -67,6 +73,7 @@ const AdminUsersPage = () => {
       // Rimuovi utente dallo stato
       const remaining = users.filter(u => u.id !== id);
       setUsers(remaining);
+      setTotal(prev => (prev !== null ? prev - 1 : prev));
     } catch (err) {
       console.error('Error deleting user:', err);
       setError('Unable to delete user.');
@@ -76,7 +83,9 @@ const AdminUsersPage = () => {
   return (
     <Box sx={{ p: 3 }}>
       <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', mb: 2 }}>
-        <Typography variant="h4" textAlign='center'><strong>User Accounts</strong></Typography>
+        <Typography variant="h4" textAlign='center'>
+          <strong>User Accounts</strong>{total !== null && ` (${total})`}
+        </Typography>
         <TextField
           placeholder="Search for an user"
           variant="outlined"
@@ -95,7 +104,7 @@ const AdminUsersPage = () => {
       ) : (
         <Box sx={{ border: '1px solid #ccc', maxHeight: '60vh', overflowY: 'auto' }}>
           <List disablePadding>
-            {filtered.map((u, i) => (
+            {users.map((u, i) => (
               <ListItem
                 key={u.id}
                 sx={{ bgcolor: i % 2 ? 'grey.100' : 'white' }}
@@ -112,11 +121,18 @@ const AdminUsersPage = () => {
               </ListItem>
             ))}
           </List>
-          {filtered.length === 0 && (
+          {users.length === 0 && (
             <Box sx={{ p: 2 }}>
               <Typography>No users found.</Typography>
             </Box>
           )}
+          {nextCursor && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', p: 2 }}>
+              <Button onClick={handleLoadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </Button>
+            </Box>
+          )}
         </Box>
       )}
     </Box>
@@ -53,11 +53,13 @@ const ChangeFacultyPage = () => {
     try {
       const token = localStorage.getItem('access_token');
       // Chiamata PUT per cambiare la facoltà utilizzando l'endpoint dedicato
-      await axios.put(
+      const { data } = await axios.put(
         `${process.env.REACT_APP_FACULTY_API_URL}/faculties/change-faculty/${selectedFaculty}`,
         {},
         { headers: { Authorization: `Bearer ${token}` } }
       );
+      // Il token contiene la facoltà: sostituiscilo con quello nuovo
+      localStorage.setItem('access_token', data.access_token);
       // Dopo il cambio, reindirizza alla home della dashboard
       navigate('/dashboard/home');
     } catch (err) {
@@ -1,6 +1,7 @@
 import React from 'react';
 import { Link, Outlet, useLocation, useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import { logout } from '../auth';
 import './Dashboard.scss';
 
 const Dashboard = () => {
@@ -8,8 +9,8 @@ const Dashboard = () => {
   const location = useLocation();
 
   // Handler per il logout
-  const handleLogout = () => {
-    localStorage.removeItem('access_token');
+  const handleLogout = async () => {
+    await logout();
     navigate('/');
   };
 
@@ -31,115 +31,37 @@ const DashboardHome = () => {
       try {
         const token = localStorage.getItem('access_token');
 
-        // Retrieve user details to get the username
-        // Assuming the GET /me endpoint is available on the course API URL
-        const userRes = await axios.get(`${process.env.REACT_APP_USER_API_URL}/users/me`, {
+        // Counters and latest activities come from a single summary request
+        const summaryRes = await axios.get(`${process.env.REACT_APP_USER_API_URL}/users/me/summary`, {
           headers: { Authorization: `Bearer ${token}` },
+          params: { recent: 10 },
         });
-        setUsername(`${userRes.data.first_name} ${userRes.data.last_name}`);
-
-        // Make parallel API calls while handling 404 errors gracefully
-        const courseReviewsPromise = axios
-          .get(`${process.env.REACT_APP_COURSE_API_URL}/courses/my-reviews`, {
-            headers: { Authorization: `Bearer ${token}` },
-          })
-          .catch(err => {
-            if (err.response && err.response.status === 404) {
-              console.warn('Course reviews not found (404)');
-              return { data: [] };
-            }
-            throw err;
-          });
-        const notesPromise = axios
-          .get(`${process.env.REACT_APP_NOTES_API_URL}/notes/usr/my-notes`, {
-            headers: { Authorization: `Bearer ${token}` },
-          })
-          .catch(err => {
-            if (err.response && err.response.status === 404) {
-              console.warn('Uploaded notes not found (404)');
-              return { data: [] };
-            }
-            throw err;
-          });
-        const noteRatingsPromise = axios
-          .get(`${process.env.REACT_APP_NOTES_API_URL}/notes/usr/my-reviews`, {
-            headers: { Authorization: `Bearer ${token}` },
-          })
-          .catch(err => {
-            if (err.response && err.response.status === 404) {
-              console.warn('Note reviews not found (404)');
-              return { data: [] };
-            }
-            throw err;
-          });
-        const coursesPromise = axios
-          .get(`${process.env.REACT_APP_COURSE_API_URL}/courses/`, {
-            headers: { Authorization: `Bearer ${token}` },
-          })
-          .catch(err => {
-            if (err.response && err.response.status === 404) {
-              console.warn('Courses not found (404)');
-              return { data: [] };
-            }
-            throw err;
-          });
-
-        const [courseReviewsRes, notesRes, noteRatingsRes, coursesRes] = await Promise.all([
-          courseReviewsPromise,
-          notesPromise,
-          noteRatingsPromise,
-          coursesPromise,
-        ]);
+        const summary = summaryRes.data;
+        setUsername(`${summary.first_name} ${summary.last_name}`);
 
         setOverview({
-          courseReviewsCount: Array.isArray(courseReviewsRes.data) ? courseReviewsRes.data.length : 0,
-          notesCount: Array.isArray(notesRes.data) ? notesRes.data.length : 0,
-          noteRatingsCount: Array.isArray(noteRatingsRes.data) ? noteRatingsRes.data.length : 0,
+          courseReviewsCount: summary.counts.course_reviews,
+          notesCount: summary.counts.notes,
+          noteRatingsCount: summary.counts.note_ratings,
         });
 
-        // Build a mapping: course ID -> course name
-        const courseMap = {};
-        if (Array.isArray(coursesRes.data)) {
-          coursesRes.data.forEach(course => {
-            courseMap[course.id] = course.name;
-          });
-        }
-
-        // Aggregate recent activities, highlighting course names in bold
-        let activities = [];
-        if (Array.isArray(courseReviewsRes.data)) {
-          courseReviewsRes.data.forEach(review => {
-            activities.push({
-              id: `course-review-${review.id}`,
-              description: (
-                <>You left a review for the course <strong>{courseMap[review.course_id] || review.course_id}</strong>.</>
-              ),
-              timestamp: review.created_at,
-            });
-          });
-        }
-        if (Array.isArray(notesRes.data)) {
-          notesRes.data.forEach(note => {
-            activities.push({
-              id: `note-${note.id}`,
-              description: (
-                <>You uploaded a note for the course <strong>{courseMap[note.course_id] || note.course_id}</strong>.</>
-              ),
-              timestamp: note.created_at,
-            });
-          });
-        }
-        if (Array.isArray(noteRatingsRes.data)) {
-          noteRatingsRes.data.forEach(noteRating => {
-            activities.push({
-              id: `note-rating-${noteRating.id}`,
-              description: 'You left a review for a note.',
-              timestamp: noteRating.created_at,
-            });
-          });
-        }
-        // Sort activities by descending timestamp (most recent first)
-        activities.sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp));
+        // Recent activities (already sorted, most recent first), highlighting course names in bold
+        const activities = summary.recent_activity.map(activity => {
+          const courseName = <strong>{activity.course_name || activity.course_id}</strong>;
+          let description;
+          if (activity.type === 'course_review') {
+            description = <>You left a review for the course {courseName}.</>;
+          } else if (activity.type === 'note') {
+            description = <>You uploaded a note for the course {courseName}.</>;
+          } else {
+            description = <>You left a review for a note of the course {courseName}.</>;
+          }
+          return {
+            id: `${activity.type}-${activity.id}`,
+            description,
+            timestamp: activity.created_at,
+          };
+        });
         setRecentActivities(activities);
       } catch (err) {
         console.error('Error retrieving data:', err);
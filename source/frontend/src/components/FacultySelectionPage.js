@@ -34,11 +34,13 @@ const FacultySelectionPage = () => {
     setError('');
     try {
       const token = localStorage.getItem('access_token');
-      await axios.post(
+      const { data } = await axios.post(
         `${process.env.REACT_APP_FACULTY_API_URL}/faculties/enroll/${selectedFaculty}`,
         {}, // corpo della richiesta, se necessario
         { headers: { Authorization: `Bearer ${token}` } }
       );
+      // Il token contiene la facoltà: sostituiscilo con quello nuovo
+      localStorage.setItem('access_token', data.access_token);
       // Dopo l'iscrizione, reindirizza alla dashboard
       navigate('/dashboard/home');
     } catch (err) {
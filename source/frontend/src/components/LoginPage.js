@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 import { useNavigate, Link } from 'react-router-dom';
+import { saveTokens } from '../auth';
 import { Container, Box, Typography, TextField, Button, Alert } from '@mui/material';
 import { styled } from '@mui/system';
 import '@fortawesome/fontawesome-free/css/all.min.css'; // Import Font Awesome
@@ -37,7 +38,7 @@ const LoginPage = () => {
         { email, password }
       );
       const token = response.data.access_token;
-      localStorage.setItem('access_token', token);
+      saveTokens(response.data);
 
       // Recupera i dettagli dell'utente
       const userResponse = await axios.get(
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
+import { clearTokens, logout } from '../auth';
 import { 
   Box, 
   Button, 
@@ -60,8 +61,8 @@ const MyProfile = () => {
       await axios.delete(`${process.env.REACT_APP_USER_API_URL}/users/delete`, {
         headers: { Authorization: `Bearer ${token}` },
       });
-      // Esegui il logout: rimuovi il token e reindirizza alla pagina di login
-      localStorage.removeItem('access_token');
+      // Esegui il logout: rimuovi i token e reindirizza alla pagina di login
+      clearTokens();
       navigate('/');
     } catch (err) {
       console.error('Error deleting account:', err);
@@ -70,8 +71,8 @@ const MyProfile = () => {
   };
 
   // Handler per il logout
-  const handleLogout = () => {
-    localStorage.removeItem('access_token');
+  const handleLogout = async () => {
+    await logout();
     navigate('/');
   };
 
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
+import { saveTokens } from '../auth';
 import { 
   Box, 
   TextField, 
@@ -97,7 +98,7 @@ const MyProfileEdit = () => {
 
     try {
       const token = localStorage.getItem('access_token');
-      await axios.put(
+      const { data } = await axios.put(
         `${process.env.REACT_APP_USER_API_URL}/users/update-password`,
         {
           old_password: oldPassword,
@@ -107,6 +108,8 @@ const MyProfileEdit = () => {
           headers: { Authorization: `Bearer ${token}` },
         }
       );
+      // I token emessi con la vecchia password (e le altre sessioni) non sono più validi
+      saveTokens(data);
       setSuccessPassword('Password updated successfully.');
       setOldPassword('');
       setNewPassword('');
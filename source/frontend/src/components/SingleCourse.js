@@ -235,31 +235,11 @@ const SingleCourse = () => {
     try {
       setLoadingNotes(true);
       const token = localStorage.getItem('access_token');
-      const notesResp = await axios.get(
-        `${process.env.REACT_APP_NOTES_API_URL}/notes/${courseId}`,
+      // Note, media e valutazioni in un'unica richiesta
+      const { data: detailed } = await axios.get(
+        `${process.env.REACT_APP_NOTES_API_URL}/notes/${courseId}/details`,
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      const notes = notesResp.data;
-      const detailed = await Promise.all(
-        notes.map(async (n) => {
-          let avg = 0, rates = [];
-          try {
-            const { data: a } = await axios.get(
-              `${process.env.REACT_APP_NOTES_API_URL}/notes/notes/${n.id}/average-rating`,
-              { headers: { Authorization: `Bearer ${token}` } }
-            );
-            avg = a.average_rating || 0;
-          } catch {}
-          try {
-            const { data: r } = await axios.get(
-              `${process.env.REACT_APP_NOTES_API_URL}/notes/notes/${n.id}/reviews`,
-              { headers: { Authorization: `Bearer ${token}` } }
-            );
-            rates = r;
-          } catch {}
-          return { ...n, average_rating: avg, ratings: rates };
-        })
-      );
       setNotesWithDetails(detailed);
     } catch {
       setErrorNotes('Errore nel recupero delle note.');
@@ -1,6 +1,7 @@
 import React from 'react';
 import ReactDOM from 'react-dom/client';
 import App from './App';
+import './auth'; // Interceptor axios per il rinnovo dei token
 import './App.scss';
 
 const root = ReactDOM.createRoot(document.getElementById('root'));